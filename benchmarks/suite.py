@@ -0,0 +1,375 @@
+"""
+Benchmarks of key generation, encryption, evaluation and decryption
+over a grid of dimensions and ciphertext moduli.
+
+Run `python -m benchmarks --help` (or `just bench --help`) for the
+options. Results are written as JSON and can be compared against a
+previous run, e.g. one stored as a baseline, to flag regressions.
+"""
+
+from venum.encryption import Encryptor
+from venum.evaluation import Evaluator
+from venum.glwe import EncryptionParameters, GlweDistribution
+from venum.key import RelinKey, gen_key_pair
+from venum.ntt import generate_ntt_primes
+from venum.plaintext_encoding import PolynomialEncoder
+from venum.rns import RnsBasis
+
+import numpy as np
+
+import argparse
+import datetime
+import json
+import platform
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterator, List, Tuple
+
+# Version of the JSON result format.
+RESULTS_VERSION = 1
+
+PLAINTEXT_MODULUS = 12289
+RELIN_BASE = 2 ** 16
+BATCH_SIZE = 32
+PERCENTILES = (50, 90, 99)
+
+# Benchmarks of every parameter set, and of RNS parameter sets only, in
+# the order yielded by `benchmarks`.
+BENCHMARK_NAMES = ('gen_key_pair', 'relin_key', 'encrypt', 'encrypt_many',
+                   'decrypt', 'decrypt_many', 'add', 'sub', 'sum', 'mul',
+                   'crt_encode', 'crt_decode')
+RNS_BENCHMARK_NAMES = ('rns_to_int', 'rns_lift')
+
+# (dimension, modulus name) pairs of each grid. Modulus names are
+# resolved by `make_params`.
+GRIDS = {
+    'quick': [(256, 'q62'), (256, 'rns3x30'),
+              (1024, 'q62'), (1024, 'rns3x30')],
+    'full': [(n, modulus) for n in (1024, 2048, 4096)
+             for modulus in ('q62', 'rns3x30', 'rns6x30')]
+    + [(256, 'q127'), (1024, 'q127')],
+}
+
+
+def make_params(dimension: int, modulus: str) -> EncryptionParameters:
+    """
+    Build deterministic parameters for a grid point.
+
+    Args:
+    - dimension: the ring dimension n.
+    - modulus: 'q<b>' for the largest b-bit NTT-friendly prime (or the
+      Mersenne prime 2^127 - 1 for b = 127, which uses Kronecker
+      substitution), 'rns<k>x<b>' for an RNS basis of k such primes.
+
+    Returns:
+    - the encryption parameters.
+    """
+
+    match = re.fullmatch(r'q(\d+)|rns(\d+)x(\d+)', modulus)
+    if match is None:
+        raise ValueError(f"Unknown modulus {modulus!r}")
+    if match.group(1) == '127':
+        ciphertext_modulus = 2 ** 127 - 1
+    elif match.group(1):
+        ciphertext_modulus, = generate_ntt_primes(
+            dimension, int(match.group(1)), 1)
+    else:
+        ciphertext_modulus = RnsBasis(generate_ntt_primes(
+            dimension, int(match.group(3)), int(match.group(2))))
+    return EncryptionParameters(
+        dimension=dimension,
+        ciphertext_modulus=ciphertext_modulus,
+        plaintext_modulus=PLAINTEXT_MODULUS,
+        noise_modulus=3,
+        seed=0
+    )
+
+
+@dataclass
+class Result:
+    """
+    The measurements of one benchmark at one grid point.
+
+    Latencies are per call, in milliseconds. Throughput counts items per
+    second, e.g. messages for batch encryption.
+    """
+
+    name: str
+    params: str
+    calls: int
+    items_per_call: int
+    latency_ms: Dict[str, float]
+    throughput: float
+    peak_memory_bytes: int
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.name, self.params
+
+
+def measure(function: Callable[[], object], min_time: float,
+            min_calls: int, max_calls: int) -> List[float]:
+    """
+    Call a function repeatedly after one warm-up call, until both
+    `min_time` seconds and `min_calls` calls are reached, or `max_calls`
+    calls are made.
+
+    Returns:
+    - the duration of each call in seconds.
+    """
+
+    function()
+    durations = []
+    total = 0.0
+    while len(durations) < max_calls and (len(durations) < min_calls
+                                          or total < min_time):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+        total += durations[-1]
+    return durations
+
+
+def peak_memory(function: Callable[[], object]) -> int:
+    """
+    The peak memory in bytes allocated by one call of a function, as
+    traced by tracemalloc (which includes numpy buffers).
+    """
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - baseline
+
+
+def summarize(name: str, params: str, durations: List[float],
+              items: int, memory: int) -> Result:
+    latencies = np.array(durations) * 1e3
+    latency_ms = {f'p{p}': float(np.percentile(latencies, p))
+                  for p in PERCENTILES}
+    latency_ms.update(mean=float(latencies.mean()),
+                      min=float(latencies.min()),
+                      max=float(latencies.max()))
+    return Result(name, params, len(durations), items, latency_ms,
+                  items * len(durations) / float(np.sum(durations)), memory)
+
+
+def benchmark_names(params: EncryptionParameters) -> Tuple[str, ...]:
+    """
+    The names of the benchmarks of one parameter set, without creating
+    its keys.
+    """
+
+    if params.ciphertext_basis is not None:
+        return BENCHMARK_NAMES + RNS_BENCHMARK_NAMES
+    return BENCHMARK_NAMES
+
+
+def benchmarks(params: EncryptionParameters
+               ) -> Iterator[Tuple[str, Callable[[], object], int]]:
+    """
+    The benchmarks of one parameter set, as (name, function, items per
+    call) triples. Keys and inputs are created once, outside the timed
+    functions.
+    """
+
+    dist = GlweDistribution(params)
+    n = params.dimension
+    rng = np.random.default_rng(0)
+    sk, pk = gen_key_pair(dist)
+    relin_key = RelinKey.from_secret_key(sk, RELIN_BASE)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    evaluator = Evaluator(dist, relin_key)
+    messages = rng.integers(0, PLAINTEXT_MODULUS, (BATCH_SIZE, n)).tolist()
+    ciphers = encryptor.encrypt_many(pk, messages)
+    lhs, rhs = ciphers[:2]
+    message = dist.plaintext_ring.from_coeffs(messages[0])
+    noise = dist.sample_noise()
+    encoded = dist.crt_encoder.encode(message, noise)
+
+    yield 'gen_key_pair', lambda: gen_key_pair(dist), 1
+    yield ('relin_key', lambda: RelinKey.from_secret_key(sk, RELIN_BASE),
+           1)
+    yield 'encrypt', lambda: encryptor.encrypt(pk, messages[0]), 1
+    yield ('encrypt_many', lambda: encryptor.encrypt_many(pk, messages),
+           BATCH_SIZE)
+    yield 'decrypt', lambda: encryptor.decrypt(sk, lhs), 1
+    yield ('decrypt_many', lambda: encryptor.decrypt_many(sk, ciphers),
+           BATCH_SIZE)
+    yield 'add', lambda: evaluator.add(lhs, rhs), 1
+    yield 'sub', lambda: evaluator.sub(lhs, rhs), 1
+    yield 'sum', lambda: evaluator.sum(ciphers), BATCH_SIZE
+    yield 'mul', lambda: evaluator.mul(lhs, rhs), 1
+    yield 'crt_encode', lambda: dist.crt_encoder.encode(message, noise), 1
+    yield 'crt_decode', lambda: dist.crt_encoder.decode(encoded), 1
+    basis = params.ciphertext_basis
+    if basis is not None:
+        value = int(rng.integers(0, 2 ** 62)) * basis.modulus // 2 ** 62
+        rns = basis.to_rns(value)
+        yield 'rns_to_int', rns.to_int, 1
+        yield 'rns_lift', lambda: lhs.glwe_sample.body.lift(), n
+
+
+def run(grid: List[Tuple[int, str]], pattern: str = None,
+        min_time: float = 0.2, min_calls: int = 5,
+        max_calls: int = 1000, log=None) -> List[Result]:
+    """
+    Run the benchmarks of every grid point. The keys of a grid point
+    are only created if at least one of its benchmarks is selected.
+
+    Args:
+    - grid: (dimension, modulus name) pairs, see `make_params`.
+    - pattern: a regular expression; only benchmarks whose
+      'name/params' matches are run.
+    - min_time, min_calls, max_calls: see `measure`.
+    - log: a text stream for progress lines, if any.
+
+    Returns:
+    - the results, in grid order.
+    """
+
+    results = []
+    for dimension, modulus in grid:
+        label = f'n={dimension},{modulus}'
+        params = make_params(dimension, modulus)
+        if pattern and not any(re.search(pattern, f'{name}/{label}')
+                               for name in benchmark_names(params)):
+            continue
+        for name, function, items in benchmarks(params):
+            if pattern and not re.search(pattern, f'{name}/{label}'):
+                continue
+            durations = measure(function, min_time, min_calls, max_calls)
+            result = summarize(name, label, durations, items,
+                               peak_memory(function))
+            results.append(result)
+            if log is not None:
+                print(format_result(result), file=log, flush=True)
+    return results
+
+
+def format_result(result: Result) -> str:
+    latency = result.latency_ms
+    return (f'{result.name:<14} {result.params:<18} '
+            f'p50 {latency["p50"]:10.3f} ms  p99 {latency["p99"]:10.3f} ms  '
+            f'{result.throughput:12.1f} items/s  '
+            f'peak {result.peak_memory_bytes / 2 ** 20:8.2f} MiB')
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def to_json(results: List[Result], grid_name: str) -> Dict:
+    """
+    The machine-readable form of a run, with the environment it ran in.
+    """
+
+    return {
+        'version': RESULTS_VERSION,
+        'metadata': {
+            'grid': grid_name,
+            'timestamp': datetime.datetime.now(
+                datetime.timezone.utc).isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+        },
+        'results': [asdict(result) for result in results],
+    }
+
+
+def from_json(data: Dict) -> List[Result]:
+    if data.get('version') != RESULTS_VERSION:
+        raise ValueError(f"Unsupported results version "
+                         f"{data.get('version')}")
+    return [Result(**result) for result in data['results']]
+
+
+def compare(results: List[Result], baseline: List[Result],
+            tolerance: float, metric: str = 'p50'
+            ) -> List[Tuple[Result, Result, float]]:
+    """
+    Compare results with a baseline.
+
+    Args:
+    - results: the new results.
+    - baseline: the reference results. Benchmarks missing from either
+      side are ignored.
+    - tolerance: the relative slowdown above which a benchmark is a
+      regression, e.g. 0.1 for 10%.
+    - metric: the latency statistic compared.
+
+    Returns:
+    - (result, baseline result, ratio) for every regression, where ratio
+      is the new latency over the baseline latency.
+    """
+
+    reference = {result.key: result for result in baseline}
+    regressions = []
+    for result in results:
+        base = reference.get(result.key)
+        if base is None:
+            continue
+        ratio = result.latency_ms[metric] / base.latency_ms[metric]
+        if ratio > 1 + tolerance:
+            regressions.append((result, base, ratio))
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks', description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--grid', choices=sorted(GRIDS), default='quick',
+                        help='the parameter grid (default: quick)')
+    parser.add_argument('--filter', dest='pattern',
+                        help="run only benchmarks whose 'name/params' "
+                             "matches this regular expression")
+    parser.add_argument('--output', '-o',
+                        help='write the results to this JSON file')
+    parser.add_argument('--baseline',
+                        help='compare with the results in this JSON file '
+                             'and exit with status 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='relative slowdown of the median latency '
+                             'flagged as a regression (default: 0.1)')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='minimum seconds per benchmark (default: 0.2)')
+    parser.add_argument('--min-calls', type=int, default=5,
+                        help='minimum calls per benchmark (default: 5)')
+    parser.add_argument('--max-calls', type=int, default=1000,
+                        help='maximum calls per benchmark (default: 1000)')
+    args = parser.parse_args(argv)
+
+    results = run(GRIDS[args.grid], args.pattern, args.min_time,
+                  args.min_calls, args.max_calls, log=sys.stdout)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(to_json(results, args.grid), file, indent=2)
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as file:
+        baseline = from_json(json.load(file))
+    regressions = compare(results, baseline, args.tolerance)
+    for result, base, ratio in regressions:
+        print(f'REGRESSION {result.name} {result.params}: '
+              f'{base.latency_ms["p50"]:.3f} ms -> '
+              f'{result.latency_ms["p50"]:.3f} ms ({ratio:.2f}x)')
+    print(f'{len(regressions)} regression(s) against {args.baseline}')
+    return 1 if regressions else 0
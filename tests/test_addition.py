@@ -1,8 +1,9 @@
 from venum.glwe import EncryptionParameters, GlweDistribution
 from venum.encryption import Encryptor
-from venum.plaintext_encoding import PolynomialEncoder
+from venum.plaintext_encoding import Plaintext, PolynomialEncoder
 from venum.key import gen_key_pair
 from venum.evaluation import Evaluator
+from venum.rns import RnsBasis
 
 import pytest
 
@@ -13,7 +14,7 @@ import pytest
         {
             "params": EncryptionParameters(
                 dimension=4,
-                ciphertext_modulus=383,
+                ciphertext_modulus=65539,
                 plaintext_modulus=127,
                 noise_modulus=3,
                 seed=0
@@ -35,7 +36,7 @@ import pytest
         {
             "params": EncryptionParameters(
                 dimension=4,
-                ciphertext_modulus=383,
+                ciphertext_modulus=65539,
                 plaintext_modulus=127,
                 noise_modulus=3,
             ),
@@ -72,6 +73,28 @@ import pytest
             "lhs": [10001, 10002, 10003, 10004],
             "rhs": [4, 3, 2, 1],
         },
+        {
+            "params": EncryptionParameters(
+                dimension=8,
+                ciphertext_modulus=RnsBasis([1073741441, 1073740609,
+                                             1073739937]),
+                plaintext_modulus=12289,
+                noise_modulus=3,
+                seed=2
+            ),
+            "lhs": [10001, 10002, 10003, 10004, 0, 0, 0, 1],
+            "rhs": [4, 3, 2, 1, 0, 0, 0, 0],
+        },
+        {
+            "params": EncryptionParameters(
+                dimension=4,
+                ciphertext_modulus=RnsBasis([383, 12289]),
+                plaintext_modulus=127,
+                noise_modulus=3,
+            ),
+            "lhs": [1, 2, 3, 4],
+            "rhs": [5, 6, 7, 8],
+        },
     ])
 def test_addition(input):
     params, lhs, rhs = input["params"], input["lhs"], input["rhs"]
@@ -86,3 +109,88 @@ def test_addition(input):
     cipher_result = eval.add(lhs_cipher, rhs_cipher)
     decrypted = encryptor.decrypt(sk, cipher_result)
     assert decrypted == expected
+
+
+@pytest.mark.parametrize("ciphertext_modulus", [
+    12289,
+    RnsBasis([1073741441, 1073740609]),
+])
+def test_add_plain(ciphertext_modulus):
+    params = EncryptionParameters(
+        dimension=4,
+        ciphertext_modulus=ciphertext_modulus,
+        plaintext_modulus=127,
+        noise_modulus=3,
+        seed=0
+    )
+    lhs, rhs = [1, 2, 3, 4], [5, 6, 7, 126]
+    expected = [(x + y) % 127 for x, y in zip(lhs, rhs)]
+
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    encoder = PolynomialEncoder(dist)
+    encryptor = Encryptor(dist, encoder)
+    eval = Evaluator(dist)
+    cipher = encryptor.encrypt(pk, lhs)
+    assert encryptor.decrypt(sk, eval.add_plain(cipher, rhs)) == expected
+    plaintext = Plaintext.encode(rhs, encoder)
+    assert encryptor.decrypt(sk, eval.add_plain(cipher, plaintext)) == \
+        expected
+
+
+@pytest.mark.parametrize("ciphertext_modulus", [
+    12289,
+    2 ** 61 - 1,
+    2 ** 127 - 1,
+    RnsBasis([1073741441, 1073740609]),
+])
+@pytest.mark.parametrize("workers", [None, 3])
+def test_sum(ciphertext_modulus, workers):
+    params = EncryptionParameters(
+        dimension=4,
+        ciphertext_modulus=ciphertext_modulus,
+        plaintext_modulus=127,
+        noise_modulus=3,
+        seed=0
+    )
+    messages = [[i, 2 * i, 1, 0] for i in range(10)]
+    weights = [i % 3 - 1 for i in range(10)]
+
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    ciphers = encryptor.encrypt_many(pk, messages)
+    eval = Evaluator(dist)
+    total = eval.sum(ciphers, workers=workers)
+    assert encryptor.decrypt(sk, total) == [
+        sum(column) % 127 for column in zip(*messages)]
+    weighted = eval.sum(ciphers, weights, workers=workers)
+    assert encryptor.decrypt(sk, weighted) == [
+        sum(w * x for w, x in zip(weights, column)) % 127
+        for column in zip(*messages)]
+    assert encryptor.decrypt(sk, eval.sum([])) == [0, 0, 0, 0]
+
+
+def test_sum_does_not_overflow_int64():
+    params = EncryptionParameters(
+        dimension=4,
+        ciphertext_modulus=2 ** 62 - 57,
+        plaintext_modulus=127,
+        noise_modulus=3,
+        seed=0
+    )
+    messages = [[1, 2, 3, 4]] * 5
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    ciphers = encryptor.encrypt_many(pk, messages)
+    total = Evaluator(dist).sum(ciphers, weights=[3, -3, 3, -3, 3])
+    assert encryptor.decrypt(sk, total) == [3, 6, 9, 12]
+
+
+def test_sum_rejects_mismatched_weights():
+    params = EncryptionParameters(
+        dimension=4, ciphertext_modulus=12289, plaintext_modulus=127,
+        noise_modulus=3)
+    with pytest.raises(ValueError):
+        Evaluator(GlweDistribution(params)).sum([], weights=[1])
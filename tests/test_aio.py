@@ -0,0 +1,175 @@
+from venum.aio import AsyncEncryptor, AsyncEvaluator, MicroBatcher
+from venum.glwe import EncryptionParameters, GlweDistribution
+from venum.encryption import Encryptor
+from venum.evaluation import Evaluator
+from venum.key import RelinKey, gen_key_pair
+from venum.plaintext_encoding import PolynomialEncoder
+from venum.rns import RnsBasis
+
+import asyncio
+import pytest
+
+
+@pytest.fixture(scope="module")
+def setup():
+    params = EncryptionParameters(
+        dimension=8,
+        ciphertext_modulus=RnsBasis([1073741441, 1073740609, 1073739937]),
+        plaintext_modulus=12289,
+        noise_modulus=3,
+        seed=0
+    )
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    evaluator = Evaluator(dist, RelinKey.from_secret_key(sk, 2 ** 16))
+    return dist, sk, pk, encryptor, evaluator
+
+
+@pytest.mark.parametrize("count, max_batch_size, expected_batches", [
+    (10, 4, [4, 4, 2]),
+    (10, 100, [10]),
+    (1, 100, [1]),
+])
+def test_micro_batching(count, max_batch_size, expected_batches):
+    batches = []
+
+    def handler(items):
+        batches.append(len(items))
+        return [2 * item for item in items]
+
+    async def run():
+        batcher = MicroBatcher(handler, max_batch_size, max_latency=0.01)
+        return await asyncio.gather(*(batcher.submit(i)
+                                      for i in range(count)))
+
+    assert asyncio.run(run()) == [2 * i for i in range(count)]
+    assert batches == expected_batches
+
+
+def test_micro_batching_latency_budget():
+    batches = []
+
+    def handler(items):
+        batches.append(items)
+        return items
+
+    async def run():
+        batcher = MicroBatcher(handler, max_latency=0.001)
+        first = await batcher.submit(1)
+        second = await asyncio.gather(batcher.submit(2), batcher.submit(3))
+        return first, second
+
+    assert asyncio.run(run()) == (1, [2, 3])
+    assert batches == [[1], [2, 3]]
+
+
+def test_micro_batching_propagates_errors():
+    def handler(items):
+        raise ArithmeticError("boom")
+
+    async def run():
+        batcher = MicroBatcher(handler)
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ArithmeticError) for r in results)
+    with pytest.raises(ValueError):
+        MicroBatcher(handler, max_batch_size=0)
+
+
+def test_micro_batching_isolates_errors():
+    batches = []
+
+    def handler(items):
+        batches.append(items)
+        if 2 in items:
+            raise ArithmeticError("boom")
+        return items
+
+    async def run():
+        batcher = MicroBatcher(handler)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(4)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert results[:2] + results[3:] == [0, 1, 3]
+    assert isinstance(results[2], ArithmeticError)
+    assert batches[0] == [0, 1, 2, 3]
+    assert sorted(batches[1:]) == [[0], [1], [2], [3]]
+
+
+def test_micro_batching_missing_results():
+    async def run():
+        batcher = MicroBatcher(lambda items: items[:1])
+        return await asyncio.wait_for(
+            asyncio.gather(batcher.submit(1), batcher.submit(2),
+                           return_exceptions=True), timeout=5)
+
+    first, second = asyncio.run(run())
+    assert first == 1
+    assert isinstance(second, ValueError)
+
+
+def test_async_encryptor(setup):
+    dist, sk, pk, encryptor, evaluator = setup
+    messages = [[i, i + 1, 2 * i] for i in range(12)]
+
+    async def run():
+        front = AsyncEncryptor(encryptor, pk, sk, max_batch_size=5)
+        ciphers = await asyncio.gather(*(front.encrypt(m) for m in messages))
+        decrypted = await asyncio.gather(*(front.decrypt(c)
+                                           for c in ciphers))
+        many = await front.encrypt_many(messages[:2])
+        return ciphers, decrypted, many
+
+    ciphers, decrypted, many = asyncio.run(run())
+    assert [d[:3] for d in decrypted] == messages
+    assert encryptor.decrypt_many(sk, many)[:, :3].tolist() == messages[:2]
+    masks = {c.glwe_sample.mask.coeffs.tobytes() for c in ciphers + many}
+    assert len(masks) == len(messages) + 2
+
+    async def decrypt_without_key():
+        await AsyncEncryptor(encryptor, pk).decrypt(ciphers[0])
+
+    with pytest.raises(ValueError):
+        asyncio.run(decrypt_without_key())
+
+
+def test_async_evaluator(setup):
+    dist, sk, pk, encryptor, evaluator = setup
+    lhs = encryptor.encrypt_many(pk, [[i, 1] for i in range(6)])
+    rhs = encryptor.encrypt_many(pk, [[2, i] for i in range(6)])
+
+    async def run():
+        front = AsyncEvaluator(evaluator, max_batch_size=4)
+        sums = asyncio.gather(*(front.add(a, b) for a, b in zip(lhs, rhs)))
+        diffs = asyncio.gather(*(front.sub(a, b) for a, b in zip(lhs, rhs)))
+        products = asyncio.gather(*(front.mul(a, b)
+                                    for a, b in zip(lhs, rhs)))
+        total = front.sum(lhs, range(6))
+        return await asyncio.gather(sums, diffs, products, total)
+
+    sums, diffs, products, total = asyncio.run(run())
+    decrypt = encryptor.decrypt_many
+    assert decrypt(sk, sums)[:, :2].tolist() == [
+        [i + 2, i + 1] for i in range(6)]
+    assert decrypt(sk, diffs)[:, :2].tolist() == [
+        [(i - 2) % 12289, (1 - i) % 12289] for i in range(6)]
+    assert decrypt(sk, products)[:, :3].tolist() == [
+        [2 * i, i * i + 2, i] for i in range(6)]
+    assert encryptor.decrypt(sk, total)[:2] == [55, 15]
+
+
+def test_evaluator_add_many(setup):
+    dist, sk, pk, encryptor, evaluator = setup
+    lhs = encryptor.encrypt_many(pk, [[1, 2], [3, 4]])
+    rhs = encryptor.encrypt_many(pk, [[5, 6], [7, 8]])
+    assert [encryptor.decrypt(sk, c)[:2]
+            for c in evaluator.add_many(lhs, rhs)] == [[6, 8], [10, 12]]
+    assert [encryptor.decrypt(sk, c)[:2]
+            for c in evaluator.sub_many(lhs, rhs)] == [[12285, 12285]] * 2
+    assert evaluator.add_many([], []) == []
+    with pytest.raises(ValueError):
+        evaluator.sub_many(lhs, rhs[:1])
@@ -0,0 +1,70 @@
+from benchmarks import suite
+from benchmarks.suite import (
+    Result, benchmark_names, benchmarks, compare, from_json, make_params,
+    measure, run, summarize, to_json)
+
+import pytest
+
+import json
+
+
+def make_result(name, p50):
+    return Result(name, 'n=8,q62', 5, 1, {'p50': p50}, 1e3 / p50, 0)
+
+
+def test_summarize():
+    result = summarize('add', 'n=8,q62', [0.001, 0.002, 0.003], 2, 10)
+    assert result.latency_ms['p50'] == pytest.approx(2.0)
+    assert result.latency_ms['min'] == pytest.approx(1.0)
+    assert result.latency_ms['max'] == pytest.approx(3.0)
+    assert result.throughput == pytest.approx(1000.0)
+
+
+def test_measure_respects_call_limits():
+    calls = []
+    durations = measure(lambda: calls.append(None), 0, 3, 10)
+    assert len(durations) == 3
+    assert len(calls) == 4
+    assert len(measure(lambda: None, 1e9, 1, 7)) == 7
+
+
+def test_compare_flags_regressions_only():
+    baseline = [make_result('add', 1.0), make_result('mul', 1.0),
+                make_result('sub', 1.0)]
+    results = [make_result('add', 1.05), make_result('mul', 1.5),
+               make_result('encrypt', 9.0)]
+    regressions = compare(results, baseline, tolerance=0.1)
+    assert [(r.name, ratio) for r, _, ratio in regressions] == [
+        ('mul', 1.5)]
+
+
+def test_run_and_round_trip():
+    results = run([(16, 'rns2x30')], pattern='^(add|rns_to_int)/',
+                  min_time=0, min_calls=2)
+    assert [result.name for result in results] == ['add', 'rns_to_int']
+    data = json.loads(json.dumps(to_json(results, 'test')))
+    assert from_json(data) == results
+    assert not compare(results, from_json(data), tolerance=0)
+
+
+def test_skips_unselected_grid_points(monkeypatch):
+    def gen_key_pair(dist):
+        raise AssertionError("keys of an unselected grid point")
+
+    monkeypatch.setattr(suite, 'gen_key_pair', gen_key_pair)
+    assert run([(16, 'q62'), (16, 'rns2x30')], pattern='^rns_to_int/.*q',
+               min_time=0, min_calls=2) == []
+    with pytest.raises(AssertionError):
+        run([(16, 'q62')], pattern='^add/', min_time=0, min_calls=2)
+
+
+@pytest.mark.parametrize('modulus', ['q62', 'rns2x30'])
+def test_benchmark_names(modulus):
+    params = make_params(16, modulus)
+    assert [name for name, _, _ in benchmarks(params)] == \
+        list(benchmark_names(params))
+
+
+def test_unknown_modulus():
+    with pytest.raises(ValueError):
+        make_params(16, 'p62')
@@ -0,0 +1,52 @@
+from venum.crt import CrtEncoder
+from venum.ring import PolyRing
+from venum.rns import Rns, RnsBasis
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def encoder():
+    return CrtEncoder(RnsBasis([127, 3]), PolyRing(4, 127))
+
+
+@pytest.mark.parametrize("basis", [[127, 3], [12289, 3], [2 ** 61 - 1, 5]])
+def test_encode_coeffs_matches_rns(basis):
+    encoder = CrtEncoder(RnsBasis(basis), PolyRing(4, basis[0]))
+    message = np.array([0, 1, basis[0] - 1, 17], dtype=object)
+    noise = np.array([2, 0, 1, basis[1] - 1], dtype=object)
+    encoded = encoder.encode_coeffs(message, noise)
+    expected = [Rns(encoder.basis, [m, e]).to_int()
+                for m, e in zip(message, noise)]
+    assert [int(c) for c in encoded] == expected
+
+
+@pytest.mark.parametrize("basis, dtype", [
+    ([12289, 3], np.int64), ([2 ** 61 - 1, 5], object)])
+def test_encode_coeffs_stays_in_int64(basis, dtype):
+    encoder = CrtEncoder(RnsBasis(basis), PolyRing(4, basis[0]))
+    message = np.array([0, 1, basis[0] - 1, 17])
+    noise = np.array([2, 0, 1, basis[1] - 1])
+    assert encoder.encode_coeffs(message, noise).dtype == dtype
+
+
+def test_decode_coeffs(encoder):
+    values = np.array([0, 5, 200, 380])
+    residues = encoder.decode_coeffs(values)
+    assert residues.tolist() == [[v % 127 for v in values],
+                                 [v % 3 for v in values]]
+
+
+def test_decode_matches_rns(encoder):
+    poly = PolyRing(4, 383).from_coeffs([0, 5, 200, 380])
+    decoded = encoder.decode(poly)
+    assert [rns.residues for rns in decoded] == [
+        [0, 0], [5, 2], [200 % 127, 200 % 3], [380 % 127, 380 % 3]]
+
+
+def test_decode_message_lifts_negative_values(encoder):
+    q = 1400472361734830353
+    values = np.array([5, q - 5, 0, q - 127 * 3 * 7 - 1], dtype=object)
+    assert encoder.decode_message(values, q).tolist() == [
+        5, -5 % 127, 0, -1 % 127]
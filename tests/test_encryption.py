@@ -1,8 +1,11 @@
-from venum.glwe import EncryptionParameters, GlweDistribution
-from venum.encryption import Encryptor
+from venum.glwe import (EncryptionParameters, GlweDistribution, GlweSample,
+                        SeededGlweSample)
+from venum.encryption import Cipher, Decryptor, Encryptor
 from venum.plaintext_encoding import PolynomialEncoder
 from venum.key import gen_key_pair
+from venum.rns import RnsBasis
 
+import numpy as np
 import pytest
 
 
@@ -12,7 +15,7 @@ import pytest
         {
             "params": EncryptionParameters(
                 dimension=4,
-                ciphertext_modulus=383,
+                ciphertext_modulus=65539,
                 plaintext_modulus=127,
                 noise_modulus=3,
                 seed=0
@@ -32,7 +35,7 @@ import pytest
         {
             "params": EncryptionParameters(
                 dimension=4,
-                ciphertext_modulus=383,
+                ciphertext_modulus=65539,
                 plaintext_modulus=127,
                 noise_modulus=3,
             ),
@@ -47,6 +50,16 @@ import pytest
             ),
             "message": [1, 2, 3, 4]
         },
+        {
+            "params": EncryptionParameters(
+                dimension=4,
+                ciphertext_modulus=RnsBasis([383, 12289]),
+                plaintext_modulus=127,
+                noise_modulus=3,
+                seed=0
+            ),
+            "message": [1, 2, 3, 4]
+        },
     ])
 def test_encrypt_decrypt(input):
     params, message = input["params"], input["message"]
@@ -56,3 +69,162 @@ def test_encrypt_decrypt(input):
     cipher = encryptor.encrypt(pk, message)
     decrypted = encryptor.decrypt(sk, cipher)
     assert decrypted == message
+
+
+@pytest.mark.parametrize("ciphertext_modulus", [
+    12289,
+    1400472361734830353,
+    RnsBasis([383, 12289]),
+])
+def test_encrypt_symmetric(ciphertext_modulus):
+    params = EncryptionParameters(
+        dimension=4,
+        ciphertext_modulus=ciphertext_modulus,
+        plaintext_modulus=127,
+        noise_modulus=3,
+        seed=0
+    )
+    message = [1, 2, 3, 126]
+    dist = GlweDistribution(params)
+    sk, _ = gen_key_pair(dist)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    cipher = encryptor.encrypt_symmetric(sk, message)
+    restored = Cipher(SeededGlweSample(cipher.glwe_sample.seed,
+                                       cipher.glwe_sample.body))
+    assert encryptor.decrypt(sk, restored) == message
+
+
+@pytest.mark.parametrize("ciphertext_modulus", [
+    65539,
+    12289,
+    2 ** 127 - 1,
+    RnsBasis([383, 12289]),
+])
+def test_encrypt_many(ciphertext_modulus):
+    params = EncryptionParameters(
+        dimension=4,
+        ciphertext_modulus=ciphertext_modulus,
+        plaintext_modulus=127,
+        noise_modulus=3,
+        seed=0
+    )
+    messages = [[1, 2, 3, 4], [5, 6, 7, 8], [126, 0, 0, 1]]
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    ciphers = encryptor.encrypt_many(pk, messages)
+    assert [encryptor.decrypt(sk, c) for c in ciphers] == messages
+    assert encryptor.encrypt_many(pk, []) == []
+
+
+def test_public_key_precomputation_is_cached():
+    params = EncryptionParameters(
+        dimension=8,
+        ciphertext_modulus=12289,
+        plaintext_modulus=127,
+        noise_modulus=3,
+        seed=0
+    )
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    precomputed = pk.precomputed()
+    encryptor.encrypt(pk, [1, 2, 3])
+    assert pk.precomputed() is precomputed
+
+    _, other = gen_key_pair(dist)
+    pk.glwe_sample = GlweSample(mask=other.glwe_sample.mask,
+                                body=other.glwe_sample.body)
+    assert pk.precomputed() is not precomputed
+    assert encryptor.decrypt(sk, encryptor.encrypt(pk, [1, 2, 3])) != \
+        [1, 2, 3] + [0] * 5
+
+
+@pytest.mark.parametrize("ciphertext_modulus", [
+    12289,
+    1400472361734830353,
+    2 ** 127 - 1,
+    RnsBasis([1073741441, 1073740609, 1073739937]),
+])
+def test_decrypt_many(ciphertext_modulus):
+    params = EncryptionParameters(
+        dimension=8,
+        ciphertext_modulus=ciphertext_modulus,
+        plaintext_modulus=127,
+        noise_modulus=3,
+        seed=0
+    )
+    messages = np.arange(40).reshape(5, 8) * 3 % 127
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    ciphers = encryptor.encrypt_many(pk, messages.tolist())
+    decrypted = Decryptor(sk, PolynomialEncoder(dist)).decrypt_many(ciphers)
+    assert decrypted.shape == (5, 8)
+    assert np.array_equal(decrypted, messages)
+    assert np.array_equal(encryptor.decrypt_many(sk, ciphers), messages)
+    assert encryptor.decrypt_many(sk, []).shape == (0, 8)
+
+
+@pytest.mark.parametrize("noise_distribution",
+                         ['gaussian', 'binomial', 'uniform'])
+@pytest.mark.parametrize("ciphertext_modulus", [
+    2 ** 61 - 1,
+    RnsBasis([1073741441, 1073740609]),
+])
+def test_decryption_carries_noise(ciphertext_modulus, noise_distribution):
+    params = EncryptionParameters(
+        dimension=64,
+        ciphertext_modulus=ciphertext_modulus,
+        plaintext_modulus=12289,
+        noise_modulus=7,
+        seed=0,
+        noise_distribution=noise_distribution
+    )
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    assert set(sk.secret_poly.lift() % params.ciphertext_modulus) <= {
+        0, 1, params.ciphertext_modulus - 1}
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    message = [(7 * i) % 12289 for i in range(64)]
+    for cipher in (encryptor.encrypt(pk, message),
+                   encryptor.encrypt_symmetric(sk, message)):
+        sample = cipher.glwe_sample
+        phase = (sample.body + sample.mask * sk.secret_poly).tolist()
+        q = params.ciphertext_modulus
+        phase = [c - q if c > q // 2 else c for c in phase]
+        noise = [c - m for c, m in zip(phase, message)]
+        assert any(noise)
+        assert all(e % 12289 == 0 for e in noise)
+        assert encryptor.decrypt(sk, cipher) == message
+
+
+def test_encryption_paths_share_crt_message(monkeypatch):
+    # Without noise, the phase of every encryption is exactly the CRT
+    # encoding of the message, as added to the body.
+    params = EncryptionParameters(
+        dimension=16,
+        ciphertext_modulus=2 ** 61 - 1,
+        plaintext_modulus=12289,
+        noise_modulus=7,
+        seed=0
+    )
+    dist = GlweDistribution(params)
+    n = params.dimension
+    monkeypatch.setattr(
+        dist, 'sample_noise_array',
+        lambda batch=None: np.zeros((n,) if batch is None else (batch, n),
+                                    dtype=np.int64))
+    sk, pk = gen_key_pair(dist)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    message = [5 * i + 1 for i in range(n)]
+    expected = dist.encode_crt_message(dist.plaintext_ring.from_coeffs(
+        message))
+    assert all(c % 7 == 0 for c in expected.tolist())
+    assert [c % 12289 for c in expected.tolist()] == message
+    ciphers = encryptor.encrypt_many(pk, [message, message]) + [
+        encryptor.encrypt_symmetric(sk, message)]
+    for cipher in ciphers:
+        sample = cipher.glwe_sample
+        assert sample.body + sample.mask * sk.secret_poly == expected
+        assert encryptor.decrypt(sk, cipher) == message
@@ -0,0 +1,104 @@
+from venum.glwe import EncryptionParameters, GlweDistribution
+from venum.encryption import Encryptor, Rank2Cipher
+from venum.evaluation import Evaluator
+from venum.expression import ExpressionGraph
+from venum.plaintext_encoding import Plaintext, PolynomialEncoder
+from venum.key import RelinKey, gen_key_pair
+from venum.rns import RnsBasis
+
+import pytest
+
+
+@pytest.fixture(params=[
+    1400472361734830353,
+    RnsBasis([1073741441, 1073740609, 1073739937]),
+])
+def setup(request):
+    params = EncryptionParameters(
+        dimension=4,
+        ciphertext_modulus=request.param,
+        plaintext_modulus=12289,
+        noise_modulus=3,
+        seed=0
+    )
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    evaluator = Evaluator(dist, RelinKey.from_secret_key(sk, base=2 ** 16))
+    return dist, sk, pk, encryptor, evaluator
+
+
+def plain_value(dist, message):
+    return dist.plaintext_ring.from_coeffs(message)
+
+
+def test_common_subexpressions_are_shared(setup):
+    dist, sk, pk, encryptor, evaluator = setup
+    graph = ExpressionGraph(evaluator)
+    a, b = (graph.input(c) for c in encryptor.encrypt_many(pk, [[1], [2]]))
+    assert a + b is b + a
+    assert a * b is b * a
+    assert a - b is not b - a
+    assert graph.input(a.operand) is a
+
+
+def test_fused_linear_combination(setup):
+    dist, sk, pk, encryptor, evaluator = setup
+    messages = [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12]]
+    graph = ExpressionGraph(evaluator)
+    a, b, c = (graph.input(x) for x in encryptor.encrypt_many(pk, messages))
+    offset = Plaintext.encode([100, 0, 0, 1], PolynomialEncoder(dist))
+    expr = 3 * (a + b) - (b - c) * 2 + offset - a
+    expected = [(2 * x + y + 2 * z + o) % 12289 for x, y, z, o in
+                zip(*messages, [100, 0, 0, 1])]
+    assert encryptor.decrypt(sk, graph.evaluate(expr)) == expected
+    assert encryptor.decrypt(sk, graph.evaluate(
+        sum(graph.input(x) for x in encryptor.encrypt_many(
+            pk, [[1, 1]] * 1500)))) == [1500, 1500, 0, 0]
+
+
+def test_sum_of_products_relinearizes_once(setup, monkeypatch):
+    dist, sk, pk, encryptor, evaluator = setup
+    calls = []
+    relinearize = Rank2Cipher.relinearize
+
+    def counting_relinearize(self, relin_key):
+        calls.append(self)
+        return relinearize(self, relin_key)
+
+    monkeypatch.setattr(Rank2Cipher, 'relinearize', counting_relinearize)
+    messages = [[1, 2, 0, 0], [3, 0, 1, 0], [0, 5, 0, 1], [7, 1, 1, 1]]
+    graph = ExpressionGraph(evaluator)
+    a, b, c, d = (graph.input(x)
+                  for x in encryptor.encrypt_many(pk, messages))
+    expr = a * b + c * d - 2 * (b * a) + a
+    a_, b_, c_, d_ = (plain_value(dist, m) for m in messages)
+    expected = c_ * d_ - a_ * b_ + a_
+    assert encryptor.decrypt(sk, graph.evaluate(expr)) == expected.tolist()
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("workers", [None, 3])
+def test_nested_products(setup, workers):
+    dist, sk, pk, encryptor, evaluator = setup
+    messages = [[1, 2, 0, 0], [3, 0, 1, 0], [0, 5, 0, 1]]
+    graph = ExpressionGraph(evaluator)
+    a, b, c = (graph.input(x) for x in encryptor.encrypt_many(pk, messages))
+    weights = Plaintext.encode([0, 1], PolynomialEncoder(dist))
+    outputs = [(a + b) * c, (a + b) * (b + c) * weights, a - a]
+    a_, b_, c_ = (plain_value(dist, m) for m in messages)
+    expected = [(a_ + b_) * c_,
+                (a_ + b_) * (b_ + c_) * plain_value(dist, [0, 1]),
+                a_ - a_]
+    results = graph.evaluate(outputs, workers=workers)
+    assert [encryptor.decrypt(sk, r) for r in results] == [
+        e.tolist() for e in expected]
+
+
+def test_requires_relin_key_for_products(setup):
+    dist, sk, pk, encryptor, _ = setup
+    graph = ExpressionGraph(Evaluator(dist))
+    a, b = (graph.input(c) for c in encryptor.encrypt_many(pk, [[1], [2]]))
+    assert encryptor.decrypt(sk, graph.evaluate(a + b))[0] == 3
+    with pytest.raises(ValueError):
+        graph.evaluate(a * b)
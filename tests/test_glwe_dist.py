@@ -1,8 +1,10 @@
-from venum.glwe import EncryptionParameters, GlweDistribution, GlweSample
+from venum.glwe import (EncryptionParameters, GlweDistribution, GlweSample,
+                        SeededGlweSample, expand_mask)
+from venum.ring import PolyRing
 
 import pytest
-from sympy import Poly
-from sympy.abc import x
+
+from concurrent.futures import ThreadPoolExecutor
 
 
 @pytest.fixture
@@ -20,37 +22,35 @@ def test_poly_coeffs_within_bounds(params):
     dist = GlweDistribution(params)
     poly = dist.sample_polynomial()
     assert all(-params.ciphertext_modulus <= x <=
-               params.ciphertext_modulus for x in poly.all_coeffs())
+               params.ciphertext_modulus for x in poly.tolist())
 
 
 def test_poly_dimension_within_bounds(params):
     dist = GlweDistribution(params)
     poly = dist.sample_polynomial()
-    assert poly.degree() == params.dimension - 1
+    assert len(poly.coeffs) == params.dimension
 
 
 @pytest.fixture
 def zero_sample_polys():
     return {
-        "mask": Poly(x**3 + 1, x),
-        "secret": Poly(x**2 + 1, x),
-        "crt_noise": Poly(x + 1, x),
-        "expected_body": Poly(x**3 + x**2 + 2),
+        "mask": [1, 0, 0, 1],
+        "secret": [1, 0, 1],
+        "crt_noise": [1, 1],
+        "expected_body": [2, 0, 1, 1],
     }
 
 
 def test_zero_sample(params, zero_sample_polys):
     dist = GlweDistribution(params)
 
-    mask = zero_sample_polys["mask"].set_domain(dist.cipher_ring)
-    secret = zero_sample_polys["secret"].set_domain(dist.cipher_ring)
-    crt_noise = zero_sample_polys["crt_noise"].set_domain(dist.cipher_ring)
-    expected_body = zero_sample_polys["expected_body"].set_domain(
-        dist.cipher_ring)
+    mask = dist.cipher_ring.from_coeffs(zero_sample_polys["mask"])
+    secret = dist.cipher_ring.from_coeffs(zero_sample_polys["secret"])
+    crt_noise = dist.cipher_ring.from_coeffs(zero_sample_polys["crt_noise"])
+    expected_body = dist.cipher_ring.from_coeffs(
+        zero_sample_polys["expected_body"])
 
-    sample = GlweSample._compute_zero_sample(
-        mask, secret, crt_noise, dist.poly_modulus
-    )
+    sample = GlweSample._compute_zero_sample(mask, secret, crt_noise)
     assert sample.mask == -mask
     assert sample.body == expected_body
 
@@ -58,16 +58,16 @@ def test_zero_sample(params, zero_sample_polys):
 @pytest.fixture
 def sample_polys():
     """Fixture to provide test polynomials."""
-    poly_modulus = Poly(x**3 + 1, x)  # Example modulus polynomial
-    mask = Poly(x + 1, x)
-    noise = Poly(2*x + 3, x)
-    body = Poly(x**2 + 2, x)
-    mask_noise = Poly(3*x + 2, x)
-    body_noise = Poly(x + 4, x)
-    message = Poly(2*x**2 + x + 1, x)
-    u = Poly(x + 1, x)
+    ring = PolyRing(dimension=3, modulus=383)  # Example ring
+    mask = ring.from_coeffs([1, 1])
+    noise = ring.from_coeffs([3, 2])
+    body = ring.from_coeffs([2, 0, 1])
+    mask_noise = ring.from_coeffs([2, 3])
+    body_noise = ring.from_coeffs([4, 1])
+    message = ring.from_coeffs([1, 1, 2])
+    u = ring.from_coeffs([1, 1])
     return {
-        "poly_modulus": poly_modulus,
+        "ring": ring,
         "mask": mask,
         "noise": noise,
         "body": body,
@@ -82,12 +82,10 @@ def test_compute_mask(sample_polys):
     mask = sample_polys["mask"]
     noise = sample_polys["noise"]
     u = sample_polys["u"]
-    poly_modulus = sample_polys["poly_modulus"]
+    ring = sample_polys["ring"]
 
-    result = GlweSample._compute_mask(
-        mask, noise,
-        u, poly_modulus)
-    expected = (mask * u + noise) % poly_modulus
+    result = GlweSample._compute_mask(mask, noise, u)
+    expected = ring.from_coeffs([4, 4, 1])
     assert result == expected
 
 
@@ -96,12 +94,10 @@ def test_compute_body(sample_polys):
     noise = sample_polys["body_noise"]
     message = sample_polys["message"]
     u = sample_polys["u"]
-    poly_modulus = sample_polys["poly_modulus"]
+    ring = sample_polys["ring"]
 
-    result = GlweSample._compute_body(
-        body, noise,
-        message, u, poly_modulus)
-    expected = (body * u + message + noise) % poly_modulus
+    result = GlweSample._compute_body(body, noise, message, u)
+    expected = ring.from_coeffs([6, 4, 3])
     assert result == expected
 
 
@@ -112,13 +108,58 @@ def test_compute_sample(sample_polys):
     body_noise = sample_polys["body_noise"]
     message = sample_polys["message"]
     u = sample_polys["u"]
-    poly_modulus = sample_polys["poly_modulus"]
+    ring = sample_polys["ring"]
 
     sample = GlweSample.compute_sample(
         mask, mask_noise, body, body_noise,
-        message, u, poly_modulus
+        message, u
     )
-    expected_mask = (mask * u + mask_noise) % poly_modulus
-    expected_body = (body * u + message + body_noise) % poly_modulus
+    expected_mask = ring.from_coeffs([3, 5, 1])
+    expected_body = ring.from_coeffs([6, 4, 3])
     assert sample.mask == expected_mask
     assert sample.body == expected_body
+
+
+def test_seeded_distributions_are_independent(params):
+    first = GlweDistribution(params)
+    expected = [first.sample_polynomial() for _ in range(3)]
+
+    lhs, rhs = GlweDistribution(params), GlweDistribution(params)
+    interleaved = []
+    for _ in range(3):
+        interleaved.append(lhs.sample_polynomial())
+        rhs.sample_polynomial()
+    assert interleaved == expected
+
+
+def test_spawn_is_deterministic_across_workers(params):
+    def draw(dist):
+        return dist.sample_uniform_array(batch=4).tolist()
+
+    sequential = [draw(child) for child in GlweDistribution(params).spawn(8)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        parallel = list(pool.map(draw, GlweDistribution(params).spawn(8)))
+    assert parallel == sequential
+    assert len({str(batch) for batch in sequential}) == 8
+
+
+def test_spawned_children_share_rings(params):
+    dist = GlweDistribution(params)
+    child, = dist.spawn(1)
+    assert child.cipher_ring is dist.cipher_ring
+    assert child.rng is not dist.rng
+
+
+def test_seeded_zero_sample(params):
+    dist = GlweDistribution(params)
+    secret = dist.sample_polynomial()
+    sample = dist.sample_zero_secret(secret)
+    assert isinstance(sample, SeededGlweSample)
+    assert sample.mask == expand_mask(sample.seed, dist.cipher_ring)
+
+    restored = SeededGlweSample(seed=sample.seed, body=sample.body)
+    assert restored.mask == sample.mask
+    noise = restored.body + restored.mask * secret
+    decoded = dist.crt_encoder.decode_message(
+        noise.lift(), params.ciphertext_modulus)
+    assert decoded.tolist() == [0] * params.dimension
@@ -0,0 +1,123 @@
+from venum.glwe import EncryptionParameters, GlweDistribution
+from venum.encryption import Encryptor
+from venum.evaluation import Evaluator
+from venum.plaintext_encoding import PolynomialEncoder
+from venum.key import RelinKey, gen_key_pair
+from venum.keystore import KeyStore
+from venum.rns import RnsBasis
+
+import pytest
+
+
+@pytest.fixture(params=[
+    1400472361734830353,
+    RnsBasis([1073741441, 1073740609, 1073739937]),
+])
+def params(request):
+    return EncryptionParameters(
+        dimension=8,
+        ciphertext_modulus=request.param,
+        plaintext_modulus=12289,
+        noise_modulus=3,
+        seed=0
+    )
+
+
+def test_keys_roundtrip(tmp_path, params):
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    relin_key = RelinKey.from_secret_key(sk)
+    KeyStore.save(tmp_path, params, pk, relin_key)
+
+    store = KeyStore(tmp_path)
+    assert store.dist.params == params
+    assert store.public_key.glwe_sample.mask == pk.glwe_sample.mask
+    assert store.public_key.glwe_sample.body == pk.glwe_sample.body
+    assert store.relin_key.base == relin_key.base
+    assert store.relin_key.digit_count() == relin_key.digit_count()
+    assert not isinstance(store.relin_key.aux_keys, list)
+    for stored, aux_key in zip(store.relin_key.aux_keys,
+                               relin_key.aux_keys):
+        assert stored.mask == aux_key.mask
+        assert stored.body == aux_key.body
+
+
+def test_relinearize_with_mapped_key(tmp_path, params):
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    store = KeyStore.save(tmp_path, params, pk,
+                          RelinKey.from_secret_key(sk, base=2 ** 8))
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    lhs, rhs = [1, 2, 3, 4], [5, 0, 0, 1]
+    expected = (dist.plaintext_ring.from_coeffs(lhs) *
+                dist.plaintext_ring.from_coeffs(rhs)).tolist()
+
+    rank2 = Evaluator(dist).mul_no_relin(
+        encryptor.encrypt(store.public_key, lhs),
+        encryptor.encrypt(store.public_key, rhs))
+    cipher = rank2.relinearize(store.relin_key)
+    assert encryptor.decrypt(sk, cipher) == expected
+
+
+def test_rejects_other_parameters(tmp_path, params):
+    dist = GlweDistribution(params)
+    _, pk = gen_key_pair(dist)
+    KeyStore.save(tmp_path, params, pk)
+    other = GlweDistribution(EncryptionParameters(
+        dimension=4,
+        ciphertext_modulus=12289,
+        plaintext_modulus=127,
+        noise_modulus=3,
+    ))
+    with pytest.raises(ValueError):
+        KeyStore(tmp_path, other)
+    with pytest.raises(FileNotFoundError):
+        KeyStore(tmp_path).relin_key
+
+
+def test_maps_precomputed_relin_key(tmp_path, params):
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    relin_key = RelinKey.from_secret_key(sk, base=2 ** 8)
+    KeyStore.save(tmp_path, params, pk, relin_key)
+
+    prepared = KeyStore(tmp_path).relin_key.precomputed()
+    expected = relin_key.precomputed()
+    if isinstance(expected, list):
+        assert len(prepared) == len(expected)
+    else:
+        prepared, expected = [prepared], [expected]
+    for stored, array in zip(prepared, expected):
+        assert not stored.flags.writeable
+        assert (stored == array).all()
+
+
+def test_relinearize_without_precomputed_key(tmp_path, monkeypatch):
+    # Kronecker substitution prepares big integers, which are not stored:
+    # relinearization reads the mapped key one digit at a time instead.
+    params = EncryptionParameters(
+        dimension=8,
+        ciphertext_modulus=2 ** 127 - 1,
+        plaintext_modulus=12289,
+        noise_modulus=3,
+        seed=0
+    )
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    store = KeyStore.save(tmp_path, params, pk,
+                          RelinKey.from_secret_key(sk, base=2 ** 16))
+    assert not (tmp_path / KeyStore.PREPARED_RELIN_KEY_FILE).exists()
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    lhs, rhs = [1, 2, 3, 4], [5, 0, 0, 1]
+    expected = (dist.plaintext_ring.from_coeffs(lhs) *
+                dist.plaintext_ring.from_coeffs(rhs)).tolist()
+
+    def precomputed(self):
+        raise AssertionError("the key should not be copied")
+
+    monkeypatch.setattr(RelinKey, 'precomputed', precomputed)
+    rank2 = Evaluator(dist).mul_no_relin(
+        encryptor.encrypt(store.public_key, lhs),
+        encryptor.encrypt(store.public_key, rhs))
+    cipher = rank2.relinearize(store.relin_key)
+    assert encryptor.decrypt(sk, cipher) == expected
@@ -0,0 +1,54 @@
+from venum.kronecker import KroneckerMultiplier
+from venum.ring import PolyRing, negacyclic_schoolbook
+
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("dimension, modulus", [
+    (4, 383),
+    (4, 12289),
+    (3, 127),
+    (1, 383),
+    (1024, 383),
+    (512, 1400472361734830353 - 2),
+    (64, 2 ** 127 - 1),
+])
+def test_multiplication_matches_schoolbook(dimension, modulus):
+    rng = np.random.default_rng(dimension)
+    ring = PolyRing(dimension, modulus,
+                    KroneckerMultiplier(dimension, modulus))
+    lhs = ring.from_coeffs(
+        [int(c) ** 3 % modulus for c in rng.integers(0, 2 ** 62, dimension)])
+    rhs = ring.from_coeffs(
+        [int(c) ** 3 % modulus for c in rng.integers(0, 2 ** 62, dimension)])
+    expected = negacyclic_schoolbook(lhs.coeffs, rhs.coeffs, modulus)
+    assert (lhs * rhs).tolist() == expected.tolist()
+
+
+def test_extreme_coefficients():
+    dimension, modulus = 8, 383
+    multiplier = KroneckerMultiplier(dimension, modulus)
+    top = np.full(dimension, modulus - 1, dtype=np.int64)
+    expected = negacyclic_schoolbook(top, top, modulus)
+    assert multiplier.multiply(top, top).tolist() == expected.tolist()
+
+
+def test_selected_for_non_ntt_moduli():
+    assert isinstance(PolyRing(4, 383).multiplier, KroneckerMultiplier)
+
+
+def test_batch_multiplication_broadcasts():
+    dimension, modulus = 8, 2 ** 127 - 1
+    multiplier = KroneckerMultiplier(dimension, modulus)
+    rng = np.random.default_rng(0)
+    lhs = np.array([int(c) for c in rng.integers(0, 2 ** 62, (2, dimension))
+                    .ravel()], dtype=object).reshape(2, dimension)
+    rhs = np.array([int(c) for c in rng.integers(0, 2 ** 62, (3, 1, dimension))
+                    .ravel()], dtype=object).reshape(3, 1, dimension)
+    product = multiplier.multiply(lhs, rhs)
+    assert product.shape == (3, 2, dimension)
+    for i in range(3):
+        for j in range(2):
+            expected = negacyclic_schoolbook(lhs[j], rhs[i, 0], modulus)
+            assert product[i, j].tolist() == expected.tolist()
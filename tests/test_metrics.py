@@ -0,0 +1,149 @@
+from venum.glwe import EncryptionParameters, GlweDistribution
+from venum.encryption import Encryptor
+from venum.evaluation import Evaluator
+from venum.expression import ExpressionGraph
+from venum.key import RelinKey, gen_key_pair
+from venum.metrics import (
+    Metrics, OperationStats, active_metrics, format_prometheus, measure)
+from venum.plaintext_encoding import PolynomialEncoder
+from venum.rns import RnsBasis
+
+import pytest
+
+
+@pytest.fixture(params=[1400472361734830353,
+                        RnsBasis([1073479681, 1073184769])])
+def setup(request):
+    params = EncryptionParameters(
+        dimension=16,
+        ciphertext_modulus=request.param,
+        plaintext_modulus=12289,
+        noise_modulus=3,
+        seed=0
+    )
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    relin_key = RelinKey.from_secret_key(sk, 2 ** 16)
+    return dist, sk, pk, relin_key
+
+
+def test_disabled_by_default(setup):
+    dist, sk, pk, relin_key = setup
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    assert encryptor.metrics is None
+    assert active_metrics() is None
+    with measure('poly_mul') as timer:
+        timer.set_items(3)
+    cipher = encryptor.encrypt(pk, [1, 2, 3])
+    assert encryptor.decrypt(sk, cipher)[:3] == [1, 2, 3]
+
+
+def test_encryptor_counts_primitives(setup):
+    dist, sk, pk, relin_key = setup
+    metrics = Metrics()
+    encryptor = Encryptor(dist, PolynomialEncoder(dist), metrics)
+    ciphers = encryptor.encrypt_many(pk, [[1], [2], [3]])
+    encryptor.decrypt_many(sk, ciphers)
+    stats = metrics.snapshot()
+    assert stats['encrypt_many'].calls == 1
+    assert stats['decrypt_many'].calls == 1
+    assert 'encrypt' not in stats
+    # One product of each public key polynomial with each u, one product
+    # of the secret key with each mask.
+    assert stats['poly_mul'].calls == 2
+    assert stats['poly_mul'].items == 2 * 3 + 3
+    assert stats['sample_uniform'].items == 3
+    assert stats['sample_noise'].items == 6
+    assert stats['crt_encode'].calls == 2
+    assert stats['crt_decode'].items == 3 * 16
+    assert stats['reduce'].calls > 0
+    assert all(s.seconds >= s.max_seconds >= 0 for s in stats.values())
+
+
+def test_evaluator_counts_relinearization_digits(setup):
+    dist, sk, pk, relin_key = setup
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    lhs, rhs = encryptor.encrypt_many(pk, [[2], [3]])
+    metrics = Metrics()
+    evaluator = Evaluator(dist, relin_key, metrics=metrics)
+    evaluator.mul(lhs, rhs)
+    evaluator.add(lhs, rhs)
+    evaluator.sum([lhs, rhs, lhs], workers=2)
+    stats = metrics.snapshot()
+    assert stats['mul'] == OperationStats(
+        1, 1, stats['mul'].seconds, stats['mul'].seconds)
+    assert stats['relinearize'].items == relin_key.digit_count()
+    # Three Karatsuba products and the digit products of both key halves.
+    assert stats['poly_mul'].items == 3 + 2 * relin_key.digit_count()
+    assert stats['add'].calls == stats['sum'].calls == 1
+    assert 'sample_uniform' not in stats
+    assert encryptor.metrics is None
+
+
+def test_expression_graph_uses_evaluator_metrics(setup):
+    dist, sk, pk, relin_key = setup
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    a, b, c = encryptor.encrypt_many(pk, [[2], [3], [4]])
+    metrics = Metrics()
+    graph = ExpressionGraph(Evaluator(dist, relin_key, metrics=metrics))
+    x, y, z = (graph.input(cipher) for cipher in (a, b, c))
+    graph.evaluate([x * y + y * z, x * y * z], workers=2)
+    stats = metrics.snapshot()
+    # x * y is shared, and x * y + y * z is relinearized once.
+    assert stats['relinearize'].calls == 3
+    assert 'mul' not in stats
+
+
+def test_explicit_activation_and_reset(setup):
+    dist, sk, pk, relin_key = setup
+    outer, inner = Metrics(), Metrics()
+    with outer.activate():
+        assert active_metrics() is outer
+        gen_key_pair(dist)
+        with inner.activate():
+            RelinKey.from_secret_key(sk, 2 ** 16)
+        assert active_metrics() is outer
+    assert active_metrics() is None
+    assert outer.snapshot()['gen_key_pair'].calls == 1
+    assert 'gen_relin_key' not in outer.snapshot()
+    assert inner.snapshot()['gen_relin_key'].items == \
+        relin_key.digit_count()
+
+    previous = outer.reset()
+    assert previous['gen_key_pair'].calls == 1
+    assert outer.reset() == {}
+    # Exported counters never decrease.
+    assert outer.snapshot() == previous
+    with outer.activate():
+        gen_key_pair(dist)
+    assert outer.reset()['gen_key_pair'].calls == 1
+    assert outer.snapshot()['gen_key_pair'].calls == 2
+
+
+def test_prometheus_export():
+    api, batch = Metrics({'instance': 'api'}), Metrics({'instance': 'b"1'})
+    api.record('mul', 0.5, 2)
+    api.record('mul', 0.25)
+    batch.record('add', 0.125)
+    text = format_prometheus([api, batch])
+    lines = text.splitlines()
+    assert text.endswith('\n')
+    assert lines.count('# TYPE venum_operation_calls_total counter') == 1
+    assert ('venum_operation_calls_total{instance="api",operation="mul"} 2'
+            in lines)
+    assert ('venum_operation_items_total{instance="api",operation="mul"} 3'
+            in lines)
+    assert ('venum_operation_seconds_total{instance="api",operation="mul"} '
+            '0.75' in lines)
+    assert ('venum_operation_max_seconds{instance="api",operation="mul"} '
+            '0.5' in lines)
+    assert ('venum_operation_calls_total{instance="b\\"1",operation="add"} 1'
+            in lines)
+    assert Metrics().to_prometheus(prefix='fhe').count('fhe_') == 8
+
+
+def test_prometheus_rejects_invalid_labels():
+    with pytest.raises(ValueError):
+        format_prometheus([Metrics({'operation': 'x'})])
+    with pytest.raises(ValueError):
+        format_prometheus([Metrics({'bad-name': 'x'})])
@@ -1,15 +1,15 @@
 from venum.glwe import EncryptionParameters, GlweDistribution
 from venum.encryption import Encryptor
-from venum.plaintext_encoding import PolynomialEncoder
+from venum.plaintext_encoding import (BatchEncoder, Plaintext,
+                                      PolynomialEncoder)
 from venum.key import gen_key_pair, RelinKey
 from venum.evaluation import Evaluator
+from venum.ntt import generate_ntt_primes
+from venum.rns import RnsBasis
 
-from sympy import Poly
-from sympy.abc import x
 import pytest
 
 
-@pytest.mark.skip(reason="multiplication needs fixing")
 @pytest.mark.parametrize(
     "input",
     [
@@ -23,23 +23,190 @@ import pytest
             "lhs": [0, 0, 0, 0],
             "rhs": [0, 0, 0, 0],
         },
+        {
+            "params": EncryptionParameters(
+                dimension=4,
+                ciphertext_modulus=1400472361734830353,
+                plaintext_modulus=12289,
+                noise_modulus=3,
+            ),
+            "lhs": [1, 2, 3, 4],
+            "rhs": [12288, 0, 7, 100],
+        },
+        {
+            "params": EncryptionParameters(
+                dimension=16,
+                ciphertext_modulus=2 ** 127 - 1,
+                plaintext_modulus=65537,
+                noise_modulus=3,
+            ),
+            "lhs": list(range(16)),
+            "rhs": [65536, 1, 2] * 5,
+            "base": 2 ** 20,
+        },
+        {
+            "params": EncryptionParameters(
+                dimension=64,
+                ciphertext_modulus=RnsBasis(
+                    [1073741441, 1073740609, 1073739937]),
+                plaintext_modulus=12289,
+                noise_modulus=3,
+            ),
+            "lhs": list(range(64)),
+            "rhs": [3, 0, 12288, 5] * 16,
+            "base": 2 ** 16,
+        },
     ])
 def test_multiplication(input):
     params, lhs, rhs = input["params"], input["lhs"], input["rhs"]
 
     dist = GlweDistribution(params)
 
-    expected = (Poly(reversed(lhs), x, domain=dist.plaintext_ring) *
-                Poly(reversed(rhs), x, domain=dist.plaintext_ring) %
-                dist.poly_modulus.set_domain(dist.plaintext_ring))
-    expected = list(reversed(expected.all_coeffs()))
+    expected = (dist.plaintext_ring.from_coeffs(lhs) *
+                dist.plaintext_ring.from_coeffs(rhs))
+    expected = expected.tolist()
 
     sk, pk = gen_key_pair(dist)
     encryptor = Encryptor(dist, PolynomialEncoder(dist))
     lhs_cipher = encryptor.encrypt(pk, lhs)
     rhs_cipher = encryptor.encrypt(pk, rhs)
-    relin_key = RelinKey.from_secret_key(sk)
+    relin_key = RelinKey.from_secret_key(sk, input.get("base", 2))
     eval = Evaluator(dist, relin_key)
     cipher_result = eval.mul(lhs_cipher, rhs_cipher)
     decrypted = encryptor.decrypt(sk, cipher_result)
     assert decrypted == expected
+
+
+@pytest.mark.parametrize("ciphertext_modulus", [
+    1400472361734830353,
+    RnsBasis([1073741441, 1073740609, 1073739937]),
+])
+def test_mul_plain(ciphertext_modulus):
+    params = EncryptionParameters(
+        dimension=8,
+        ciphertext_modulus=ciphertext_modulus,
+        plaintext_modulus=12289,
+        noise_modulus=3,
+        seed=0
+    )
+    dist = GlweDistribution(params)
+    lhs, rhs = [1, 2, 3, 4, 5, 6, 7, 8], [12288, 0, 3, 0, 0, 0, 0, 100]
+    expected = (dist.plaintext_ring.from_coeffs(lhs) *
+                dist.plaintext_ring.from_coeffs(rhs)).tolist()
+
+    sk, pk = gen_key_pair(dist)
+    encoder = PolynomialEncoder(dist)
+    encryptor = Encryptor(dist, encoder)
+    eval = Evaluator(dist)
+    cipher = encryptor.encrypt(pk, lhs)
+    assert encryptor.decrypt(sk, eval.mul_plain(cipher, rhs)) == expected
+    plaintext = Plaintext.encode(rhs, encoder)
+    assert encryptor.decrypt(sk, eval.mul_plain(cipher, plaintext)) == \
+        expected
+    assert encryptor.decrypt(sk, eval.mul_plain(cipher, -3)) == [
+        -3 * x % 12289 for x in lhs]
+
+
+def test_mul_plain_slotwise():
+    params = EncryptionParameters(
+        dimension=8,
+        ciphertext_modulus=RnsBasis([1073741441, 1073740609]),
+        plaintext_modulus=17,
+        noise_modulus=3,
+        seed=0
+    )
+    dist = GlweDistribution(params)
+    encoder = BatchEncoder(dist)
+    sk, pk = gen_key_pair(dist)
+    encryptor = Encryptor(dist, encoder)
+    eval = Evaluator(dist, plaintext_encoder=encoder)
+    lhs, weights = [1, 2, 3, 4, 5, 6, 7, 8], [2, 0, 1, 16, 3, 3, 3, 3]
+    cipher = eval.mul_plain(encryptor.encrypt(pk, lhs), weights)
+    assert encryptor.decrypt(sk, cipher) == [
+        x * w % 17 for x, w in zip(lhs, weights)]
+
+
+@pytest.mark.parametrize("ciphertext_modulus", [
+    1152921504606830593,
+    RnsBasis([1073707009, 1073698817]),
+])
+def test_multiplication_matches_rank2_relinearization(ciphertext_modulus):
+    params = EncryptionParameters(
+        dimension=32,
+        ciphertext_modulus=ciphertext_modulus,
+        plaintext_modulus=193,
+        noise_modulus=3,
+        seed=0
+    )
+    dist = GlweDistribution(params)
+    encoder = BatchEncoder(dist)
+    sk, pk = gen_key_pair(dist)
+    encryptor = Encryptor(dist, encoder)
+    eval = Evaluator(dist, RelinKey.from_secret_key(sk, 2 ** 8))
+    lhs, rhs = list(range(32)), [192 - 5 * i for i in range(32)]
+    lhs_cipher, rhs_cipher = encryptor.encrypt_many(pk, [lhs, rhs])
+    product = eval.mul(lhs_cipher, rhs_cipher)
+    assert encryptor.decrypt(sk, product) == [
+        x * y % 193 for x, y in zip(lhs, rhs)]
+
+    lhs_sample, rhs_sample = lhs_cipher.glwe_sample, rhs_cipher.glwe_sample
+    rank2 = eval.mul_no_relin(lhs_cipher, rhs_cipher)
+    assert rank2.constant == lhs_sample.body * rhs_sample.body
+    assert rank2.linear == (lhs_sample.body * rhs_sample.mask
+                            + lhs_sample.mask * rhs_sample.body)
+    assert rank2.quadratic == lhs_sample.mask * rhs_sample.mask
+    assert product.glwe_sample.body == rank2.relinearize(
+        eval.relin_key).glwe_sample.body
+
+
+def phase_noise(cipher, sk, message, params):
+    sample = cipher.glwe_sample
+    q = params.ciphertext_modulus
+    phase = (sample.body + sample.mask * sk.secret_poly).tolist()
+    return [(c - q if c > q // 2 else c) - m for c, m in zip(phase, message)]
+
+
+@pytest.mark.parametrize("ciphertext_modulus, base", [
+    (generate_ntt_primes(1024, 62, 1)[0], 2),
+    (generate_ntt_primes(1024, 62, 1)[0], 2 ** 16),
+    (RnsBasis(generate_ntt_primes(1024, 30, 3)), 2 ** 16),
+])
+def test_multiplication_with_noise(ciphertext_modulus, base):
+    params = EncryptionParameters(
+        dimension=1024,
+        ciphertext_modulus=ciphertext_modulus,
+        plaintext_modulus=12289,
+        noise_modulus=3,
+        seed=0
+    )
+    dist = GlweDistribution(params)
+    lhs = [(17 * i + 3) % 12289 for i in range(1024)]
+    rhs = [(101 * i * i) % 12289 for i in range(1024)]
+    expected = (dist.plaintext_ring.from_coeffs(lhs) *
+                dist.plaintext_ring.from_coeffs(rhs)).tolist()
+
+    sk, pk = gen_key_pair(dist)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    lhs_cipher, rhs_cipher = encryptor.encrypt_many(pk, [lhs, rhs])
+    eval = Evaluator(dist, RelinKey.from_secret_key(sk, base))
+    product = eval.mul(lhs_cipher, rhs_cipher)
+
+    for cipher, message in ((lhs_cipher, lhs), (product, expected)):
+        noise = phase_noise(cipher, sk, message, params)
+        assert any(noise)
+        assert all(e % 12289 == 0 for e in noise)
+    assert encryptor.decrypt(sk, product) == expected
+
+
+def test_multiplication_requires_relin_key():
+    params = EncryptionParameters(
+        dimension=4,
+        ciphertext_modulus=1400472361734830353,
+        plaintext_modulus=12289,
+        noise_modulus=3,
+    )
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    cipher = Encryptor(dist, PolynomialEncoder(dist)).encrypt(pk, [1])
+    with pytest.raises(ValueError):
+        Evaluator(dist).mul(cipher, cipher)
@@ -0,0 +1,79 @@
+from venum.glwe import EncryptionParameters
+from venum.ntt import (NttMultiplier, ensure_ntt_friendly,
+                       generate_ntt_primes, is_ntt_friendly, is_prime)
+from venum.ring import PolyRing, negacyclic_schoolbook
+
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("dimension, modulus", [
+    (4, 12289),
+    (1024, 12289),
+    (256, 1073707009),
+    (4, 1400472361734830353),
+    (64, 1152921504606830593),
+])
+def test_multiplication_matches_schoolbook(dimension, modulus):
+    rng = np.random.default_rng(dimension)
+    ring = PolyRing(dimension, modulus)
+    assert isinstance(ring.multiplier, NttMultiplier)
+    lhs = ring.from_coeffs(
+        [int(c) % modulus for c in rng.integers(0, 2 ** 62, dimension)])
+    rhs = ring.from_coeffs(
+        [int(c) % modulus for c in rng.integers(0, 2 ** 62, dimension)])
+    expected = negacyclic_schoolbook(lhs.coeffs, rhs.coeffs, modulus)
+    assert (lhs * rhs).tolist() == expected.tolist()
+
+
+def test_forward_inverse_roundtrip():
+    multiplier = NttMultiplier(16, 97)
+    coeffs = np.arange(32, dtype=np.int64).reshape(2, 16) % 97
+    values = multiplier.forward(coeffs)
+    assert values.shape == (2, 16)
+    assert np.array_equal(multiplier.inverse(values), coeffs)
+
+
+@pytest.mark.parametrize("dimension, modulus, expected", [
+    (4, 12289, True),
+    (2048, 12289, True),
+    (4096, 12289, False),
+    (4, 383, False),
+    (3, 13, False),
+    (4, 17 * 41, False),
+])
+def test_is_ntt_friendly(dimension, modulus, expected):
+    assert is_ntt_friendly(dimension, modulus) == expected
+
+
+def test_ensure_ntt_friendly_reports_reason():
+    with pytest.raises(ValueError, match="power-of-two"):
+        ensure_ntt_friendly(6, 13)
+    with pytest.raises(ValueError, match="1 mod 8"):
+        ensure_ntt_friendly(4, 383)
+    with pytest.raises(ValueError, match="prime"):
+        ensure_ntt_friendly(4, 17 * 41)
+
+
+def test_parameters_support_ntt():
+    assert EncryptionParameters(
+        dimension=4, ciphertext_modulus=12289, plaintext_modulus=127,
+        noise_modulus=3).supports_ntt()
+    assert not EncryptionParameters(
+        dimension=4, ciphertext_modulus=383, plaintext_modulus=127,
+        noise_modulus=3).supports_ntt()
+
+
+@pytest.mark.parametrize("number, expected", [
+    (2, True), (1, False), (97, True), (561, False),
+    (1400472361734830353, True), (2 ** 61 - 1, True), (2 ** 64 + 1, False),
+])
+def test_is_prime(number, expected):
+    assert is_prime(number) == expected
+
+
+def test_generate_ntt_primes():
+    primes = generate_ntt_primes(1024, 30, 3)
+    assert len(set(primes)) == 3
+    assert all(p < 2 ** 30 for p in primes)
+    assert all(is_ntt_friendly(1024, p) for p in primes)
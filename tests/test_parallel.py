@@ -0,0 +1,155 @@
+from venum.glwe import EncryptionParameters, GlweDistribution
+from venum.encryption import Encryptor
+from venum.evaluation import Evaluator
+from venum.key import RelinKey, gen_key_pair
+from venum.parallel import SEED_BLOCK_SIZE, ProcessPool, SharedArray
+from venum.plaintext_encoding import BatchEncoder, PolynomialEncoder
+from venum.rns import RnsBasis
+
+import numpy as np
+import pytest
+
+
+def make_params(seed=0):
+    return EncryptionParameters(
+        dimension=16,
+        ciphertext_modulus=RnsBasis([1073741441, 1073740609, 1073739937]),
+        plaintext_modulus=12289,
+        noise_modulus=3,
+        seed=seed
+    )
+
+
+@pytest.fixture(scope="module")
+def setup():
+    dist = GlweDistribution(make_params())
+    sk, pk = gen_key_pair(dist)
+    relin_key = RelinKey.from_secret_key(sk, 2 ** 16)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    with ProcessPool(dist, pk, sk, relin_key, processes=3) as pool:
+        yield dist, sk, pk, relin_key, encryptor, pool
+
+
+def messages(count, offset=0):
+    return [[(i * 7 + j + offset) % 12289 for j in range(16)]
+            for i in range(count)]
+
+
+def test_shared_array_roundtrip():
+    with SharedArray.create((3, 4), np.int64) as shared:
+        shared.array[:] = np.arange(12).reshape(3, 4)
+        attached = SharedArray.attach(shared.descriptor)
+        assert attached.array.tolist() == shared.array.tolist()
+        attached.close()
+
+
+def test_encrypt_decrypt(setup):
+    dist, sk, pk, relin_key, encryptor, pool = setup
+    batch = messages(10)
+    ciphers = pool.encrypt_many(batch)
+    assert len(ciphers) == 10
+    assert encryptor.decrypt_many(sk, ciphers).tolist() == batch
+    assert pool.decrypt_many(encryptor.encrypt_many(pk, batch)).tolist() \
+        == batch
+    assert pool.encrypt_many([]) == []
+    assert pool.decrypt_many([]).shape == (0, 16)
+
+
+def test_encryption_randomness_is_not_shared(setup):
+    dist, sk, pk, relin_key, encryptor, pool = setup
+    ciphers = pool.encrypt_many([[1]] * 6)
+    masks = {c.glwe_sample.mask.coeffs.tobytes() for c in ciphers}
+    assert len(masks) == 6
+
+
+def test_encryption_is_deterministic_per_seed(setup):
+    dist, sk, pk, relin_key, encryptor, pool = setup
+    results = []
+    for _ in range(2):
+        fresh = GlweDistribution(make_params(seed=5))
+        with ProcessPool(fresh, pk, processes=2) as other:
+            results.append(other.encrypt_many(messages(4)))
+    assert [c.glwe_sample.body for c in results[0]] == \
+        [c.glwe_sample.body for c in results[1]]
+
+
+def test_encryption_does_not_depend_on_processes(setup):
+    dist, sk, pk, relin_key, encryptor, pool = setup
+    batch = messages(2 * SEED_BLOCK_SIZE + 5)
+    results = []
+    for processes in (1, 3):
+        fresh = GlweDistribution(make_params(seed=5))
+        with ProcessPool(fresh, pk, processes=processes) as other:
+            results.append(other.encrypt_many(batch))
+    for lhs, rhs in zip(*results):
+        assert lhs.glwe_sample.mask == rhs.glwe_sample.mask
+        assert lhs.glwe_sample.body == rhs.glwe_sample.body
+    assert encryptor.decrypt_many(sk, results[0]).tolist() == batch
+
+
+def test_operations(setup):
+    dist, sk, pk, relin_key, encryptor, pool = setup
+    lhs, rhs = messages(7), messages(7, offset=100)
+    lhs_ciphers = encryptor.encrypt_many(pk, lhs)
+    rhs_ciphers = encryptor.encrypt_many(pk, rhs)
+    evaluator = Evaluator(dist, relin_key)
+    decrypt = encryptor.decrypt_many
+
+    assert decrypt(sk, pool.add_many(lhs_ciphers, rhs_ciphers)).tolist() \
+        == [[(a + b) % 12289 for a, b in zip(x, y)]
+            for x, y in zip(lhs, rhs)]
+    assert decrypt(sk, pool.sub_many(lhs_ciphers, rhs_ciphers)).tolist() \
+        == [[(a - b) % 12289 for a, b in zip(x, y)]
+            for x, y in zip(lhs, rhs)]
+    products = pool.mul_many(lhs_ciphers, rhs_ciphers)
+    assert decrypt(sk, products).tolist() == decrypt(sk, [
+        evaluator.mul(a, b)
+        for a, b in zip(lhs_ciphers, rhs_ciphers)]).tolist()
+
+    weights = [1, -2, 3, 0, 5, 1, 1]
+    assert encryptor.decrypt(sk, pool.sum(lhs_ciphers, weights)) == \
+        encryptor.decrypt(sk, evaluator.sum(lhs_ciphers, weights))
+    assert encryptor.decrypt(sk, pool.sum(lhs_ciphers[:2])) == \
+        encryptor.decrypt(sk, evaluator.sum(lhs_ciphers[:2]))
+
+    with pytest.raises(ValueError):
+        pool.add_many(lhs_ciphers, rhs_ciphers[1:])
+    with pytest.raises(ValueError):
+        pool.sum(lhs_ciphers, weights[1:])
+
+
+def test_batch_encoder():
+    params = EncryptionParameters(
+        dimension=8,
+        ciphertext_modulus=RnsBasis([1073741441, 1073740609]),
+        plaintext_modulus=17,
+        noise_modulus=3,
+        seed=0
+    )
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    encoder = BatchEncoder(dist)
+    batch = [[1, 2, 3, 4, 5, 6, 7, 8], [16, 0, 16, 0, 1, 1, 1, 1]]
+    with ProcessPool(dist, pk, sk, plaintext_encoder=encoder,
+                     processes=2) as pool:
+        assert pool.decrypt_many(pool.encrypt_many(batch)).tolist() == batch
+
+
+def test_requires_keys_and_int64_coefficients(setup):
+    dist, sk, pk, relin_key, encryptor, pool = setup
+    ciphers = encryptor.encrypt_many(pk, messages(2))
+    with ProcessPool(dist, processes=1) as keyless:
+        with pytest.raises(ValueError):
+            keyless.encrypt_many(messages(1))
+        with pytest.raises(ValueError):
+            keyless.decrypt_many(ciphers)
+        with pytest.raises(ValueError):
+            keyless.mul_many(ciphers, ciphers)
+    params = EncryptionParameters(
+        dimension=4,
+        ciphertext_modulus=2 ** 127 - 1,
+        plaintext_modulus=12289,
+        noise_modulus=3,
+    )
+    with pytest.raises(ValueError):
+        ProcessPool(GlweDistribution(params))
@@ -0,0 +1,75 @@
+from venum.glwe import EncryptionParameters, GlweDistribution
+from venum.encryption import Encryptor
+from venum.evaluation import Evaluator
+from venum.plaintext_encoding import BatchEncoder
+from venum.key import gen_key_pair
+from venum.rns import RnsBasis
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture(params=[
+    12289,
+    RnsBasis([1073741441, 1073740609]),
+])
+def dist(request):
+    return GlweDistribution(EncryptionParameters(
+        dimension=8,
+        ciphertext_modulus=request.param,
+        plaintext_modulus=17,
+        noise_modulus=3,
+        seed=0
+    ))
+
+
+def test_encode_decode(dist):
+    encoder = BatchEncoder(dist)
+    message = [1, 2, 3, 4, 5, 6, 7, 16]
+    assert encoder.slot_count == 8
+    assert encoder.decode(encoder.encode(message)) == message
+    assert encoder.decode(encoder.encode([3])) == [3] + [0] * 7
+
+
+def test_slotwise_ring_operations(dist):
+    encoder = BatchEncoder(dist)
+    lhs, rhs = [1, 2, 3, 4, 5, 6, 7, 8], [9, 10, 11, 12, 13, 14, 15, 16]
+    lhs_poly, rhs_poly = encoder.encode(lhs), encoder.encode(rhs)
+    assert encoder.decode(lhs_poly * rhs_poly) == [
+        x * y % 17 for x, y in zip(lhs, rhs)]
+    assert encoder.decode(lhs_poly + rhs_poly) == [
+        (x + y) % 17 for x, y in zip(lhs, rhs)]
+
+
+def test_encrypted_slotwise_addition(dist):
+    encoder = BatchEncoder(dist)
+    sk, pk = gen_key_pair(dist)
+    encryptor = Encryptor(dist, encoder)
+    lhs = [[1, 2, 3, 4, 5, 6, 7, 8], [16, 0, 1, 0, 2, 0, 3, 0]]
+    rhs = [[9, 10, 11, 12, 13, 14, 15, 16], [1, 1, 1, 1, 1, 1, 1, 1]]
+    lhs_ciphers = encryptor.encrypt_many(pk, lhs)
+    rhs_ciphers = encryptor.encrypt_many(pk, rhs)
+    eval = Evaluator(dist)
+    sums = [eval.add(x, y) for x, y in zip(lhs_ciphers, rhs_ciphers)]
+    differences = [eval.sub(x, y) for x, y in zip(lhs_ciphers, rhs_ciphers)]
+    assert np.array_equal(encryptor.decrypt_many(sk, sums),
+                          (np.array(lhs) + rhs) % 17)
+    assert np.array_equal(encryptor.decrypt_many(sk, differences),
+                          (np.array(lhs) - rhs) % 17)
+    assert encryptor.decrypt(sk, sums[0]) == [10, 12, 14, 16, 1, 3, 5, 7]
+
+
+def test_rejects_too_many_values(dist):
+    with pytest.raises(ValueError):
+        BatchEncoder(dist).encode(range(9))
+
+
+def test_requires_splitting_plaintext_modulus():
+    dist = GlweDistribution(EncryptionParameters(
+        dimension=8,
+        ciphertext_modulus=12289,
+        plaintext_modulus=127,
+        noise_modulus=3,
+    ))
+    with pytest.raises(ValueError, match="1 mod 16"):
+        BatchEncoder(dist)
@@ -1,5 +1,7 @@
 from venum import numeric
+from venum.ring import PolyRing
 
+import numpy as np
 import pytest
 
 
@@ -25,3 +27,57 @@ def test_radix_decomposition(number, radix, expected):
     for i in range(len(expected)):
         actual = numeric.nth_digit(number, radix, i)
         assert actual == expected[-1 - i]
+
+
+@pytest.mark.parametrize("radix, num_components, dtype", [
+    (2, 61, np.int64),
+    (2 ** 16, 4, np.int64),
+    (10, 40, object),
+    (2 ** 40, 4, object),
+])
+def test_radix_decompose_array(radix, num_components, dtype):
+    numbers = [0, 1, 1234512345, 2 ** 60 + 12345, 2 ** 61 - 1]
+    coeffs = np.array(numbers, dtype=dtype)
+    digits = numeric.radix_decompose(coeffs, radix, num_components)
+    assert digits.shape == (num_components, len(numbers))
+    assert digits.tolist() == [
+        [numeric.nth_digit(x, radix, i) for x in numbers]
+        for i in range(num_components)]
+
+
+def test_radix_decompose_rejects_negative():
+    with pytest.raises(ValueError):
+        numeric.radix_decompose(np.array([1, -1]), 2, 4)
+
+
+@pytest.mark.parametrize("radix", [3, 4, 10, 2 ** 16, 2 ** 61 - 1, 2 ** 64])
+@pytest.mark.parametrize("dtype", [np.int64, object])
+def test_radix_decompose_signed(radix, dtype):
+    numbers = [0, 1, -1, 1234512345, -(2 ** 60) - 12345, 2 ** 61 - 1]
+    num_components = 2
+    while radix ** num_components < 2 ** 63:
+        num_components += 1
+    digits = numeric.radix_decompose(np.array(numbers, dtype=dtype), radix,
+                                     num_components, signed=True)
+    assert all(-radix // 2 <= d < radix - radix // 2
+               for d in digits.flat)
+    assert [sum(int(digits[i, j]) * radix ** i
+                for i in range(num_components))
+            for j in range(len(numbers))] == numbers
+
+
+def test_radix_decompose_signed_overflow():
+    with pytest.raises(ValueError):
+        numeric.radix_decompose(np.array([7]), 4, 1, signed=True)
+    with pytest.raises(ValueError):
+        numeric.radix_decompose(np.array([1]), 2, 8, signed=True)
+
+
+@pytest.mark.parametrize("signed", [False, True])
+def test_radix_decompose_poly(signed):
+    ring = PolyRing(4, 1400472361734830353)
+    poly = ring.from_coeffs([0, 1, 1400472361734830352, 700236180867415176])
+    components = list(numeric.radix_decompose_poly(poly, 2 ** 16, 4, signed))
+    assert len(components) == 4
+    assert sum((c * 2 ** (16 * i) for i, c in enumerate(components)),
+               ring.zero()) == poly
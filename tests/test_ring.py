@@ -0,0 +1,154 @@
+from venum.ring import PolyRing, RnsPolyRing, SchoolbookMultiplier
+from venum.rns import RnsBasis
+
+import numpy as np
+import pytest
+
+
+def naive_negacyclic_product(lhs, rhs, modulus):
+    dimension = len(lhs)
+    result = [0] * dimension
+    for i, a in enumerate(lhs):
+        for j, b in enumerate(rhs):
+            if i + j < dimension:
+                result[i + j] += a * b
+            else:
+                result[i + j - dimension] -= a * b
+    return [c % modulus for c in result]
+
+
+@pytest.mark.parametrize("dimension, modulus", [
+    (4, 383),
+    (8, 12289),
+    (16, 1400472361734830353),
+    (4, 2 ** 127 - 1),
+])
+def test_multiplication(dimension, modulus):
+    ring = PolyRing(dimension, modulus)
+    lhs = [(7 ** (i + 3)) % modulus for i in range(dimension)]
+    rhs = [(modulus - 1 - 5 ** (i + 1)) % modulus for i in range(dimension)]
+    product = ring.from_coeffs(lhs) * ring.from_coeffs(rhs)
+    assert product.tolist() == naive_negacyclic_product(lhs, rhs, modulus)
+
+
+@pytest.mark.parametrize("modulus", [383, 2 ** 127 - 1])
+def test_addition_subtraction(modulus):
+    ring = PolyRing(4, modulus)
+    lhs = ring.from_coeffs([1, 2, 3, modulus - 1])
+    rhs = ring.from_coeffs([5, modulus - 2, 7, 8])
+    assert (lhs + rhs).tolist() == [6, 0, 10, 7]
+    assert (lhs - rhs).tolist() == [modulus - 4, 4, modulus - 4,
+                                    modulus - 9]
+    assert (-lhs).tolist() == [modulus - 1, modulus - 2, modulus - 3, 1]
+
+
+def test_from_coeffs_folds_negacyclically():
+    ring = PolyRing(4, 383)
+    poly = ring.from_coeffs([1, 2, 3, 4, 5, 6, -1])
+    assert poly.tolist() == [383 - 4, 383 - 4, 4, 4]
+
+
+def test_from_coeffs_pads_short_input():
+    ring = PolyRing(4, 383)
+    assert ring.from_coeffs([1]).tolist() == [1, 0, 0, 0]
+    assert ring.from_coeffs([]) == ring.zero()
+
+
+def test_scalar_multiplication():
+    modulus = 1400472361734830353
+    ring = PolyRing(4, modulus)
+    poly = ring.from_coeffs([1, 2, modulus - 1, 0])
+    scalar = 2 ** 100
+    assert (scalar * poly).tolist() == [
+        c * scalar % modulus for c in poly.tolist()]
+
+
+def test_incompatible_rings():
+    lhs = PolyRing(4, 383).from_coeffs([1, 2, 3, 4])
+    rhs = PolyRing(4, 12289).from_coeffs([1, 2, 3, 4])
+    with pytest.raises(ValueError):
+        lhs + rhs
+    with pytest.raises(ValueError):
+        lhs * rhs
+
+
+def test_to_ring():
+    poly = PolyRing(4, 127).from_coeffs([1, 2, 126, 0])
+    lifted = poly.to_ring(PolyRing(4, 383))
+    assert lifted.tolist() == [1, 2, 126, 0]
+    assert lifted.ring.modulus == 383
+
+
+@pytest.mark.parametrize("moduli", [
+    [383, 12289],
+    [1073741441, 1073740609, 1073739937],
+    [2 ** 61 - 1, 1400472361734830353],
+])
+def test_rns_ring_matches_single_modulus(moduli):
+    dimension = 8
+    rns_ring = RnsPolyRing(dimension, RnsBasis(moduli))
+    ring = PolyRing(dimension, rns_ring.modulus)
+    lhs = [(7 ** (i + 30)) % ring.modulus for i in range(dimension)]
+    rhs = [(ring.modulus - 5 ** (i + 20)) % ring.modulus
+           for i in range(dimension)]
+    rns_lhs, rns_rhs = rns_ring.from_coeffs(lhs), rns_ring.from_coeffs(rhs)
+    lhs, rhs = ring.from_coeffs(lhs), ring.from_coeffs(rhs)
+    assert rns_lhs.coeffs.shape == (len(moduli), dimension)
+    assert (rns_lhs * rns_rhs).tolist() == (lhs * rhs).tolist()
+    assert (rns_lhs + rns_rhs).tolist() == (lhs + rhs).tolist()
+    assert (rns_lhs - rns_rhs).tolist() == (lhs - rhs).tolist()
+    assert (2 ** 90 * rns_lhs).tolist() == (2 ** 90 * lhs).tolist()
+    assert rns_lhs.to_ring(ring) == lhs
+    assert lhs.to_ring(rns_ring) == rns_lhs
+
+
+def test_rns_ring_differs_from_single_modulus():
+    rns_ring = RnsPolyRing(4, RnsBasis([383, 12289]))
+    assert rns_ring != PolyRing(4, 383 * 12289)
+    assert rns_ring == RnsPolyRing(4, RnsBasis([383, 12289]))
+
+
+def test_rns_ring_rejects_wide_moduli():
+    with pytest.raises(ValueError):
+        RnsPolyRing(4, RnsBasis([2 ** 64 + 1, 3]))
+
+
+@pytest.mark.parametrize("dimension, modulus, multiplier", [
+    (4, 383, None),
+    (8, 12289, None),
+    (4, 2 ** 127 - 1, None),
+    (4, 2 ** 127 - 1, SchoolbookMultiplier(2 ** 127 - 1)),
+])
+def test_batch_multiplication(dimension, modulus, multiplier):
+    ring = PolyRing(dimension, modulus, multiplier)
+    lhs = ring.from_coeffs([(7 ** (i + 3)) % modulus
+                            for i in range(dimension)])
+    rhs = [ring.from_coeffs([(5 ** (i + j)) % modulus
+                             for i in range(dimension)]) for j in range(3)]
+    product = ring.multiply(lhs.coeffs, np.stack([r.coeffs for r in rhs]))
+    assert [row.tolist() for row in product] == [
+        (lhs * r).coeffs.tolist() for r in rhs]
+
+
+def test_embed_batch():
+    ring = RnsPolyRing(4, RnsBasis([383, 12289]))
+    coeffs = np.array([[1, 2, 3, 400], [5, 6, 7, 13000]])
+    embedded = ring.embed(coeffs)
+    assert embedded.shape == (2, 2, 4)
+    assert [ring.lift(row).tolist() for row in embedded] == coeffs.tolist()
+
+
+@pytest.mark.parametrize("ring", [
+    PolyRing(8, 383),
+    PolyRing(8, 12289),
+    PolyRing(4, 2 ** 127 - 1, SchoolbookMultiplier(2 ** 127 - 1)),
+    RnsPolyRing(8, RnsBasis([12289, 1073741441, 383])),
+])
+def test_prepared_multiplication(ring):
+    rng = np.random.default_rng(0)
+    fixed = ring.sample_uniform(rng, (2,))
+    batch = ring.sample_uniform(rng, (3, 1))
+    prepared = ring.prepare(fixed)
+    product = ring.multiply_prepared(prepared, batch)
+    assert product.shape == (3, 2) + ring.shape
+    assert np.array_equal(product, ring.multiply(fixed, batch))
@@ -1,5 +1,6 @@
+import numpy as np
 import pytest
-from venum.rns import RnsBasis
+from venum.rns import RnsArray, RnsBasis
 
 
 @pytest.fixture
@@ -50,3 +51,72 @@ def test_to_int(rns_basis):
     x = 10
     a = rns_basis.to_rns(x)
     assert a.to_int() == x, f"Expected int value {x}, got {int(a)}"
+
+
+def test_cached_constants(rns_basis):
+    assert rns_basis.modulus == 105
+    assert rns_basis.crt_factors == [35, 21, 15]
+    for e, m in zip(rns_basis.crt_idempotents, rns_basis.moduli):
+        assert [e % mj for mj in rns_basis.moduli] == [
+            int(mj == m) for mj in rns_basis.moduli]
+
+
+@pytest.mark.parametrize("moduli", [
+    [3, 5, 7],
+    [1073741441, 1073740609, 1073739937, 1073739649],
+    [2 ** 61 - 1, 2 ** 89 - 1],
+])
+@pytest.mark.parametrize("method", ["crt", "garner"])
+def test_array_roundtrip(moduli, method):
+    basis = RnsBasis(moduli)
+    values = np.array([0, 1, basis.modulus - 1, basis.modulus // 3,
+                       12345678901234567 % basis.modulus], dtype=object)
+    array = basis.to_rns_array(values)
+    assert array.shape == values.shape
+    assert array.to_int(method).tolist() == values.tolist()
+
+
+def test_array_arithmetic(rns_basis):
+    x = np.array([10, 0, 104, 52])
+    y = np.array([6, 7, 2, 99])
+    a = rns_basis.to_rns_array(x)
+    b = rns_basis.to_rns_array(y)
+    assert (a + b).to_int().tolist() == ((x + y) % 105).tolist()
+    assert (a - b).to_int().tolist() == ((x - y) % 105).tolist()
+    assert (a * b).to_int().tolist() == ((x * y) % 105).tolist()
+
+
+def test_array_item_matches_rns(rns_basis):
+    array = rns_basis.to_rns_array(np.array([[10, 11], [12, 13]]))
+    assert array[1, 0].residues == rns_basis.to_rns(12).residues
+
+
+def test_array_incompatible_basis(rns_basis):
+    a = rns_basis.to_rns_array(np.array([1, 2]))
+    b = RnsBasis([3, 5, 11]).to_rns_array(np.array([1, 2]))
+    with pytest.raises(ValueError):
+        a + b
+    with pytest.raises(ValueError):
+        RnsArray(rns_basis, np.zeros((2, 4)))
+
+
+def test_array_from_int64_with_large_moduli():
+    basis = RnsBasis([2 ** 61 - 1, 2 ** 89 - 1])
+    values = np.array([0, 5, 2 ** 62 + 3, 2 ** 63 - 1], dtype=np.int64)
+    array = basis.to_rns_array(values)
+    assert array.to_int().tolist() == values.tolist()
+    assert array.residues[1].tolist() == values.tolist()
+
+
+@pytest.mark.parametrize("moduli, dtype", [
+    ([3, 5, 7], np.int64),
+    ([1073741441, 1073740609], np.int64),
+    ([2 ** 62 - 57], np.int64),
+    ([1073741441, 1073740609, 1073739937], object),
+])
+def test_garner_stays_in_int64(moduli, dtype):
+    basis = RnsBasis(moduli)
+    values = np.array([0, 1, basis.modulus - 1], dtype=object)
+    reconstructed = basis.to_rns_array(values).to_int()
+    assert reconstructed.dtype == dtype
+    assert reconstructed.tolist() == values.tolist()
@@ -0,0 +1,84 @@
+from venum.glwe import EncryptionParameters, GlweDistribution
+from venum.rns import RnsBasis
+from venum.sampling import (XofStream, derive_seed, gaussian_cdt,
+                            sample_centered_binomial,
+                            sample_discrete_gaussian, sample_ternary,
+                            sample_uniform)
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.mark.parametrize("modulus", [2, 3, 383, 2 ** 62, 2 ** 127 - 1])
+def test_uniform_bounds(rng, modulus):
+    values = sample_uniform(rng, modulus, (8, 16))
+    assert values.shape == (8, 16)
+    assert all(0 <= v < modulus for v in values.flat)
+
+
+def test_uniform_covers_range(rng):
+    values = sample_uniform(rng, 5, 1000)
+    assert set(values.tolist()) == {0, 1, 2, 3, 4}
+
+
+def test_ternary(rng):
+    values = sample_ternary(rng, (4, 256))
+    assert set(values.flat) == {-1, 0, 1}
+
+
+def test_centered_binomial(rng):
+    values = sample_centered_binomial(rng, 4, (64, 256))
+    assert values.shape == (64, 256)
+    assert values.min() >= -4 and values.max() <= 4
+    assert abs(values.mean()) < 0.1
+    assert abs(values.var() - 2) < 0.2
+
+
+def test_discrete_gaussian(rng):
+    values = sample_discrete_gaussian(rng, 3.2, (64, 1024))
+    assert abs(values.mean()) < 0.1
+    assert abs(values.std() - 3.2) < 0.1
+    assert np.all(np.diff(gaussian_cdt(3.2)) >= 0)
+
+
+@pytest.mark.parametrize("distribution", ["gaussian", "binomial", "uniform"])
+def test_batch_shapes(distribution):
+    params = EncryptionParameters(
+        dimension=8,
+        ciphertext_modulus=RnsBasis([12289, 40961]),
+        plaintext_modulus=127,
+        noise_modulus=3,
+        seed=0,
+        noise_distribution=distribution,
+    )
+    dist = GlweDistribution(params)
+    masks = dist.sample_uniform_array(batch=5)
+    assert masks.shape == (5, 2, 8)
+    assert np.all(masks < dist.cipher_ring.moduli)
+    assert dist.sample_ternary_array(batch=5).shape == (5, 8)
+    noise = dist.sample_noise_array(batch=5)
+    assert noise.shape == (5, 8)
+    assert noise.min() >= 0 and noise.max() < params.noise_modulus
+    assert dist.sample_crt_noise_array(batch=5).shape == (5, 8)
+
+
+def test_invalid_noise_distribution():
+    with pytest.raises(ValueError):
+        EncryptionParameters(
+            dimension=4, ciphertext_modulus=383, plaintext_modulus=127,
+            noise_modulus=3, noise_distribution='laplace')
+
+
+def test_xof_stream_is_deterministic():
+    seed = bytes(range(32))
+    lhs = sample_uniform(XofStream(seed), 12289, (3, 64))
+    rhs = sample_uniform(XofStream(seed), 12289, (3, 64))
+    assert np.array_equal(lhs, rhs)
+    other = sample_uniform(XofStream(derive_seed(seed, 0)), 12289, (3, 64))
+    assert not np.array_equal(lhs, other)
+    assert derive_seed(seed, 0) != derive_seed(seed, 1)
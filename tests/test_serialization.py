@@ -0,0 +1,171 @@
+from venum.glwe import EncryptionParameters, GlweDistribution
+from venum.encryption import Cipher, Encryptor
+from venum.plaintext_encoding import PolynomialEncoder
+from venum.key import PublicKey, RelinKey, SecretKey, gen_key_pair
+from venum.rns import RnsBasis
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture(params=[
+    12289,
+    1400472361734830353,
+    2 ** 63 + 29,
+    2 ** 64 - 59,
+    2 ** 127 - 1,
+    RnsBasis([1073741441, 1073740609, 1073739937]),
+])
+def params(request):
+    return EncryptionParameters(
+        dimension=8,
+        ciphertext_modulus=request.param,
+        plaintext_modulus=127,
+        noise_modulus=3,
+        seed=0
+    )
+
+
+def test_params_roundtrip(params):
+    restored = EncryptionParameters.from_bytes(params.to_bytes())
+    assert restored == params
+    assert restored.fingerprint() == params.fingerprint()
+
+
+def test_fingerprint_ignores_seed(params):
+    other = EncryptionParameters(
+        dimension=params.dimension,
+        ciphertext_modulus=(params.ciphertext_basis
+                            or params.ciphertext_modulus),
+        plaintext_modulus=params.plaintext_modulus,
+        noise_modulus=params.noise_modulus,
+    )
+    assert other.fingerprint() == params.fingerprint()
+    other.noise_stddev = 2.0
+    assert other.fingerprint() != params.fingerprint()
+
+
+def test_keys_roundtrip(params):
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    relin_key = RelinKey.from_secret_key(sk, base=2 ** 16)
+
+    restored_sk = SecretKey.from_bytes(sk.to_bytes(), dist)
+    assert restored_sk.secret_poly == sk.secret_poly
+
+    restored_pk = PublicKey.from_bytes(memoryview(pk.to_bytes(params)), dist)
+    assert restored_pk.glwe_sample.mask == pk.glwe_sample.mask
+    assert restored_pk.glwe_sample.body == pk.glwe_sample.body
+
+    restored_rk = RelinKey.from_bytes(relin_key.to_bytes(params), dist)
+    assert restored_rk.base == relin_key.base
+    for restored, aux_key in zip(restored_rk.aux_keys, relin_key.aux_keys):
+        assert restored.mask == aux_key.mask
+        assert restored.body == aux_key.body
+
+
+@pytest.mark.parametrize('modulus', [2 ** 63 + 29, 2 ** 64 - 59])
+def test_roundtrip_keeps_object_coefficients(modulus):
+    params = EncryptionParameters(
+        dimension=8,
+        ciphertext_modulus=modulus,
+        plaintext_modulus=127,
+        noise_modulus=3,
+        seed=0
+    )
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    relin_key = RelinKey.from_secret_key(sk, base=2 ** 16)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    cipher = encryptor.encrypt(pk, [1, 2, 3])
+
+    restored = Cipher.from_bytes(cipher.to_bytes(params), dist)
+    restored_pk = PublicKey.from_bytes(pk.to_bytes(params), dist)
+    restored_rk = RelinKey.from_bytes(relin_key.to_bytes(params), dist)
+    polys = [restored.glwe_sample.mask, restored.glwe_sample.body,
+             restored_pk.glwe_sample.mask, restored_pk.glwe_sample.body]
+    for aux_key in restored_rk.aux_keys:
+        polys += [aux_key.mask, aux_key.body]
+    assert all(poly.coeffs.dtype == object for poly in polys)
+    assert restored.glwe_sample.mask == cipher.glwe_sample.mask
+    assert restored.glwe_sample.body == cipher.glwe_sample.body
+    assert encryptor.decrypt(sk, restored)[:3] == [1, 2, 3]
+    assert encryptor.decrypt(sk, encryptor.encrypt(restored_pk, [4, 5])
+                             )[:2] == [4, 5]
+
+
+def test_seeded_masks_halve_size(params):
+    params = EncryptionParameters(
+        dimension=64,
+        ciphertext_modulus=(params.ciphertext_basis
+                            or params.ciphertext_modulus),
+        plaintext_modulus=127,
+        noise_modulus=3,
+    )
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    message = list(range(64))
+    full = encryptor.encrypt(pk, message).to_bytes(params)
+    seeded = encryptor.encrypt_symmetric(sk, message).to_bytes(params)
+    assert len(seeded) < 0.6 * len(full)
+    assert encryptor.decrypt(sk, Cipher.from_bytes(seeded, dist)) == message
+
+
+def test_ciphers_bulk_roundtrip(params):
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    messages = [[i, i + 1, i + 2] + [0] * 5 for i in range(5)]
+    ciphers = [encryptor.encrypt(pk, message) for message in messages]
+    data = Cipher.dump_many(ciphers, params)
+    restored = Cipher.load_many(data, dist)
+    assert [encryptor.decrypt(sk, c) for c in restored] == messages
+
+
+def test_loading_is_zero_copy():
+    params = EncryptionParameters(
+        dimension=8,
+        ciphertext_modulus=RnsBasis([1073741441, 1073740609]),
+        plaintext_modulus=127,
+        noise_modulus=3,
+    )
+    dist = GlweDistribution(params)
+    _, pk = gen_key_pair(dist)
+    cipher = Encryptor(dist, PolynomialEncoder(dist)).encrypt(pk, [1, 2])
+    data = bytearray(cipher.to_bytes(params))
+    restored = Cipher.from_bytes(data, dist)
+    assert np.shares_memory(restored.glwe_sample.body.coeffs,
+                            np.frombuffer(data, dtype=np.uint8))
+
+
+def test_rejects_other_parameters(params):
+    dist = GlweDistribution(params)
+    sk, _ = gen_key_pair(dist)
+    other = GlweDistribution(EncryptionParameters(
+        dimension=8,
+        ciphertext_modulus=(params.ciphertext_basis
+                            or params.ciphertext_modulus),
+        plaintext_modulus=131,
+        noise_modulus=3,
+    ))
+    with pytest.raises(ValueError, match="different encryption"):
+        SecretKey.from_bytes(sk.to_bytes(), other)
+    with pytest.raises(ValueError, match="kind"):
+        PublicKey.from_bytes(sk.to_bytes(), dist)
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: b'XXXX' + data[4:],
+    lambda data: data[:-1],
+    lambda data: data + b'\0',
+    lambda data: data[:-8] + b'\xff' * 8,
+])
+def test_rejects_malformed_data(corrupt):
+    params = EncryptionParameters(
+        dimension=4, ciphertext_modulus=12289, plaintext_modulus=127,
+        noise_modulus=3)
+    dist = GlweDistribution(params)
+    sk, _ = gen_key_pair(dist)
+    with pytest.raises(ValueError):
+        SecretKey.from_bytes(corrupt(sk.to_bytes()), dist)
@@ -1,8 +1,9 @@
 from venum.glwe import EncryptionParameters, GlweDistribution
 from venum.encryption import Encryptor
-from venum.plaintext_encoding import PolynomialEncoder
+from venum.plaintext_encoding import Plaintext, PolynomialEncoder
 from venum.key import gen_key_pair
 from venum.evaluation import Evaluator
+from venum.rns import RnsBasis
 
 import pytest
 
@@ -13,7 +14,7 @@ import pytest
         {
             "params": EncryptionParameters(
                 dimension=4,
-                ciphertext_modulus=383,
+                ciphertext_modulus=65539,
                 plaintext_modulus=127,
                 noise_modulus=3,
                 seed=0
@@ -35,7 +36,7 @@ import pytest
         {
             "params": EncryptionParameters(
                 dimension=4,
-                ciphertext_modulus=383,
+                ciphertext_modulus=65539,
                 plaintext_modulus=127,
                 noise_modulus=3,
             ),
@@ -72,6 +73,28 @@ import pytest
             "lhs": [10001, 10002, 10003, 10004],
             "rhs": [4, 3, 2, 1],
         },
+        {
+            "params": EncryptionParameters(
+                dimension=8,
+                ciphertext_modulus=RnsBasis([1073741441, 1073740609,
+                                             1073739937]),
+                plaintext_modulus=12289,
+                noise_modulus=3,
+                seed=2
+            ),
+            "lhs": [10001, 10002, 10003, 10004, 0, 0, 0, 1],
+            "rhs": [4, 3, 2, 1, 0, 0, 0, 0],
+        },
+        {
+            "params": EncryptionParameters(
+                dimension=4,
+                ciphertext_modulus=RnsBasis([383, 12289]),
+                plaintext_modulus=127,
+                noise_modulus=3,
+            ),
+            "lhs": [5, 6, 7, 8],
+            "rhs": [1, 2, 3, 4],
+        },
     ])
 def test_subtraction(input):
     params, lhs, rhs = input["params"], input["lhs"], input["rhs"]
@@ -86,3 +109,46 @@ def test_subtraction(input):
     cipher_result = eval.sub(lhs_cipher, rhs_cipher)
     decrypted = encryptor.decrypt(sk, cipher_result)
     assert decrypted == expected
+
+
+def test_subtraction_wraps_modulo_plaintext_modulus():
+    params = EncryptionParameters(
+        dimension=4,
+        ciphertext_modulus=1400472361734830353,
+        plaintext_modulus=12289,
+        noise_modulus=3,
+        seed=3
+    )
+    lhs, rhs = [1, 2, 3, 4], [4, 3, 2, 1]
+    expected = [(x - y) % params.plaintext_modulus for x, y in zip(lhs, rhs)]
+
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    eval = Evaluator(dist)
+    cipher_result = eval.sub(encryptor.encrypt(pk, lhs),
+                             encryptor.encrypt(pk, rhs))
+    assert encryptor.decrypt(sk, cipher_result) == expected
+
+
+def test_sub_plain():
+    params = EncryptionParameters(
+        dimension=4,
+        ciphertext_modulus=RnsBasis([1073741441, 1073740609]),
+        plaintext_modulus=127,
+        noise_modulus=3,
+        seed=0
+    )
+    lhs, rhs = [1, 2, 3, 4], [5, 6, 7, 1]
+    expected = [(x - y) % 127 for x, y in zip(lhs, rhs)]
+
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    encoder = PolynomialEncoder(dist)
+    encryptor = Encryptor(dist, encoder)
+    eval = Evaluator(dist)
+    cipher = encryptor.encrypt(pk, lhs)
+    assert encryptor.decrypt(sk, eval.sub_plain(cipher, rhs)) == expected
+    plaintext = Plaintext.encode(rhs, encoder)
+    assert encryptor.decrypt(sk, eval.sub_plain(cipher, plaintext)) == \
+        expected
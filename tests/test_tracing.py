@@ -0,0 +1,107 @@
+from venum import tracing
+from venum.glwe import EncryptionParameters, GlweDistribution
+from venum.encryption import Encryptor
+from venum.evaluation import Evaluator
+from venum.key import gen_key_pair
+from venum.logging import logger
+from venum.plaintext_encoding import PolynomialEncoder
+
+import logging
+import pytest
+
+
+@pytest.fixture
+def setup():
+    params = EncryptionParameters(
+        dimension=8,
+        ciphertext_modulus=1400472361734830353,
+        plaintext_modulus=12289,
+        noise_modulus=3,
+        seed=0
+    )
+    dist = GlweDistribution(params)
+    sk, pk = gen_key_pair(dist)
+    encryptor = Encryptor(dist, PolynomialEncoder(dist))
+    yield dist, sk, pk, encryptor
+    tracing.disable()
+
+
+def trace_records(caplog):
+    return [r for r in caplog.records if hasattr(r, 'trace')]
+
+
+def test_library_does_not_configure_logging():
+    assert any(isinstance(h, logging.NullHandler) for h in logger.handlers)
+    assert logger.level == logging.NOTSET
+
+
+def test_disabled_by_default(setup, caplog):
+    dist, sk, pk, encryptor = setup
+    caplog.set_level(logging.DEBUG)
+    cipher = encryptor.encrypt(pk, [1, 2])
+    Evaluator(dist).add(cipher, cipher)
+    assert trace_records(caplog) == []
+    assert not tracing.get_tracer('evaluation').enabled
+
+
+def test_enable_per_subsystem(setup, caplog):
+    dist, sk, pk, encryptor = setup
+    tracing.enable('evaluation')
+    ciphers = encryptor.encrypt_many(pk, [[1, 2], [3]])
+    Evaluator(dist).add(*ciphers)
+    Evaluator(dist).sum(ciphers, [2, 3])
+
+    records = trace_records(caplog)
+    assert {r.trace.subsystem for r in records} == {'evaluation'}
+    assert [r.trace.operation for r in records] == [
+        'evaluator', 'add', 'evaluator', 'sum']
+    add, total = records[1], records[3]
+    assert add.name == 'venum.evaluation'
+    assert add.funcName == 'add'
+    assert add.getMessage() == 'add lhs=Cipher rhs=Cipher'
+    assert total.trace.fields == {'count': 2, 'workers': None}
+    assert total.trace.duration >= 0
+    assert 'duration=' in total.getMessage()
+
+    tracing.disable('evaluation')
+    caplog.clear()
+    Evaluator(dist).add(*ciphers)
+    assert trace_records(caplog) == []
+
+
+def test_enable_all(setup, caplog):
+    dist, sk, pk, encryptor = setup
+    tracing.enable()
+    encryptor.encrypt_many(pk, [[1, 2]])
+    assert tracing.get_tracer('not-yet-created').enabled
+    operations = {(r.trace.subsystem, r.trace.operation)
+                  for r in trace_records(caplog)}
+    assert ('encryption', 'encrypt_many') in operations
+
+
+def test_events_do_not_format_coefficients(setup, caplog):
+    dist, sk, pk, encryptor = setup
+    tracing.enable('crt', 'keys')
+    gen_key_pair(dist)
+    dist.crt_encoder.decode(dist.plaintext_ring.from_coeffs([5, 6, 7]))
+    messages = [r.getMessage() for r in trace_records(caplog)]
+    assert 'secret_key secret=RingPoly(8,)' in messages
+    assert 'decode poly=RingPoly(8,)' in messages
+
+
+def test_enable_from_environment(monkeypatch):
+    monkeypatch.setenv(tracing.TRACE_ENV, 'rns, keystore')
+    tracing._enable_from_environment()
+    try:
+        assert tracing.get_tracer('rns').enabled
+        assert tracing.get_tracer('keystore').enabled
+        assert not tracing.get_tracer('evaluation').enabled
+    finally:
+        tracing.disable()
+
+
+def test_describe():
+    assert tracing.describe(3) == '3'
+    assert tracing.describe('a') == "'a'"
+    assert tracing.describe([1, 2]) == 'list[2]'
+    assert tracing.describe(object()) == 'object'
@@ -0,0 +1,288 @@
+from .encryption import Cipher, Decryptor, Encryptor
+from .evaluation import Evaluator
+from .key import PublicKey, SecretKey
+from .tracing import get_tracer
+
+import asyncio
+import threading
+from concurrent.futures import Executor
+from typing import Callable, Iterable, List, Sequence
+
+# Default maximum number of requests coalesced into one batched call.
+DEFAULT_MAX_BATCH_SIZE = 256
+
+# Default time in seconds a request may wait for others to join its batch.
+DEFAULT_MAX_LATENCY = 0.002
+
+_trace = get_tracer('aio')
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item requests into batched calls.
+
+    The first request of a batch starts a timer of `max_latency`
+    seconds. The batch is dispatched when the timer fires or as soon as
+    it holds `max_batch_size` requests, whichever comes first. `handler`
+    then runs on `executor` with the list of items, so the event loop is
+    never blocked, and must return one result per item; requests left
+    without a result raise a ValueError. If `handler` raises an
+    exception, the items of the batch are retried one by one, so that
+    an error is raised only to the request that caused it.
+
+    A batcher belongs to the event loop it is first used on.
+
+    Attributes:
+    - handler: the function computing a batch of results.
+    - max_batch_size: the maximum number of items per batch.
+    - max_latency: the maximum time in seconds a request waits before
+      its batch is dispatched.
+    - executor: the executor running `handler`. If None, the default
+      executor of the event loop is used.
+    """
+
+    def __init__(self, handler: Callable[[list], Sequence],
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_latency: float = DEFAULT_MAX_LATENCY,
+                 executor: Executor = None):
+        if max_batch_size < 1:
+            raise ValueError("Maximum batch size must be at least 1")
+        if max_latency < 0:
+            raise ValueError("Maximum latency must be non-negative")
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.executor = executor
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    def __repr__(self):
+        return (f"MicroBatcher(max_batch_size={self.max_batch_size}, "
+                f"max_latency={self.max_latency})")
+
+    async def submit(self, item):
+        """
+        Add an item to the current batch and wait for its result.
+        """
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_latency, self.flush)
+        return await future
+
+    def flush(self):
+        """
+        Dispatch the current batch without waiting for the timer.
+        """
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        # Keep a reference so that the task is not garbage collected.
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list):
+        loop = asyncio.get_running_loop()
+        try:
+            with _trace.span('batch', size=len(batch)):
+                results = list(await loop.run_in_executor(
+                    self.executor, self.handler,
+                    [item for item, _ in batch]))
+        except Exception as error:
+            if len(batch) > 1:
+                await asyncio.gather(*(self._run([entry])
+                                       for entry in batch))
+                return
+            _, future = batch[0]
+            if not future.done():
+                future.set_exception(error)
+            return
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if index < len(results):
+                future.set_result(results[index])
+            else:
+                future.set_exception(ValueError(
+                    f"Handler returned {len(results)} results for "
+                    f"{len(batch)} items"))
+
+
+class AsyncEncryptor:
+    """
+    An asyncio front for an `Encryptor`.
+
+    Concurrent `encrypt` calls are coalesced by a `MicroBatcher` into
+    one `Encryptor.encrypt_many` call, and concurrent `decrypt` calls
+    into one `Decryptor.decrypt_many` call, both run off the event loop.
+    Each batch draws from its own child of the encryptor's distribution
+    (see `GlweDistribution.spawn`), so batches can safely run on several
+    threads at once.
+
+    Attributes:
+    - encryptor: the wrapped Encryptor.
+    - public_key: the key used by `encrypt`.
+    - secret_key: the key used by `decrypt`, if any.
+    """
+
+    def __init__(self, encryptor: Encryptor, public_key: PublicKey,
+                 secret_key: SecretKey = None,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_latency: float = DEFAULT_MAX_LATENCY,
+                 executor: Executor = None):
+        """
+        Args:
+        - encryptor: the Encryptor performing the encryptions.
+        - public_key: the key used by `encrypt`.
+        - secret_key: the key used by `decrypt`, if any.
+        - max_batch_size, max_latency, executor: the batching settings,
+          see `MicroBatcher`.
+        """
+
+        self.encryptor = encryptor
+        self.public_key = public_key
+        self.secret_key = secret_key
+        self.executor = executor
+        self._spawn_lock = threading.Lock()
+        self._encrypt_batcher = MicroBatcher(
+            self._encrypt_batch, max_batch_size, max_latency, executor)
+        self._decrypt_batcher = MicroBatcher(
+            self._decrypt_batch, max_batch_size, max_latency, executor)
+
+    def __repr__(self):
+        return f"AsyncEncryptor({self.encryptor})"
+
+    def _encrypt_batch(self, messages: List[Iterable[int]]) -> List[Cipher]:
+        with self._spawn_lock:
+            dist, = self.encryptor.dist.spawn(1)
+        encryptor = Encryptor(dist, self.encryptor.plaintext_encoder,
+                              self.encryptor.metrics)
+        return encryptor.encrypt_many(self.public_key, messages)
+
+    def _decrypt_batch(self, ciphers: List[Cipher]) -> list:
+        decryptor = Decryptor(self.secret_key,
+                              self.encryptor.plaintext_encoder,
+                              self.encryptor.metrics)
+        return decryptor.decrypt_many(ciphers).tolist()
+
+    async def encrypt(self, message: Iterable[int]) -> Cipher:
+        """
+        Encrypts a message, batched with concurrent calls.
+        """
+
+        return await self._encrypt_batcher.submit(message)
+
+    async def encrypt_many(self, messages: Iterable[Iterable[int]]
+                           ) -> List[Cipher]:
+        """
+        Encrypts a batch of messages in a single call, off the event loop.
+        """
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, self._encrypt_batch, list(messages))
+
+    async def decrypt(self, cipher: Cipher) -> List[int]:
+        """
+        Decrypts a ciphertext, batched with concurrent calls.
+
+        Raises:
+        - ValueError: if no secret key was provided.
+        """
+
+        if self.secret_key is None:
+            raise ValueError("No secret key provided")
+        return await self._decrypt_batcher.submit(cipher)
+
+
+class AsyncEvaluator:
+    """
+    An asyncio front for an `Evaluator`.
+
+    Concurrent `add`, `sub` and `mul` calls are coalesced by one
+    `MicroBatcher` per operation: additions and subtractions of a batch
+    are computed by a single `Evaluator.add_many` or
+    `Evaluator.sub_many` call, multiplications share one trip to the
+    executor. All operations run off the event loop.
+
+    Attributes:
+    - evaluator: the wrapped Evaluator.
+    """
+
+    def __init__(self, evaluator: Evaluator,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_latency: float = DEFAULT_MAX_LATENCY,
+                 executor: Executor = None):
+        """
+        Args:
+        - evaluator: the Evaluator performing the operations.
+        - max_batch_size, max_latency, executor: the batching settings,
+          see `MicroBatcher`.
+        """
+
+        self.evaluator = evaluator
+        self.executor = executor
+        self._batchers = {
+            op: MicroBatcher(handler, max_batch_size, max_latency, executor)
+            for op, handler in (('add', self._add_batch),
+                                ('sub', self._sub_batch),
+                                ('mul', self._mul_batch))}
+
+    def __repr__(self):
+        return f"AsyncEvaluator({self.evaluator})"
+
+    def _add_batch(self, pairs: list) -> List[Cipher]:
+        return self.evaluator.add_many(*zip(*pairs))
+
+    def _sub_batch(self, pairs: list) -> List[Cipher]:
+        return self.evaluator.sub_many(*zip(*pairs))
+
+    def _mul_batch(self, pairs: list) -> List[Cipher]:
+        return [self.evaluator.mul(lhs, rhs) for lhs, rhs in pairs]
+
+    async def add(self, lhs: Cipher, rhs: Cipher) -> Cipher:
+        """
+        Adds two ciphertexts, batched with concurrent calls.
+        """
+
+        return await self._batchers['add'].submit((lhs, rhs))
+
+    async def sub(self, lhs: Cipher, rhs: Cipher) -> Cipher:
+        """
+        Subtracts two ciphertexts, batched with concurrent calls.
+        """
+
+        return await self._batchers['sub'].submit((lhs, rhs))
+
+    async def mul(self, lhs: Cipher, rhs: Cipher) -> Cipher:
+        """
+        Multiplies two ciphertexts, batched with concurrent calls.
+
+        Raises:
+        - ValueError: if the evaluator has no relinearization key.
+        """
+
+        if self.evaluator.relin_key is None:
+            raise ValueError("No relinearization key provided")
+        return await self._batchers['mul'].submit((lhs, rhs))
+
+    async def sum(self, ciphers: Iterable[Cipher],
+                  weights: Iterable[int] = None) -> Cipher:
+        """
+        Sums many ciphertexts in a single call off the event loop, see
+        `Evaluator.sum`.
+        """
+
+        ciphers = list(ciphers)
+        weights = None if weights is None else list(weights)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.evaluator.sum, ciphers, weights)
@@ -1,8 +1,11 @@
-from .rns import Rns
-from .logging import logger
+from .metrics import measure
+from .rns import Rns, RnsArray
+from .tracing import get_tracer
+from .ring import PolyRing, RingPoly
 
-from sympy import Poly
-from sympy.abc import x
+import numpy as np
+
+_trace = get_tracer('crt')
 
 
 class CrtEncoder:
@@ -21,30 +24,72 @@ class CrtEncoder:
             raise ValueError("CRT encoding requires two moduli")
         self.basis = basis
         self.plaintext_ring = plaintext_ring
+        self.modulus = basis.modulus
+        # Encoded polynomials keep both residues, so they live modulo
+        # p0 * p1 rather than in the plaintext ring.
+        self.ring = PolyRing(plaintext_ring.dimension, self.modulus)
+
+    def encode_coeffs(self, message: np.ndarray,
+                      noise: np.ndarray) -> np.ndarray:
+        """
+        CRT-encode arrays of message and noise coefficients in one pass.
+
+        Args:
+        - message: integer coefficients, taken modulo the first modulus
+        - noise: integer coefficients, taken modulo the second modulus
+
+        Returns:
+        - an array with the encoded coefficients in [0, p0 * p1)
+        """
+
+        p0, p1 = self.basis.moduli
+        with measure('crt_encode', np.size(message)):
+            residues = [np.asarray(message) % p0, np.asarray(noise) % p1]
+            return RnsArray(self.basis, residues).to_int()
+
+    def decode_coeffs(self, values: np.ndarray) -> np.ndarray:
+        """
+        Split an array of CRT-encoded coefficients into its residues.
 
-    def _encode_coef(self, message, noise):
-        return Rns(self.basis, [message, noise]).to_int()
-
-    def _decode_coef(self, value):
-        return self.basis.to_rns(value)
-
-    def _normalized_coeffs(self, message: Poly, noise: Poly):
-        message_coeffs = (message.all_coeffs()
-                          if not message.is_zero
-                          else [0] * len(noise.coeffs()))
-        noise_coeffs = (noise.all_coeffs()
-                        if not noise.is_zero
-                        else [0] * len(message.coeffs()))
-        diff_len = len(message_coeffs) - len(noise_coeffs)
-        if diff_len > 0:
-            noise_coeffs += [0] * diff_len
-        elif diff_len < 0:
-            message_coeffs += [0] * -diff_len
-        logger.debug(f'message_coeffs: {message_coeffs}')
-        logger.debug(f'noise_coeffs: {noise_coeffs}')
-        return zip(message_coeffs, noise_coeffs)
-
-    def encode(self, message: Poly, noise: Poly):
+        Args:
+        - values: integer coefficients
+
+        Returns:
+        - a (2, n) array with the message residues in the first row and
+          the noise residues in the second row
+        """
+
+        with measure('crt_decode', np.size(values)):
+            return self.basis.to_rns_array(values).residues
+
+    def decode_message(self, values: np.ndarray,
+                       ciphertext_modulus: int) -> np.ndarray:
+        """
+        Recover the message residues from decrypted coefficients modulo the
+        ciphertext modulus, i.e. the coefficients of body + mask * secret.
+
+        The coefficients are shifted by a multiple of p0 * p1 close to
+        q / 2 so that small negative values are lifted correctly, and are
+        then reduced modulo the message modulus.
+
+        Args:
+        - values: integer coefficients in [0, ciphertext_modulus)
+        - ciphertext_modulus: the ciphertext modulus q
+
+        Returns:
+        - the message coefficients in [0, p0)
+        """
+
+        q = ciphertext_modulus
+        p0 = self.basis.moduli[0]
+        shift = (q // (2 * self.modulus)) * self.modulus
+        values = np.asarray(values)
+        with measure('crt_decode', values.size):
+            if values.dtype != object and q + shift >= 2 ** 63:
+                values = values.astype(object)
+            return ((values + shift) % q) % p0
+
+    def encode(self, message: RingPoly, noise: RingPoly):
         """
         Encode a message and noise polynomial into a single polynomial
         using the CRT encoding.
@@ -54,17 +99,16 @@ class CrtEncoder:
         - noise: the noise polynomial
 
         Returns:
-        - a CRT-encoded polynomial
+        - a CRT-encoded polynomial, with coefficients in [0, p0 * p1)
         """
 
-        logger.debug(f'CRT encoding message: {message} with noise: {noise}')
-        msg_noise_pairs = self._normalized_coeffs(message, noise)
-        coefs = (self._encode_coef(msg_coef, noise_coef)
-                 for (msg_coef, noise_coef) in msg_noise_pairs)
-        return Poly(coefs, x, domain=self.plaintext_ring)
+        if _trace.enabled:
+            _trace.event('encode', message=message, noise=noise)
+        coefs = self.encode_coeffs(message.lift(), noise.lift())
+        return self.ring.from_coeffs(coefs)
 
-    def _encode_with_zero(self, poly: Poly, component: int):
-        zero = Poly(0, x, domain=self.plaintext_ring)
+    def _encode_with_zero(self, poly: RingPoly, component: int):
+        zero = self.plaintext_ring.zero()
         if component == 0:
             return self.encode(poly, zero)
         elif component == 1:
@@ -72,7 +116,7 @@ class CrtEncoder:
         else:
             raise ValueError("component must be 0 or 1")
 
-    def encode_pure_message(self, message: Poly):
+    def encode_pure_message(self, message: RingPoly):
         """
         Encode a message polynomial with zero noise.
 
@@ -85,7 +129,7 @@ class CrtEncoder:
 
         return self._encode_with_zero(message, 0)
 
-    def encode_pure_noise(self, noise: Poly):
+    def encode_pure_noise(self, noise: RingPoly):
         """
         Encode a noise polynomial with zero message.
 
@@ -98,11 +142,13 @@ class CrtEncoder:
 
         return self._encode_with_zero(noise, 1)
 
-    def decode(self, poly: Poly):
+    def decode(self, poly: RingPoly):
         """
         Decode a CRT-encoded polynomial into its message and noise components.
         """
 
-        logger.debug(f'CRT decoding polynomial: {poly}')
-        return [self._decode_coef(coeff)
-                for coeff in poly.coeffs()]
+        if _trace.enabled:
+            _trace.event('decode', poly=poly)
+        residues = self.decode_coeffs(poly.lift())
+        return [Rns(self.basis, [int(r) for r in coef])
+                for coef in residues.T]
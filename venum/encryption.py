@@ -1,12 +1,16 @@
-from .logging import logger
-from .glwe import GlweSample, GlweDistribution
+from .glwe import GlweSample, GlweDistribution, SeededGlweSample
 from .key import SecretKey, PublicKey, RelinKey
-from .numeric import radix_decompose_poly
+from .metrics import Metrics, measure, metered
+from .numeric import radix_decompose
+from .ring import RingPoly
+from .serialization import KIND_CIPHER, KIND_CIPHERS, Reader, Writer
+from .tracing import get_tracer
 
-from sympy import Poly
-from sympy.abc import x
+import numpy as np
 
-from typing import Iterable
+from typing import Iterable, List
+
+_trace = get_tracer('encryption')
 
 
 class Cipher:
@@ -24,13 +28,93 @@ class Cipher:
         return f'Cipher(mask={self.glwe_sample.mask}, '
         f'body={self.glwe_sample.body})'
 
+    def to_bytes(self, params) -> bytes:
+        """
+        Serialize the ciphertext, see `venum.serialization`.
+
+        Args:
+        - params: the EncryptionParameters the ciphertext was created
+          with, whose fingerprint is stored in the header.
+
+        Returns:
+        - the serialized ciphertext.
+        """
+
+        writer = Writer()
+        writer.write_header(KIND_CIPHER, params.fingerprint())
+        self.glwe_sample.write_to(writer)
+        return writer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data, dist: GlweDistribution) -> 'Cipher':
+        """
+        Deserialize a ciphertext written by `to_bytes`. Word-sized
+        coefficients are not copied but viewed in `data`.
+
+        Args:
+        - data: a bytes-like object, e.g. bytes or a memoryview.
+        - dist: the GlweDistribution of the parameters the ciphertext
+          was created with.
+
+        Returns:
+        - the ciphertext.
+
+        Raises:
+        - ValueError: if the data is malformed or was serialized with
+          different parameters.
+        """
+
+        reader = Reader(data)
+        reader.read_header(KIND_CIPHER, dist.params.fingerprint())
+        cipher = cls(GlweSample.read_from(reader, dist.cipher_ring))
+        reader.ensure_consumed()
+        return cipher
+
+    @staticmethod
+    def dump_many(ciphers: Iterable['Cipher'], params) -> bytes:
+        """
+        Serialize many ciphertexts into a single buffer with one header.
+
+        Args:
+        - ciphers: the ciphertexts.
+        - params: the EncryptionParameters the ciphertexts were created
+          with.
+
+        Returns:
+        - the serialized ciphertexts.
+        """
+
+        ciphers = list(ciphers)
+        writer = Writer()
+        writer.write_header(KIND_CIPHERS, params.fingerprint())
+        writer.pack('Q', len(ciphers))
+        for cipher in ciphers:
+            cipher.glwe_sample.write_to(writer)
+        return writer.getvalue()
+
+    @classmethod
+    def load_many(cls, data, dist: GlweDistribution) -> List['Cipher']:
+        """
+        Deserialize ciphertexts written by `dump_many`, viewing
+        word-sized coefficients in `data` like `from_bytes`.
+        """
+
+        reader = Reader(data)
+        reader.read_header(KIND_CIPHERS, dist.params.fingerprint())
+        count, = reader.unpack('Q')
+        ciphers = [cls(GlweSample.read_from(reader, dist.cipher_ring))
+                   for _ in range(count)]
+        reader.ensure_consumed()
+        return ciphers
+
 
 class Encryptor:
     """
     A class for handling encryption and decryption of messages.
     """
 
-    def __init__(self, dist: GlweDistribution, plaintext_encoder):
+    def __init__(self, dist: GlweDistribution, plaintext_encoder,
+                 metrics: Metrics = None):
         """
         Initializes an Encryptor object.
 
@@ -39,15 +123,19 @@ class Encryptor:
           used for encryption.
         - plaintext_encoder: An object that encodes and decodes messages
           according to the `venum.plaintext_encoding.Encoder` interface.
+        - metrics: the Metrics recording the operations of this
+          encryptor, if any, see `venum.metrics`.
         """
 
         self._dist = dist
         self.plaintext_encoder = plaintext_encoder
+        self.metrics = metrics
 
     @property
     def dist(self):
         return self._dist
 
+    @metered('encrypt')
     def encrypt(self, pk: PublicKey, message: Iterable[int],
                 plaintext_encoder=None) -> Cipher:
         """
@@ -64,35 +152,86 @@ class Encryptor:
         - A Cipher object representing the encrypted message.
         """
 
-        logger.debug(f'Encrypting message: {message}')
+        return self._encrypt_many(pk, [message], plaintext_encoder)[0]
+
+    @metered('encrypt_many')
+    def encrypt_many(self, pk: PublicKey, messages: Iterable[Iterable[int]],
+                     plaintext_encoder=None) -> List[Cipher]:
+        """
+        Encrypts a batch of messages.
+
+        The randomness of the whole batch is sampled at once, and both
+        public key polynomials are multiplied by every u in a single
+        vectorized product against the cached precomputed form of the
+        public key.
+
+        Args:
+        - pk: A PublicKey object representing the public key.
+        - messages: An iterable of messages, each an iterable of integers.
+        - plaintext_encoder: An object that encodes and decodes messages
+          according to the `venum.plaintext_encoding.Encoder` interface.
+          If None, the default encoder is used.
+
+        Returns:
+        - A list of Cipher objects, one per message.
+        """
+
+        return self._encrypt_many(pk, messages, plaintext_encoder)
 
+    def _encrypt_many(self, pk: PublicKey,
+                      messages: Iterable[Iterable[int]],
+                      plaintext_encoder=None) -> List[Cipher]:
         plaintext_encoder = plaintext_encoder or self.plaintext_encoder
+        encoded = [plaintext_encoder.encode(message).coeffs
+                   for message in messages]
+        if not encoded:
+            return []
+        batch = len(encoded)
+        encoded = np.stack(encoded)
+
+        dist = self.dist
+        ring = dist.cipher_ring
+        with _trace.span('encrypt_many', batch=batch):
+            crt_messages = dist.encode_crt_message_array(encoded)
+            crt_noises = dist.sample_crt_noise_array(
+                batch=2 * batch).reshape(batch, 2, -1)
+            u = dist.sample_uniform_array(modulus=2, batch=batch)
+
+            products = ring.multiply_prepared(pk.precomputed(),
+                                              ring.embed(u)[:, np.newaxis])
+            crt_noises[:, 1] += crt_messages
+            samples = ring.reduce(products + ring.embed(crt_noises))
+        return [Cipher(GlweSample(mask=RingPoly(ring, mask),
+                                  body=RingPoly(ring, body)))
+                for mask, body in samples]
+
+    @metered('encrypt_symmetric')
+    def encrypt_symmetric(self, sk: SecretKey, message: Iterable[int],
+                          plaintext_encoder=None) -> Cipher:
+        """
+        Encrypts a message with the secret key. The mask of the resulting
+        ciphertext is seeded, so it is about half the size of a
+        ciphertext produced by `encrypt` until it is operated on.
 
+        Args:
+        - sk: A SecretKey object representing the secret key.
+        - message: An iterable of integers representing the message.
+        - plaintext_encoder: An object that encodes and decodes messages
+          according to the `venum.plaintext_encoding.Encoder` interface.
+          If None, the default encoder is used.
+
+        Returns:
+        - A Cipher object representing the encrypted message.
+        """
+
+        plaintext_encoder = plaintext_encoder or self.plaintext_encoder
         message = plaintext_encoder.encode(message)
-        logger.debug(f'encoded message: {message}')
-
-        crt_message = self.dist.crt_encoder.encode_pure_message(
-            message).set_domain(self.dist.cipher_ring)
-        logger.debug(f'crt_message: {crt_message}')
-
-        crt_noise1 = (self.dist.sample_crt_noise()
-                      .set_domain(self.dist.cipher_ring))
-        crt_noise2 = (self.dist.sample_crt_noise()
-                      .set_domain(self.dist.cipher_ring))
-
-        u = self.dist.sample_polynomial(modulus=2)
-        logger.debug(f'sampled u: {u}')
-
-        logger.debug(f"using public key: {pk.glwe_sample}")
-        sample = GlweSample.compute_sample(
-            mask=pk.glwe_sample.mask,
-            mask_noise=crt_noise2,
-            body=pk.glwe_sample.body,
-            body_noise=crt_noise1,
-            message=crt_message,
-            u=u,
-            poly_modulus=self.dist.poly_modulus,
-        )
+        crt_message = self.dist.encode_crt_message(message)
+        crt_noise = self.dist.cipher_ring.from_coeffs(
+            self.dist.sample_crt_noise_array())
+        sample = SeededGlweSample._compute_seeded_sample(
+            self.dist.sample_seed(), sk.secret_poly,
+            crt_message + crt_noise)
         return Cipher(sample)
 
     def decrypt(self, sk: SecretKey, cipher: Cipher) -> Iterable[int]:
@@ -107,21 +246,88 @@ class Encryptor:
         - An iterable of integers representing the decrypted message.
         """
 
-        logger.debug(f"{cipher}")
-        cipher_mask = cipher.glwe_sample.mask
-        cipher_body = cipher.glwe_sample.body
+        return Decryptor(sk, self.plaintext_encoder,
+                         self.metrics).decrypt(cipher)
+
+    def decrypt_many(self, sk: SecretKey,
+                     ciphers: Iterable[Cipher]) -> np.ndarray:
+        """
+        Decrypts a batch of ciphertexts, see `Decryptor.decrypt_many`.
+        """
+
+        return Decryptor(sk, self.plaintext_encoder,
+                         self.metrics).decrypt_many(ciphers)
+
+
+class Decryptor:
+    """
+    Decrypts ciphertexts with a fixed secret key.
+
+    The product with the secret key is computed against its cached
+    precomputed form (see `SecretKey.precomputed`), for a whole batch of
+    ciphertexts at once.
+
+    Attributes:
+    - sk: the secret key.
+    - plaintext_encoder: An object that encodes and decodes messages
+      according to the `venum.plaintext_encoding.Encoder` interface.
+    - metrics: the Metrics recording the operations of this decryptor,
+      if any, see `venum.metrics`.
+    """
+
+    def __init__(self, sk: SecretKey, plaintext_encoder,
+                 metrics: Metrics = None):
+        self.sk = sk
+        self.plaintext_encoder = plaintext_encoder
+        self.metrics = metrics
+
+    def _message_coeffs(self, ciphers: List[Cipher]) -> np.ndarray:
+        dist = self.sk.dist
+        ring = self.sk.secret_poly.ring
+        masks = np.stack([c.glwe_sample.mask.coeffs for c in ciphers])
+        bodies = np.stack([c.glwe_sample.body.coeffs for c in ciphers])
+        with _trace.span('decrypt_many', batch=len(ciphers)):
+            crt_messages = ring.reduce(
+                bodies + ring.multiply_prepared(self.sk.precomputed(),
+                                                masks))
+            message_coeffs = dist.crt_encoder.decode_message(
+                ring.lift(crt_messages), dist.params.ciphertext_modulus)
+        return message_coeffs.astype(dist.plaintext_ring.dtype)
+
+    @metered('decrypt')
+    def decrypt(self, cipher: Cipher) -> Iterable[int]:
+        """
+        Decrypts a ciphertext.
+
+        Args:
+        - cipher: A Cipher object representing the ciphertext.
+
+        Returns:
+        - An iterable of integers representing the decrypted message.
+        """
+
+        message_coeffs = self._message_coeffs([cipher])[0]
+        return self.plaintext_encoder.decode_coeffs(message_coeffs)
+
+    @metered('decrypt_many')
+    def decrypt_many(self, ciphers: Iterable[Cipher]) -> np.ndarray:
+        """
+        Decrypts a batch of ciphertexts.
 
-        crt_message = (cipher_body + cipher_mask * sk.secret_poly)
-        crt_message = crt_message % self.dist.poly_modulus
-        logger.debug(f"{crt_message}")
-        noisy_message = self.dist.crt_encoder.decode(crt_message)
-        logger.debug(f"{noisy_message}")
+        Args:
+        - ciphers: the ciphertexts, all under the secret key.
 
-        message_poly = Poly.from_list([rns[0] for rns in noisy_message],
-                                      x, domain=self.dist.plaintext_ring)
+        Returns:
+        - A 2-D integer array with one decrypted message per row, as
+          decoded by `Encoder.decode_many`.
+        """
 
-        logger.debug(f"{message_poly}")
-        return self.plaintext_encoder.decode(message_poly)
+        ciphers = list(ciphers)
+        if not ciphers:
+            dimension = self.sk.dist.params.dimension
+            return np.zeros((0, dimension), dtype=np.int64)
+        return self.plaintext_encoder.decode_many(
+            self._message_coeffs(ciphers))
 
 
 class Rank2Cipher:
@@ -131,45 +337,40 @@ class Rank2Cipher:
     during homomorphic multiplication.
 
     Attributes:
-    - constant: A Poly object representing the constant term over the secret.
-    - linear: A Poly object representing the linear term over the secret.
-    - quadratic: A Poly object representing the quadratic term over the secret.
+    - constant: A RingPoly representing the constant term over the secret.
+    - linear: A RingPoly representing the linear term over the secret.
+    - quadratic: A RingPoly representing the quadratic term over the secret.
     """
 
-    def __init__(self, constant: Poly, linear: Poly, quadratic: Poly):
+    def __init__(self, constant: RingPoly, linear: RingPoly,
+                 quadratic: RingPoly):
         self.constant = constant
         self.linear = linear
         self.quadratic = quadratic
 
-    def relinearize(self, relin_key: RelinKey, poly_modulus) -> Cipher:
+    def relinearize(self, relin_key: RelinKey) -> Cipher:
         """
         Relinearizes the rank-2 ciphertext into a normalized Cipher.
 
+        The quadratic term is decomposed into its digits in the key base
+        in one vectorized pass, and the dot product of the digits with
+        the auxiliary keys is accumulated before a single reduction, see
+        `RelinKey.key_switch`.
+
         Args:
         - relin_key: A RelinKey object representing the relinearization key.
-        - poly_modulus: A Poly object representing the polynomial modulus.
 
         Returns:
         - A Cipher object representing the relinearized ciphertext.
         """
 
-        cipher_ring = poly_modulus.domain
-        quad_decomposed = radix_decompose_poly(
-            poly=self.quadratic,
-            radix=relin_key.base,
-            num_components=relin_key.digit_count(),
-            domain=cipher_ring
-        )
-        mask = Poly([0], x, domain=cipher_ring)
-        body = Poly([0], x, domain=cipher_ring)
-        for aux_key, component in zip(relin_key.aux_keys,
-                                      quad_decomposed):
-            mask += aux_key.mask * component
-            mask = mask % poly_modulus
-            body += aux_key.body * component
-            body = body % poly_modulus
-        mask += self.linear
-        body += self.constant
-        mask = mask % poly_modulus
-        body = body % poly_modulus
+        ring = self.quadratic.ring
+        digit_count = relin_key.digit_count()
+        with _trace.span('relinearize', digits=digit_count), \
+                measure('relinearize', digit_count):
+            digits = radix_decompose(self.quadratic.lift(), relin_key.base,
+                                     digit_count)
+            switched = relin_key.key_switch(ring, ring.embed(digits))
+        mask = self.linear + RingPoly(ring, switched[0])
+        body = self.constant + RingPoly(ring, switched[1])
         return Cipher(GlweSample(mask=mask, body=body))
@@ -1,7 +1,21 @@
-from .logging import logger
 from .glwe import GlweDistribution, GlweSample
 from .key import RelinKey
 from .encryption import Cipher, Rank2Cipher
+from .metrics import Metrics, activate, active_metrics, metered
+from .plaintext_encoding import Plaintext, PolynomialEncoder
+from .ring import RingPoly, RnsPolyRing
+from .tracing import get_tracer
+
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Union
+
+# Maximum number of ciphertexts stacked at once by `Evaluator.sum`, which
+# bounds its temporary memory.
+SUM_CHUNK_SIZE = 1024
+
+_trace = get_tracer('evaluation')
 
 
 class Evaluator:
@@ -12,17 +26,26 @@ class Evaluator:
     - dist: GlweDistribution, the distribution used for encryption
     - relin_key: RelinKey, the relinearization key used for homomorphic
       multiplication. If not provided, multiplication will raise an error.
+    - plaintext_encoder: the encoder of the raw messages passed to
+      plaintext operations. Defaults to a `PolynomialEncoder`.
+    - metrics: the Metrics recording the operations of this evaluator, if
+      any, see `venum.metrics`.
     """
 
-    def __init__(self, dist: GlweDistribution, relin_key: RelinKey = None):
-        logger.debug(f"Initializing Evaluator with {dist} and {relin_key}")
+    def __init__(self, dist: GlweDistribution, relin_key: RelinKey = None,
+                 plaintext_encoder=None, metrics: Metrics = None):
+        if _trace.enabled:
+            _trace.event('evaluator', relin_key=relin_key)
         self._dist = dist
         self.relin_key = relin_key
+        self.plaintext_encoder = plaintext_encoder or PolynomialEncoder(dist)
+        self.metrics = metrics
 
     @property
     def dist(self):
         return self._dist
 
+    @metered('add')
     def add(self, lhs: Cipher, rhs: Cipher):
         """
         Add two ciphertexts together.
@@ -35,11 +58,13 @@ class Evaluator:
         - Cipher, the sum of the two ciphertexts
         """
 
-        logger.debug(f"Adding {lhs} and {rhs}")
+        if _trace.enabled:
+            _trace.event('add', lhs=lhs, rhs=rhs)
         mask = lhs.glwe_sample.mask + rhs.glwe_sample.mask
         body = lhs.glwe_sample.body + rhs.glwe_sample.body
         return Cipher(GlweSample(mask=mask, body=body))
 
+    @metered('sub')
     def sub(self, lhs: Cipher, rhs: Cipher):
         """
         Subtract one ciphertext from another.
@@ -52,45 +77,290 @@ class Evaluator:
         - Cipher, the difference of the two ciphertexts
         """
 
-        logger.debug(f"Subtracting {lhs} and {rhs}")
+        if _trace.enabled:
+            _trace.event('sub', lhs=lhs, rhs=rhs)
         mask = lhs.glwe_sample.mask - rhs.glwe_sample.mask
         body = lhs.glwe_sample.body - rhs.glwe_sample.body
         return Cipher(GlweSample(mask=mask, body=body))
 
-    def _compute_rank2_product(self, lhs: GlweSample,
-                               rhs: GlweSample) -> Rank2Cipher:
-        logger.debug(f"Computing rank 2 product of {lhs} and {rhs}")
-        constant = lhs.body * rhs.body
-        constant = constant % self.dist.poly_modulus
+    def _combine_many(self, lhs: Iterable[Cipher], rhs: Iterable[Cipher],
+                      sign: int) -> List[Cipher]:
+        lhs, rhs = list(lhs), list(rhs)
+        if len(lhs) != len(rhs):
+            raise ValueError("Batches must have the same length")
+        if _trace.enabled:
+            _trace.event('add_many' if sign > 0 else 'sub_many',
+                         batch=len(lhs))
+        if not lhs:
+            return []
+        ring = self.dist.cipher_ring
+        lhs_samples, rhs_samples = (
+            np.stack([(c.glwe_sample.mask.coeffs, c.glwe_sample.body.coeffs)
+                      for c in ciphers])
+            for ciphers in (lhs, rhs))
+        samples = ring.reduce(lhs_samples + sign * rhs_samples)
+        return [Cipher(GlweSample(mask=RingPoly(ring, mask),
+                                  body=RingPoly(ring, body)))
+                for mask, body in samples]
+
+    @metered('add_many')
+    def add_many(self, lhs: Iterable[Cipher],
+                 rhs: Iterable[Cipher]) -> List[Cipher]:
+        """
+        Add two batches of ciphertexts pairwise, with a single vectorized
+        reduction for the whole batch.
 
-        linear = lhs.body * rhs.mask + lhs.mask * rhs.body
-        linear = linear % self.dist.poly_modulus
+        Args:
+        - lhs: the left-hand sides of the additions
+        - rhs: the right-hand sides of the additions
 
-        quadratic = lhs.mask * rhs.mask
-        quadratic = quadratic % self.dist.poly_modulus
+        Returns:
+        - List[Cipher], the sums
+
+        Raises:
+        - ValueError: if the batches have different lengths.
+        """
+
+        return self._combine_many(lhs, rhs, 1)
+
+    @metered('sub_many')
+    def sub_many(self, lhs: Iterable[Cipher],
+                 rhs: Iterable[Cipher]) -> List[Cipher]:
+        """
+        Subtract two batches of ciphertexts pairwise, with a single
+        vectorized reduction for the whole batch.
+
+        Args:
+        - lhs: the left-hand sides of the subtractions
+        - rhs: the right-hand sides of the subtractions
+
+        Returns:
+        - List[Cipher], the differences
+
+        Raises:
+        - ValueError: if the batches have different lengths.
+        """
 
-        return Rank2Cipher(constant, linear, quadratic)
+        return self._combine_many(lhs, rhs, -1)
 
+    @metered('sum')
+    def sum(self, ciphers: Iterable[Cipher],
+            weights: Iterable[int] = None, workers: int = None) -> Cipher:
+        """
+        Sum many ciphertexts, optionally weighted by integers.
+
+        Masks and bodies are accumulated in chunks without reduction and
+        reduced modulo q once per chunk, the chunk size being the largest
+        for which the unreduced sums cannot overflow. The noise of the
+        result grows with the sum of the absolute weights.
+
+        Args:
+        - ciphers: the ciphertexts to sum.
+        - weights: an integer weight per ciphertext. If None, all weights
+          are 1.
+        - workers: the number of threads summing disjoint parts of the
+          input. If None, the sum runs in the calling thread.
+
+        Returns:
+        - Cipher, an encryption of the (weighted) sum of the messages. The
+          sum of no ciphertexts is a trivial encryption of zero.
+
+        Raises:
+        - ValueError: if the number of weights does not match.
+        """
+
+        ciphers = list(ciphers)
+        if weights is not None:
+            weights = [int(w) for w in weights]
+            if len(weights) != len(ciphers):
+                raise ValueError("Number of weights must match number of "
+                                 "ciphertexts")
+        ring = self.dist.cipher_ring
+        with _trace.span('sum', count=len(ciphers), workers=workers):
+            total = self._sum(ciphers, weights, workers)
+        return Cipher(GlweSample(mask=RingPoly(ring, total[0]),
+                                 body=RingPoly(ring, total[1])))
+
+    def _sum(self, ciphers: List[Cipher], weights: List[int],
+             workers: int) -> np.ndarray:
+        if not workers or workers <= 1 or len(ciphers) < 2:
+            return self._accumulate(ciphers, weights)
+        ring = self.dist.cipher_ring
+        bounds = np.linspace(0, len(ciphers), workers + 1).astype(int)
+        parts = [(ciphers[a:b], weights and weights[a:b])
+                 for a, b in zip(bounds, bounds[1:]) if b > a]
+        metrics = active_metrics()
+
+        def accumulate(part):
+            with activate(metrics):
+                return self._accumulate(*part)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(accumulate, parts))
+        total = partials[0]
+        for partial in partials[1:]:
+            total = ring.reduce(total + partial)
+        return total
+
+    def _accumulate(self, ciphers: List[Cipher],
+                    weights: List[int] = None) -> np.ndarray:
+        ring = self.dist.cipher_ring
+        moduli = (ring.basis.moduli if isinstance(ring, RnsPolyRing)
+                  else [ring.modulus])
+        largest = max(moduli) - 1
+        weight = max((abs(w) for w in weights), default=0) if weights else 1
+        dtype = ring.dtype
+        chunk = SUM_CHUNK_SIZE
+        if dtype is not object and weight:
+            # The reduced accumulator plus a chunk of terms of absolute
+            # value at most weight * largest must fit in an int64.
+            chunk = min(chunk, (2 ** 63 - 1 - largest) // (weight * largest))
+            if chunk < 1:
+                dtype, chunk = object, SUM_CHUNK_SIZE
+        total = np.zeros((2,) + ring.shape, dtype=ring.dtype)
+        for start in range(0, len(ciphers), chunk):
+            block = np.stack([
+                (c.glwe_sample.mask.coeffs, c.glwe_sample.body.coeffs)
+                for c in ciphers[start:start + chunk]])
+            block = block.astype(dtype, copy=False)
+            if weights is None:
+                block = block.sum(axis=0)
+            else:
+                block = np.tensordot(
+                    np.array(weights[start:start + chunk], dtype=dtype),
+                    block, axes=1)
+            total = ring.reduce(total + block)
+        return total
+
+    def _plaintext(self, plain: Union[Plaintext, Iterable[int]]):
+        if isinstance(plain, Plaintext):
+            return plain
+        return Plaintext.encode(plain, self.plaintext_encoder)
+
+    @metered('add_plain')
+    def add_plain(self, cipher: Cipher,
+                  plain: Union[Plaintext, Iterable[int]]):
+        """
+        Add a plaintext to a ciphertext, without encrypting it.
+
+        Args:
+        - cipher: Cipher, the ciphertext
+        - plain: Plaintext or raw message, encoded with the evaluator's
+          plaintext encoder
+
+        Returns:
+        - Cipher, an encryption of the sum, with the noise of `cipher`
+        """
+
+        crt_message = self._plaintext(plain).crt_message()
+        return Cipher(GlweSample(mask=cipher.glwe_sample.mask,
+                                 body=cipher.glwe_sample.body + crt_message))
+
+    @metered('sub_plain')
+    def sub_plain(self, cipher: Cipher,
+                  plain: Union[Plaintext, Iterable[int]]):
+        """
+        Subtract a plaintext from a ciphertext, without encrypting it.
+
+        Args:
+        - cipher: Cipher, the ciphertext
+        - plain: Plaintext or raw message, encoded with the evaluator's
+          plaintext encoder
+
+        Returns:
+        - Cipher, an encryption of the difference
+        """
+
+        crt_message = self._plaintext(plain).crt_message()
+        return Cipher(GlweSample(mask=cipher.glwe_sample.mask,
+                                 body=cipher.glwe_sample.body - crt_message))
+
+    @metered('mul_plain')
+    def mul_plain(self, cipher: Cipher,
+                  plain: Union[Plaintext, Iterable[int], int]):
+        """
+        Multiply a ciphertext by a plaintext, without encrypting it or
+        relinearizing.
+
+        An integer scales every coefficient (or slot) of the message; it is
+        cheaper than an equivalent encoded plaintext. Both are applied with
+        coefficients centered around zero, so the noise grows by at most
+        n * t / 2 for a plaintext and |scalar| for an integer.
+
+        Args:
+        - cipher: Cipher, the ciphertext
+        - plain: Plaintext, raw message or integer scalar
+
+        Returns:
+        - Cipher, an encryption of the product
+        """
+
+        mask, body = cipher.glwe_sample.mask, cipher.glwe_sample.body
+        if isinstance(plain, (int, np.integer)):
+            modulus = self.dist.params.plaintext_modulus
+            scalar = int(plain) % modulus
+            if scalar > modulus // 2:
+                scalar -= modulus
+            return Cipher(GlweSample(mask=mask * scalar, body=body * scalar))
+        plaintext = self._plaintext(plain)
+        ring = mask.ring
+        products = ring.multiply_prepared(
+            plaintext.precomputed(), np.stack([mask.coeffs, body.coeffs]))
+        return Cipher(GlweSample(mask=RingPoly(ring, products[0]),
+                                 body=RingPoly(ring, products[1])))
+
+    def mul_no_relin(self, lhs: Cipher, rhs: Cipher) -> Rank2Cipher:
+        """
+        Multiply two ciphertexts together without relinearizing the
+        product, e.g. to add several products before a single
+        relinearization.
+
+        Args:
+        - lhs: Cipher, the left-hand side of the multiplication
+        - rhs: Cipher, the right-hand side of the multiplication
+
+        Returns:
+        - Rank2Cipher, the product of the two ciphertexts, see
+          `Rank2Cipher.relinearize`.
+        """
+
+        # Karatsuba: the linear term is (b1 + a1)(b2 + a2) - b1 b2 - a1 a2,
+        # so the three products are computed in one batched multiplication.
+        lhs, rhs = lhs.glwe_sample, rhs.glwe_sample
+        ring = lhs.body.ring
+        lhs_terms, rhs_terms = (
+            np.stack([s.body.coeffs, s.mask.coeffs,
+                      ring.reduce(s.body.coeffs + s.mask.coeffs)])
+            for s in (lhs, rhs))
+        constant, quadratic, cross = ring.multiply(lhs_terms, rhs_terms)
+        linear = ring.reduce(cross - constant - quadratic)
+
+        return Rank2Cipher(RingPoly(ring, constant), RingPoly(ring, linear),
+                           RingPoly(ring, quadratic))
+
+    @metered('mul')
     def mul(self, lhs: Cipher, rhs: Cipher):
         """
         Multiply two ciphertexts together.
 
+        The product is tensored with three ring multiplications and
+        relinearized with the evaluator's relinearization key, see
+        `Rank2Cipher.relinearize`.
+
         Args:
         - lhs: Cipher, the left-hand side of the multiplication
         - rhs: Cipher, the right-hand side of the multiplication
 
         Returns:
         - Cipher, the product of the two ciphertexts
+
+        Raises:
+        - ValueError: if the evaluator has no relinearization key.
         """
 
         if self.relin_key is None:
             raise ValueError("No relinearization key provided")
 
-        # FIXME: either multiplication or relinearization needs
-        # debugging.
-        raise NotImplementedError(
-            "Multiplication support is not yet implemented")
-
-        logger.debug(f"Multiplying {lhs} and {rhs}")
-        rank2 = self._compute_rank2_product(lhs.glwe_sample, rhs.glwe_sample)
-        return rank2.relinearize(self.relin_key, self.dist.poly_modulus)
+        with _trace.span('mul'):
+            rank2 = self.mul_no_relin(lhs, rhs)
+            return rank2.relinearize(self.relin_key)
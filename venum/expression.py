@@ -0,0 +1,323 @@
+from .encryption import Cipher, Rank2Cipher
+from .evaluation import Evaluator
+from .glwe import GlweSample
+from .metrics import activate, active_metrics
+from .plaintext_encoding import Plaintext
+from .tracing import get_tracer
+
+import itertools
+import numbers
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence, Tuple, Union
+
+_trace = get_tracer('expression')
+
+
+class Expression:
+    """
+    A node of an `ExpressionGraph`, standing for a ciphertext that is only
+    computed by `ExpressionGraph.evaluate`.
+
+    Expressions support `+`, `-` and `*` with other expressions of the
+    same graph, `+`, `-` and `*` with `Plaintext` operands, and `*` with
+    integer weights.
+
+    Attributes:
+    - op: the operation of the node, e.g. 'add' or 'mul'.
+    - args: the operand expressions.
+    - operand: the non-expression operand, i.e. the input ciphertext, the
+      plaintext or the integer weight, if any.
+    """
+
+    def __init__(self, graph: 'ExpressionGraph', op: str,
+                 args: Tuple['Expression', ...] = (), operand=None):
+        self.graph = graph
+        self.op = op
+        self.args = args
+        self.operand = operand
+        self.index = next(graph._counter)
+
+    def __repr__(self):
+        return f'Expression({self.index}, {self.op})'
+
+    def _ensure_same_graph(self, other: 'Expression'):
+        if other.graph is not self.graph:
+            raise ValueError("Expressions belong to different graphs")
+
+    def __add__(self, other):
+        if isinstance(other, Plaintext):
+            return self.graph._node('add_plain', (self,), other)
+        if not isinstance(other, Expression):
+            return NotImplemented
+        self._ensure_same_graph(other)
+        return self.graph._node('add', (self, other))
+
+    def __radd__(self, other):
+        # Allows the builtin sum, which starts from 0.
+        if isinstance(other, numbers.Integral) and other == 0:
+            return self
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        if isinstance(other, Plaintext):
+            return self.graph._node('sub_plain', (self,), other)
+        if not isinstance(other, Expression):
+            return NotImplemented
+        self._ensure_same_graph(other)
+        return self.graph._node('sub', (self, other))
+
+    def __rsub__(self, other):
+        if isinstance(other, Plaintext):
+            return -self + other
+        return NotImplemented
+
+    def __neg__(self):
+        return self.graph._node('scale', (self,), -1)
+
+    def __mul__(self, other):
+        if isinstance(other, numbers.Integral):
+            return self.graph._node('scale', (self,), int(other))
+        if isinstance(other, Plaintext):
+            return self.graph._node('mul_plain', (self,), other)
+        if not isinstance(other, Expression):
+            return NotImplemented
+        self._ensure_same_graph(other)
+        return self.graph._node('mul', (self, other))
+
+    __rmul__ = __mul__
+
+
+# Operations whose result is a linear combination of their operands.
+LINEAR_OPS = ('add', 'sub', 'scale', 'add_plain', 'sub_plain')
+
+# A linear form: integer weights of the terms that are not linear
+# combinations themselves (inputs, products, plaintext products), and
+# weights of the plaintexts added to them.
+LinearForm = Tuple[Dict[Expression, int], Dict[Plaintext, int]]
+
+
+class ExpressionGraph:
+    """
+    Builds ciphertext computations lazily and evaluates them at once.
+
+    Operations on the expressions of a graph only record nodes. Nodes are
+    hash-consed: applying an operation to the same operands (in any order
+    for commutative operations) returns the existing node, so repeated
+    subexpressions are computed once. `evaluate` then
+
+    - fuses chains of additions, subtractions and integer scalings into a
+      single weighted `Evaluator.sum` per materialized node,
+    - accumulates the rank-2 products of a sum of products and
+      relinearizes only once per sum,
+    - materializes only the nodes whose value is needed, i.e. the outputs
+      and the operands of multiplications, optionally computing
+      independent nodes in parallel.
+
+    Attributes:
+    - evaluator: the Evaluator performing the operations.
+    """
+
+    COMMUTATIVE = ('add', 'mul')
+
+    def __init__(self, evaluator: Evaluator):
+        self.evaluator = evaluator
+        self._counter = itertools.count()
+        self._nodes = {}
+
+    def __repr__(self):
+        return f'ExpressionGraph({len(self._nodes)} nodes)'
+
+    def input(self, cipher: Cipher) -> Expression:
+        """
+        The expression standing for an existing ciphertext.
+        """
+
+        return self._node('input', (), cipher)
+
+    def _node(self, op: str, args: Tuple[Expression, ...],
+              operand=None) -> Expression:
+        indices = tuple(arg.index for arg in args)
+        if op in self.COMMUTATIVE:
+            indices = tuple(sorted(indices))
+        key = (op, indices,
+               operand if isinstance(operand, numbers.Integral)
+               else id(operand))
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._nodes[key] = Expression(self, op, args, operand)
+        return node
+
+    def _linear_form(self, root: Expression) -> LinearForm:
+        # Propagate weights from the root down the linear nodes below it,
+        # parents before children, so that shared subexpressions are
+        # visited once.
+        order = _post_order([root], lambda node: (
+            node.args if node.op in LINEAR_OPS else ()))
+        weights = defaultdict(int)
+        weights[root] = 1
+        terms, plains = defaultdict(int), defaultdict(int)
+        for node in reversed(order):
+            weight = weights.pop(node, 0)
+            if not weight:
+                continue
+            if node.op not in LINEAR_OPS:
+                terms[node] += weight
+                continue
+            if node.op == 'scale':
+                coefficients = [node.operand]
+            elif node.op == 'sub':
+                coefficients = [1, -1]
+            else:
+                coefficients = [1, 1]
+            for arg, coefficient in zip(node.args, coefficients):
+                weights[arg] += weight * coefficient
+            if node.op == 'add_plain':
+                plains[node.operand] += weight
+            elif node.op == 'sub_plain':
+                plains[node.operand] -= weight
+        return ({t: w for t, w in terms.items() if w},
+                {p: w for p, w in plains.items() if w})
+
+    def evaluate(self, outputs: Union[Expression, Sequence[Expression]],
+                 workers: int = None) -> Union[Cipher, List[Cipher]]:
+        """
+        Evaluate expressions of the graph.
+
+        Args:
+        - outputs: an expression or a sequence of expressions.
+        - workers: the number of threads computing independent nodes. If
+          None, everything runs in the calling thread.
+
+        Returns:
+        - the ciphertext of each expression, or of the single expression.
+
+        Raises:
+        - ValueError: if a multiplication is evaluated without a
+          relinearization key.
+        """
+
+        single = isinstance(outputs, Expression)
+        outputs = [outputs] if single else list(outputs)
+        forms = {}
+
+        def operands(node):
+            if node not in forms:
+                forms[node] = self._linear_form(node)
+            terms, _ = forms[node]
+            return {arg: None for term in terms if term.op != 'input'
+                    for arg in term.args}
+
+        order = _post_order(outputs, operands)
+        if (any(term.op == 'mul' for terms, _ in forms.values()
+                for term in terms)
+                and self.evaluator.relin_key is None):
+            raise ValueError("No relinearization key provided")
+
+        levels = self._levels(order, operands)
+        with _trace.span('evaluate', nodes=len(order), levels=len(levels),
+                         workers=workers), activate(self.evaluator.metrics):
+            values = self._evaluate_levels(levels, forms, workers)
+        ciphers = [values[node] for node in outputs]
+        return ciphers[0] if single else ciphers
+
+    def _evaluate_levels(self, levels: List[List[Expression]], forms: Dict,
+                         workers: int) -> Dict[Expression, Cipher]:
+        values = {}
+        metrics = active_metrics()
+
+        def materialize(node):
+            with activate(metrics):
+                return self._materialize(node, forms, values)
+
+        pool = (ThreadPoolExecutor(max_workers=workers)
+                if workers and workers > 1 else None)
+        try:
+            for level in levels:
+                if pool is None:
+                    results = [self._materialize(node, forms, values)
+                               for node in level]
+                else:
+                    results = list(pool.map(materialize, level))
+                values.update(zip(level, results))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return values
+
+    @staticmethod
+    def _levels(order: List[Expression], operands) -> List[List[Expression]]:
+        # Group nodes given in post-order by the length of the longest
+        # chain of operands below them; nodes of a level are independent.
+        depths = {}
+        levels = defaultdict(list)
+        for node in order:
+            depths[node] = 1 + max(
+                (depths[arg] for arg in operands(node)), default=-1)
+            levels[depths[node]].append(node)
+        return [levels[d] for d in sorted(levels)]
+
+    def _materialize(self, node: Expression, forms: Dict,
+                     values: Dict[Expression, Cipher]) -> Cipher:
+        evaluator = self.evaluator
+        terms, plains = forms[node]
+        linear, linear_weights, products = [], [], []
+        for term, weight in terms.items():
+            if term.op == 'input':
+                linear.append(term.operand)
+                linear_weights.append(weight)
+            elif term.op == 'mul_plain':
+                linear.append(evaluator.mul_plain(values[term.args[0]],
+                                                  term.operand))
+                linear_weights.append(weight)
+            else:
+                lhs, rhs = (values[arg] for arg in term.args)
+                products.append((weight, evaluator.mul_no_relin(lhs, rhs)))
+
+        if len(linear) == 1 and linear_weights == [1]:
+            cipher = linear[0]
+        elif linear or not products:
+            cipher = evaluator.sum(linear, linear_weights)
+        else:
+            cipher = None
+        if products:
+            weight, rank2 = products[0]
+            constant = rank2.constant * weight
+            linear_term = rank2.linear * weight
+            quadratic = rank2.quadratic * weight
+            for weight, rank2 in products[1:]:
+                constant += rank2.constant * weight
+                linear_term += rank2.linear * weight
+                quadratic += rank2.quadratic * weight
+            product = Rank2Cipher(constant, linear_term, quadratic)
+            relinearized = product.relinearize(evaluator.relin_key)
+            cipher = (relinearized if cipher is None
+                      else evaluator.add(cipher, relinearized))
+        if plains:
+            body = cipher.glwe_sample.body
+            for plain, weight in plains.items():
+                body += plain.crt_message() * weight
+            cipher = Cipher(GlweSample(mask=cipher.glwe_sample.mask,
+                                       body=body))
+        return cipher
+
+
+def _post_order(roots, children) -> list:
+    """
+    The nodes reachable from `roots`, each after all of its children.
+    """
+
+    order, visited = [], set()
+    stack = [(root, False) for root in reversed(roots)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+            continue
+        if node in visited:
+            continue
+        visited.add(node)
+        stack.append((node, True))
+        stack.extend((child, False) for child in children(node)
+                     if child not in visited)
+    return order
@@ -1,33 +1,168 @@
 from .rns import RnsBasis
 from .crt import CrtEncoder
 from .logging import logger
+from .metrics import measure
+from .ring import PolyRing, RnsPolyRing, RingPoly
+from .ntt import is_ntt_friendly
+from .serialization import (FINGERPRINT_BYTES, KIND_PARAMS, Reader,
+                            Writer)
+from .tracing import get_tracer
+from .sampling import (SEED_BYTES, XofStream, sample_uniform,
+                       sample_ternary, sample_centered_binomial,
+                       sample_discrete_gaussian)
 
-from sympy import Poly, GF
-from sympy.abc import x
-from sympy.polys.specialpolys import random_poly
+import numpy as np
 
-import random
-from dataclasses import dataclass
+import copy
+import hashlib
+import math
+from dataclasses import dataclass, field
+from typing import List, Union
+
+_trace = get_tracer('sampling')
+
+NOISE_DISTRIBUTIONS = ('gaussian', 'binomial', 'uniform')
 
 
 @dataclass
 class EncryptionParameters:
     """
     Parameters for the encryption scheme.
+
+    The ciphertext modulus is either a single integer or an `RnsBasis` of
+    word-sized coprime moduli. In the latter case `ciphertext_modulus` is
+    set to their product, the basis is kept in `ciphertext_basis` and
+    ciphertexts are stored in double-CRT form, one residue polynomial per
+    modulus.
+
+    Noise is drawn from `noise_distribution`: a discrete Gaussian of
+    standard deviation `noise_stddev` ('gaussian'), a centered binomial
+    distribution of the same variance ('binomial'), or the uniform
+    distribution modulo `noise_modulus` ('uniform'), and is then reduced
+    modulo `noise_modulus`.
+
+    A `seed` makes every distribution built from these parameters draw
+    the same stream of samples; without it each distribution is seeded
+    from operating system entropy.
     """
 
     dimension: int
-    ciphertext_modulus: int
+    ciphertext_modulus: Union[int, RnsBasis]
     plaintext_modulus: int
     noise_modulus: int
     seed: int = None
+    noise_distribution: str = 'gaussian'
+    noise_stddev: float = 3.2
+    ciphertext_basis: RnsBasis = field(default=None, init=False,
+                                       repr=False)
 
     def __post_init__(self):
+        if isinstance(self.ciphertext_modulus, RnsBasis):
+            self.ciphertext_basis = self.ciphertext_modulus
+            self.ciphertext_modulus = math.prod(
+                self.ciphertext_basis.moduli)
         if (self.plaintext_modulus * self.noise_modulus
                 >= self.ciphertext_modulus):
             raise ValueError(
                 'Invalid parameters: plaintext_modulus * noise_modulus '
                 '>= ciphertext_modulus')
+        if self.noise_distribution not in NOISE_DISTRIBUTIONS:
+            raise ValueError(
+                f'Invalid parameters: noise_distribution must be one of '
+                f'{NOISE_DISTRIBUTIONS}')
+
+    def supports_ntt(self) -> bool:
+        """
+        Whether ciphertext polynomials can be multiplied with the NTT,
+        i.e. the dimension is a power of two and the ciphertext modulus
+        (or every modulus of the ciphertext basis) is a prime congruent to
+        1 modulo twice the dimension. Use `venum.ntt.ensure_ntt_friendly`
+        to find out which condition fails.
+        """
+
+        moduli = (self.ciphertext_basis.moduli
+                  if self.ciphertext_basis is not None
+                  else [self.ciphertext_modulus])
+        return all(is_ntt_friendly(self.dimension, modulus)
+                   for modulus in moduli)
+
+    def _write_fields(self, writer: Writer):
+        moduli = (self.ciphertext_basis.moduli
+                  if self.ciphertext_basis is not None
+                  else [self.ciphertext_modulus])
+        writer.pack('IB', self.dimension, self.ciphertext_basis is not None)
+        writer.pack('I', len(moduli))
+        for modulus in moduli:
+            writer.write_int(modulus)
+        writer.write_int(self.plaintext_modulus)
+        writer.write_int(self.noise_modulus)
+        writer.pack('Bd', NOISE_DISTRIBUTIONS.index(self.noise_distribution),
+                    self.noise_stddev)
+
+    def fingerprint(self) -> bytes:
+        """
+        A digest of the parameters that determine how ciphertexts and
+        keys are represented and decrypted, i.e. all of them but the
+        seed. Serialized objects carry the fingerprint of the parameters
+        they were created with.
+        """
+
+        writer = Writer()
+        self._write_fields(writer)
+        return hashlib.blake2b(writer.getvalue(),
+                               digest_size=FINGERPRINT_BYTES).digest()
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the parameters, see `venum.serialization`.
+        """
+
+        writer = Writer()
+        writer.write_header(KIND_PARAMS, self.fingerprint())
+        self._write_fields(writer)
+        writer.pack('B', self.seed is not None)
+        if self.seed is not None:
+            writer.write_int(self.seed)
+        return writer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data) -> 'EncryptionParameters':
+        """
+        Deserialize parameters written by `to_bytes`.
+
+        Args:
+        - data: a bytes-like object.
+
+        Returns:
+        - the parameters.
+
+        Raises:
+        - ValueError: if the data is malformed.
+        """
+
+        reader = Reader(data)
+        fingerprint = reader.read_header(KIND_PARAMS)
+        dimension, is_rns = reader.unpack('IB')
+        count, = reader.unpack('I')
+        moduli = [reader.read_int() for _ in range(count)]
+        plaintext_modulus = reader.read_int()
+        noise_modulus = reader.read_int()
+        distribution, noise_stddev = reader.unpack('Bd')
+        has_seed, = reader.unpack('B')
+        seed = reader.read_int() if has_seed else None
+        reader.ensure_consumed()
+        params = cls(
+            dimension=dimension,
+            ciphertext_modulus=RnsBasis(moduli) if is_rns else moduli[0],
+            plaintext_modulus=plaintext_modulus,
+            noise_modulus=noise_modulus,
+            seed=seed,
+            noise_distribution=NOISE_DISTRIBUTIONS[distribution],
+            noise_stddev=noise_stddev,
+        )
+        if params.fingerprint() != fingerprint:
+            raise ValueError('Parameters fingerprint mismatch')
+        return params
 
 
 class GlweSample:
@@ -42,64 +177,322 @@ class GlweSample:
         self.body = body
 
     @staticmethod
-    def _compute_mask(mask, noise, u, poly_modulus):
-        new_mask = mask * u + noise
-        new_mask = new_mask % poly_modulus
-        return new_mask
+    def _compute_mask(mask, noise, u):
+        return mask * u + noise
 
     @staticmethod
-    def _compute_body(body, noise, message, u, poly_modulus):
-        new_body = body * u + message + noise
-        new_body = new_body % poly_modulus
-        return new_body
+    def _compute_body(body, noise, message, u):
+        return body * u + message + noise
 
     @classmethod
     def compute_sample(cls, mask, mask_noise, body, body_noise,
-                       message, u, poly_modulus):
+                       message, u):
         """
         Compute a new sample from the given parameters. The new sample
         corresponds to an encryption of the given message.
         """
 
-        new_mask = cls._compute_mask(mask, mask_noise, u,
-                                     poly_modulus)
-        new_body = cls._compute_body(body, body_noise, message, u,
-                                     poly_modulus)
+        new_mask = cls._compute_mask(mask, mask_noise, u)
+        new_body = cls._compute_body(body, body_noise, message, u)
         return cls(mask=new_mask, body=new_body)
 
     @classmethod
     def _compute_zero_sample(
-            cls, mask: Poly, secret: Poly,
-            crt_noise: Poly, poly_modulus: Poly):
-        body = (mask * secret +
-                crt_noise.set_domain(poly_modulus.domain)) % poly_modulus
+            cls, mask: RingPoly, secret: RingPoly, crt_noise: RingPoly):
+        body = mask * secret + crt_noise.to_ring(mask.ring)
         return cls(mask=-mask, body=body)
 
     def __repr__(self):
         return f'GlweSample(mask={self.mask}, body={self.body})'
 
+    def write_to(self, writer: Writer):
+        """
+        Write the sample as a tag byte followed by its polynomials.
+        """
+
+        writer.pack('B', 0)
+        writer.write_coeffs(self.mask.ring, self.mask.coeffs)
+        writer.write_coeffs(self.body.ring, self.body.coeffs)
+
+    @staticmethod
+    def read_from(reader: Reader, ring: PolyRing) -> 'GlweSample':
+        """
+        Read a sample written by `write_to`, seeded or not.
+
+        Args:
+        - reader: the reader to read from.
+        - ring: the ring of the sample polynomials.
+
+        Returns:
+        - a `GlweSample` or a `SeededGlweSample`.
+        """
+
+        seeded, = reader.unpack('B')
+        if seeded:
+            seed = bytes(reader.read(SEED_BYTES))
+            return SeededGlweSample(
+                seed=seed, body=RingPoly(ring, reader.read_coeffs(ring)))
+        mask = RingPoly(ring, reader.read_coeffs(ring))
+        body = RingPoly(ring, reader.read_coeffs(ring))
+        return GlweSample(mask=mask, body=body)
+
+    @staticmethod
+    def skip(reader: Reader, ring: PolyRing):
+        """
+        Skip a sample written by `write_to` without reading its
+        polynomials.
+        """
+
+        seeded, = reader.unpack('B')
+        if seeded:
+            reader.read(SEED_BYTES)
+        else:
+            reader.skip_coeffs(ring)
+        reader.skip_coeffs(ring)
+
+
+def expand_mask(seed: bytes, ring) -> RingPoly:
+    """
+    Expand a seed into a uniformly random polynomial of the given ring.
+
+    Args:
+    - seed: the seed, as returned by `GlweDistribution.sample_seed`.
+    - ring: the ring of the polynomial.
+
+    Returns:
+    - a polynomial, always the same for the same seed and ring.
+    """
+
+    return RingPoly(ring, ring.sample_uniform(XofStream(seed)))
+
+
+class SeededGlweSample(GlweSample):
+    """
+    A GLWE sample whose uniformly random mask is represented by the seed
+    it is expanded from, which halves the size of the sample when stored
+    or sent. The mask is expanded on first access and then cached.
+
+    Only samples whose mask is freshly sampled can be seeded, i.e. public
+    keys, relinearization keys and ciphertexts encrypted with the secret
+    key. Their body is -mask * secret + message + noise.
+
+    Attributes:
+    - seed: the seed of the mask.
+    - body: the body polynomial.
+    """
+
+    def __init__(self, seed: bytes, body: RingPoly):
+        self.seed = seed
+        self.body = body
+        self._mask = None
+
+    @property
+    def mask(self) -> RingPoly:
+        if self._mask is None:
+            self._mask = expand_mask(self.seed, self.body.ring)
+        return self._mask
+
+    @classmethod
+    def _compute_seeded_sample(cls, seed: bytes, secret: RingPoly,
+                               message: RingPoly):
+        mask = expand_mask(seed, secret.ring)
+        sample = cls(seed=seed, body=message - mask * secret)
+        sample._mask = mask
+        return sample
+
+    def __repr__(self):
+        return f'SeededGlweSample(seed={self.seed.hex()}, body={self.body})'
+
+    def write_to(self, writer: Writer):
+        writer.pack('B', 1)
+        writer.write(self.seed)
+        writer.write_coeffs(self.body.ring, self.body.coeffs)
+
 
 class GlweDistribution:
-    def __init__(self, params: EncryptionParameters):
+    def __init__(self, params: EncryptionParameters,
+                 seed_sequence: np.random.SeedSequence = None):
         """
         Initialize the GLWE distribution with the given parameters.
 
+        Each distribution owns an independent random generator, so
+        distributions never interfere with each other or with the global
+        numpy state. Use `spawn` to derive independent child
+        distributions for parallel workers.
+
         Args:
         - params: the encryption parameters.
+        - seed_sequence: the seed sequence of the random stream. If None,
+            it is derived from `params.seed`.
         """
 
-        if params.seed is not None:
-            random.seed(params.seed)
-            logger.warning(f"Setting random seed to {params.seed}")
+        if seed_sequence is None:
+            if params.seed is not None:
+                logger.warning(f"Using deterministic seed {params.seed}")
+            seed_sequence = np.random.SeedSequence(params.seed)
+        self.seed_sequence = seed_sequence
+        self.rng = np.random.default_rng(seed_sequence)
         self.params = params
-        self.plaintext_ring = GF(params.plaintext_modulus, symmetric=False)
-        self.cipher_ring = GF(params.ciphertext_modulus, symmetric=False)
-        self.poly_modulus = Poly(
-            x ** params.dimension + 1, x, domain=self.cipher_ring)
+        self.plaintext_ring = PolyRing(
+            params.dimension, params.plaintext_modulus)
+        if params.ciphertext_basis is not None:
+            self.cipher_ring = RnsPolyRing(
+                params.dimension, params.ciphertext_basis)
+        else:
+            self.cipher_ring = PolyRing(
+                params.dimension, params.ciphertext_modulus)
         crt_basis = RnsBasis(
             [self.params.plaintext_modulus, self.params.noise_modulus])
         self.crt_encoder = CrtEncoder(crt_basis, self.plaintext_ring)
 
+    def spawn(self, count: int) -> List['GlweDistribution']:
+        """
+        Derive independent child distributions, e.g. one per message of a
+        batch or one per worker.
+
+        The children share the rings and encoders of this distribution
+        but draw from their own streams, which depend only on the seed of
+        this distribution and on how many children were spawned before.
+        Work split into the same children therefore produces the same
+        samples whether it runs on one or many threads or processes.
+
+        Args:
+        - count: the number of children to spawn.
+
+        Returns:
+        - a list of `count` distributions.
+        """
+
+        return [self.reseeded(seed_sequence)
+                for seed_sequence in self.seed_sequence.spawn(count)]
+
+    def reseeded(self, seed_sequence: np.random.SeedSequence
+                 ) -> 'GlweDistribution':
+        """
+        A copy of this distribution, sharing its rings and encoders, that
+        draws from the stream of `seed_sequence`, e.g. a seed sequence
+        spawned by another process.
+        """
+
+        child = copy.copy(self)
+        child.seed_sequence = seed_sequence
+        child.rng = np.random.default_rng(seed_sequence)
+        return child
+
+    def _shape(self, batch, shape):
+        return shape if batch is None else (batch,) + tuple(shape)
+
+    def sample_uniform_array(self, modulus=None, batch=None):
+        """
+        Sample uniformly random coefficient arrays.
+
+        Args:
+        - modulus: the modulus for the coefficients. If None, the
+            coefficients are uniform in the ciphertext ring, i.e. the
+            arrays are residue arrays for an RNS ciphertext modulus.
+        - batch: the number of arrays to sample. If None, a single array
+            is returned.
+
+        Returns:
+        - an array of shape (n,) or (batch, n), or the ring shape of the
+          ciphertext ring when `modulus` is None.
+        """
+
+        with measure('sample_uniform', batch or 1):
+            if modulus is None:
+                return self.cipher_ring.sample_uniform(
+                    self.rng, () if batch is None else (batch,))
+            return sample_uniform(
+                self.rng, modulus,
+                self._shape(batch, (self.params.dimension,)))
+
+    def sample_ternary_array(self, batch=None):
+        """
+        Sample coefficient arrays with entries uniform in {-1, 0, 1}.
+
+        Args:
+        - batch: the number of arrays to sample. If None, a single array
+            is returned.
+
+        Returns:
+        - an array of shape (n,) or (batch, n).
+        """
+
+        with measure('sample_ternary', batch or 1):
+            return sample_ternary(
+                self.rng, self._shape(batch, (self.params.dimension,)))
+
+    def sample_noise_array(self, batch=None):
+        """
+        Sample noise coefficient arrays from the configured noise
+        distribution.
+
+        Args:
+        - batch: the number of arrays to sample. If None, a single array
+            is returned.
+
+        Returns:
+        - an array of shape (n,) or (batch, n) with coefficients in the
+          noise modulus.
+        """
+
+        shape = self._shape(batch, (self.params.dimension,))
+        stddev = self.params.noise_stddev
+        with measure('sample_noise', batch or 1):
+            if self.params.noise_distribution == 'gaussian':
+                noise = sample_discrete_gaussian(self.rng, stddev, shape)
+            elif self.params.noise_distribution == 'binomial':
+                eta = max(1, round(2 * stddev ** 2))
+                noise = sample_centered_binomial(self.rng, eta, shape)
+            else:
+                noise = sample_uniform(self.rng, self.params.noise_modulus,
+                                       shape)
+            return noise % self.params.noise_modulus
+
+    def sample_crt_noise_array(self, batch=None):
+        """
+        Sample CRT-encoded noise coefficient arrays.
+
+        Args:
+        - batch: the number of arrays to sample. If None, a single array
+            is returned.
+
+        Returns:
+        - an array of shape (n,) or (batch, n) with coefficients in
+          [0, t * p), congruent to 0 modulo the plaintext modulus t and to
+          the noise modulo the noise modulus p, like `sample_crt_noise`.
+        """
+
+        noise = self.sample_noise_array(batch)
+        return self.crt_encoder.encode_coeffs(np.zeros_like(noise), noise)
+
+    def encode_crt_message_array(self, message: np.ndarray) -> np.ndarray:
+        """
+        CRT-encode message coefficient arrays with zero noise, as added to
+        the body of a ciphertext by encryption.
+
+        Args:
+        - message: an integer array of shape (..., n), taken modulo the
+            plaintext modulus t.
+
+        Returns:
+        - an array of the same shape with coefficients in [0, t * p),
+          congruent to the message modulo t and to 0 modulo the noise
+          modulus p.
+        """
+
+        message = np.asarray(message)
+        return self.crt_encoder.encode_coeffs(message, np.zeros_like(message))
+
+    def encode_crt_message(self, message: RingPoly) -> RingPoly:
+        """
+        CRT-encode a plaintext polynomial into the ciphertext ring, see
+        `encode_crt_message_array`.
+        """
+
+        return self.cipher_ring.from_coeffs(
+            self.encode_crt_message_array(message.lift()))
+
     def sample_polynomial(self, modulus=None):
         """
         Sample a polynomial with coefficients in the given modulus.
@@ -112,14 +505,20 @@ class GlweDistribution:
         - a polynomial with coefficients in the given modulus.
         """
 
-        modulus = modulus or self.params.ciphertext_modulus
-        degree = self.params.dimension - 1
-        return random_poly(
-            x,
-            n=degree,
-            inf=0,
-            sup=modulus - 1
-        ).as_poly(domain=self.cipher_ring)
+        if modulus is None:
+            return RingPoly(self.cipher_ring, self.sample_uniform_array())
+        return self.cipher_ring.from_coeffs(self.sample_uniform_array(modulus))
+
+    def sample_seed(self) -> bytes:
+        """
+        Sample a seed for a mask, see `expand_mask`.
+
+        Returns:
+
+        - a random byte string.
+        """
+
+        return self.rng.bytes(SEED_BYTES)
 
     def sample_mask(self):
         """
@@ -141,9 +540,7 @@ class GlweDistribution:
         - a polynomial with coefficients in the noise modulus.
         """
 
-        # FIX: for security reasons, noise should not be sampled from
-        # a uniform distribution.
-        return self.sample_polynomial(self.params.noise_modulus)
+        return self.cipher_ring.from_coeffs(self.sample_noise_array())
 
     def sample_crt_noise(self):
         """
@@ -151,19 +548,19 @@ class GlweDistribution:
 
         Returns:
 
-        - a CRT-encoded noise polynomial.
+        - a CRT-encoded noise polynomial, with coefficients in [0, t * p).
         """
 
         noise = self.sample_noise()
-        logger.debug(f"Sampled CRT noise: {noise}")
+        if _trace.enabled:
+            _trace.event('sample_crt_noise', noise=noise)
         crt_noise = self.crt_encoder.encode_pure_noise(noise)
-        logger.debug(f"CRT noise: {crt_noise}")
         return crt_noise
 
-    def sample_zero_secret(self, secret: Poly):
+    def sample_zero_secret(self, secret: RingPoly):
         """
         Produces a random GLWE sample corresponding to an encryption of
-        zero message.
+        zero message. The mask of the sample is seeded.
 
         Args:
         - secret: the secret polynomial to use for the encryption.
@@ -172,7 +569,7 @@ class GlweDistribution:
         - a GLWE sample corresponding to an encryption of zero.
         """
 
-        mask = self.sample_mask()
-        crt_noise = self.sample_crt_noise()
-        return GlweSample._compute_zero_sample(
-            mask, secret, crt_noise, self.poly_modulus)
+        seed = self.sample_seed()
+        crt_noise = self.sample_crt_noise().to_ring(secret.ring)
+        return SeededGlweSample._compute_seeded_sample(
+            seed, secret, crt_noise)
@@ -1,10 +1,17 @@
-from .glwe import GlweDistribution, GlweSample
-from .logging import logger
+from .glwe import GlweDistribution, GlweSample, SeededGlweSample
+from .metrics import measure
+from .ring import RingPoly, RnsPolyRing
+from .sampling import derive_seed
+from .serialization import (KIND_PUBLIC_KEY, KIND_RELIN_KEY,
+                            KIND_SECRET_KEY, Reader, Writer)
+from .tracing import get_tracer
 
-from sympy import Poly
+import numpy as np
 
-import math
-from typing import Iterable, Tuple
+from collections.abc import Sequence
+from typing import Iterable, List, Tuple
+
+_trace = get_tracer('keys')
 
 
 class SecretKey:
@@ -16,10 +23,31 @@ class SecretKey:
     - secret_poly: a secret polynomial.
     """
 
-    def __init__(self, dist: GlweDistribution, secret_poly: Poly):
+    def __init__(self, dist: GlweDistribution, secret_poly: RingPoly):
         self._dist = dist
         self.secret_poly = secret_poly
 
+    @property
+    def secret_poly(self) -> RingPoly:
+        return self._secret_poly
+
+    @secret_poly.setter
+    def secret_poly(self, secret_poly: RingPoly):
+        self._secret_poly = secret_poly
+        self._precomputed = None
+
+    def precomputed(self):
+        """
+        The secret polynomial precomputed for fast multiplication (e.g.
+        its NTT evaluations), see `PolyRing.prepare`. It is computed on
+        first use and cached until `secret_poly` is replaced.
+        """
+
+        if self._precomputed is None:
+            self._precomputed = self.secret_poly.ring.prepare(
+                self.secret_poly.coeffs)
+        return self._precomputed
+
     def __repr__(self):
         return f'SecretKey({self.secret_poly})'
 
@@ -28,23 +56,65 @@ class SecretKey:
         """
         Generates a random secret key.
 
+        The secret is ternary, i.e. its coefficients are in {-1, 0, 1}, so
+        that the products of the CRT noise with the secret stay far below
+        q / 2 and decrypt to a multiple of the plaintext modulus.
+
         Args:
         - dist: A GLWE distribution to use.
-        - modulus: The modulus to use for the secret key. If None, the modulus
-          of the distribution is used.
+        - modulus: If given, the secret coefficients are instead uniform
+          modulo `modulus`, which only decrypts correctly for tiny moduli.
 
         Returns:
         - A secret key.
         """
 
-        secret = dist.sample_polynomial(modulus)
-        logger.debug(f"Generating random secret key from: {secret}")
+        if modulus is None:
+            secret = dist.cipher_ring.from_coeffs(dist.sample_ternary_array())
+        else:
+            secret = dist.sample_polynomial(modulus)
+        if _trace.enabled:
+            _trace.event('secret_key', secret=secret)
         return cls(dist, secret)
 
     @property
     def dist(self):
         return self._dist
 
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the secret key, see `venum.serialization`.
+        """
+
+        writer = Writer()
+        writer.write_header(KIND_SECRET_KEY, self.dist.params.fingerprint())
+        writer.write_coeffs(self.secret_poly.ring, self.secret_poly.coeffs)
+        return writer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data, dist: GlweDistribution) -> 'SecretKey':
+        """
+        Deserialize a secret key written by `to_bytes`.
+
+        Args:
+        - data: a bytes-like object.
+        - dist: the GLWE distribution of the key parameters.
+
+        Returns:
+        - A secret key.
+
+        Raises:
+        - ValueError: if the data is malformed or was serialized with
+          different parameters.
+        """
+
+        reader = Reader(data)
+        reader.read_header(KIND_SECRET_KEY, dist.params.fingerprint())
+        secret = RingPoly(dist.cipher_ring,
+                          reader.read_coeffs(dist.cipher_ring))
+        reader.ensure_consumed()
+        return cls(dist, secret)
+
 
 class PublicKey:
     """
@@ -57,6 +127,29 @@ class PublicKey:
     def __init__(self, glwe_sample: GlweSample):
         self.glwe_sample = glwe_sample
 
+    @property
+    def glwe_sample(self) -> GlweSample:
+        return self._glwe_sample
+
+    @glwe_sample.setter
+    def glwe_sample(self, glwe_sample: GlweSample):
+        self._glwe_sample = glwe_sample
+        self._precomputed = None
+
+    def precomputed(self):
+        """
+        The mask and body of the key stacked and precomputed for fast
+        multiplication (e.g. their NTT evaluations), see
+        `PolyRing.prepare`. It is computed on first use and cached until
+        `glwe_sample` is replaced.
+        """
+
+        if self._precomputed is None:
+            mask, body = self.glwe_sample.mask, self.glwe_sample.body
+            self._precomputed = mask.ring.prepare(
+                np.stack([mask.coeffs, body.coeffs]))
+        return self._precomputed
+
     def __repr__(self):
         return f'PublicKey(mask={self.glwe_sample.mask}, '
         f'body={self.glwe_sample.body})'
@@ -74,7 +167,44 @@ class PublicKey:
         """
 
         sample = secret_key.dist.sample_zero_secret(secret_key.secret_poly)
-        logger.debug(f"Generating public key with sample: {sample}")
+        if _trace.enabled:
+            _trace.event('public_key', sample=sample)
+        return cls(sample)
+
+    def to_bytes(self, params) -> bytes:
+        """
+        Serialize the public key, see `venum.serialization`.
+
+        Args:
+        - params: the EncryptionParameters of the key.
+        """
+
+        writer = Writer()
+        writer.write_header(KIND_PUBLIC_KEY, params.fingerprint())
+        self.glwe_sample.write_to(writer)
+        return writer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data, dist: GlweDistribution) -> 'PublicKey':
+        """
+        Deserialize a public key written by `to_bytes`.
+
+        Args:
+        - data: a bytes-like object.
+        - dist: the GLWE distribution of the key parameters.
+
+        Returns:
+        - A public key.
+
+        Raises:
+        - ValueError: if the data is malformed or was serialized with
+          different parameters.
+        """
+
+        reader = Reader(data)
+        reader.read_header(KIND_PUBLIC_KEY, dist.params.fingerprint())
+        sample = GlweSample.read_from(reader, dist.cipher_ring)
+        reader.ensure_consumed()
         return cls(sample)
 
 
@@ -85,15 +215,17 @@ def gen_key_pair(dist: GlweDistribution,
 
     Args:
     - dist: The GLWE distribution to use.
-    - modulus: The modulus to use for the secret key. If None, the modulus of
-      the distribution is used.
+    - modulus: The modulus of the uniform coefficients of the secret key.
+      If None, the secret key is ternary, with coefficients in {-1, 0, 1},
+      see `SecretKey.rand`.
 
     Returns:
     - A tuple (sk, pk) where sk is the secret key and pk is the public key.
     """
 
-    sk = SecretKey.rand(dist, modulus)
-    pk = PublicKey.from_secret_key(sk)
+    with measure('gen_key_pair'):
+        sk = SecretKey.rand(dist, modulus)
+        pk = PublicKey.from_secret_key(sk)
     return sk, pk
 
 
@@ -101,6 +233,9 @@ class RelinKey:
     """
     A relinearization key for the scheme. Used to normalize ciphertexts.
 
+    The auxiliary keys are seeded samples whose seeds are derived from a
+    single master seed, so only their bodies take up space.
+
     Attributes:
     - aux_keys: A list of auxiliary keys as described in the reference paper.
     - base: The base/radix used to generate the auxiliary keys.
@@ -110,24 +245,103 @@ class RelinKey:
         self.aux_keys = aux_keys
         self.base = base
 
+    @property
+    def aux_keys(self) -> Sequence:
+        return self._aux_keys
+
+    @aux_keys.setter
+    def aux_keys(self, aux_keys: Iterable[GlweSample]):
+        self._aux_keys = aux_keys
+        self._precomputed = None
+
+    @property
+    def lazy(self) -> bool:
+        """
+        Whether the auxiliary keys are read from a buffer on access, see
+        `from_bytes`.
+        """
+
+        return isinstance(self._aux_keys, _LazySamples)
+
+    def precomputed(self):
+        """
+        The masks and bodies of the auxiliary keys stacked into an array
+        of shape (digit_count, 2) + ring shape and precomputed for fast
+        multiplication, see `PolyRing.prepare`. It is computed on first
+        use and cached until `aux_keys` is replaced, unless it was
+        provided with `set_precomputed`.
+        """
+
+        if self._precomputed is None:
+            aux_keys = list(self.aux_keys)
+            ring = aux_keys[0].body.ring
+            self._precomputed = ring.prepare(np.stack(
+                [(aux_key.mask.coeffs, aux_key.body.coeffs)
+                 for aux_key in aux_keys]))
+        return self._precomputed
+
+    def set_precomputed(self, prepared):
+        """
+        Use an existing precomputed form of the auxiliary keys, in the
+        layout returned by `precomputed`, e.g. one memory-mapped from a
+        key store.
+        """
+
+        self._precomputed = prepared
+
+    def key_switch(self, ring, digits: np.ndarray) -> np.ndarray:
+        """
+        The sum of the products of digit polynomials with the auxiliary
+        keys, reduced once.
+
+        Eager keys, and lazy keys given a precomputed form, are multiplied
+        in one pass against `precomputed`. Other lazy keys are not stacked
+        in memory: each auxiliary key is read and multiplied one digit at
+        a time, and the products are accumulated before reduction.
+
+        Args:
+        - ring: the ring of the auxiliary keys.
+        - digits: an array of shape (digit_count,) + ring shape.
+
+        Returns:
+        - an array of shape (2,) + ring shape holding the mask and body
+          parts.
+        """
+
+        if self._precomputed is not None or not self.lazy:
+            return ring.multiply_sum_prepared(self.precomputed(),
+                                              digits[:, np.newaxis])
+        bound = (max(ring.basis.moduli) if isinstance(ring, RnsPolyRing)
+                 else ring.modulus)
+        # Products added to a reduced total before it may overflow int64.
+        terms = max(1, (2 ** 63 - 1) // bound - 1)
+        total = np.zeros((2,) + ring.shape, dtype=ring.dtype)
+        pending = 0
+        for aux_key, digit in zip(self.aux_keys, digits):
+            pair = np.stack([aux_key.mask.coeffs, aux_key.body.coeffs])
+            total = total + ring.multiply(pair, digit)
+            pending += 1
+            if pending == terms and ring.dtype is not object:
+                total, pending = ring.reduce(total), 0
+        return ring.reduce(total)
+
     @staticmethod
     def _compute_aux_keys(sk: SecretKey, base: int) -> Iterable[GlweSample]:
-        digit_count = math.log(sk.dist.params.ciphertext_modulus, base)
-        digit_count = math.ceil(digit_count)
+        # Smallest digit count with base ** digit_count >= q, computed
+        # exactly since math.log rounds for moduli close to a power.
+        modulus = sk.dist.params.ciphertext_modulus
+        digit_count = 1
+        while base ** digit_count < modulus:
+            digit_count += 1
         aux_keys = []
-        sk2 = sk.secret_poly ** 2
+        sk2 = sk.secret_poly * sk.secret_poly
+        seed = sk.dist.sample_seed()
+        crt_noises = sk.dist.sample_crt_noise_array(batch=digit_count)
         for i in range(digit_count):
-            mask = sk.dist.sample_mask()
-            crt_noise = (sk.dist.sample_crt_noise()
-                         .set_domain(sk.dist.cipher_ring))
-            masked_secret = mask * sk.secret_poly
-            masked_secret = masked_secret % sk.dist.poly_modulus
-            noisy_secret = masked_secret + crt_noise
-            noisy_secret = noisy_secret % sk.dist.poly_modulus
-            message = base ** i * sk2
-            message = message % sk.dist.poly_modulus
-            body = (noisy_secret + message) % sk.dist.poly_modulus
-            aux_keys.append(GlweSample(mask=-mask, body=body))
+            crt_noise = sk.dist.cipher_ring.from_coeffs(crt_noises[i])
+            message = base ** i * sk2 + crt_noise
+            aux_keys.append(SeededGlweSample._compute_seeded_sample(
+                derive_seed(seed, i), sk.secret_poly, message))
         return aux_keys
 
     @classmethod
@@ -144,12 +358,89 @@ class RelinKey:
         - A relinearization key.
         """
 
-        aux_keys = cls._compute_aux_keys(secret_key, base)
+        with measure('gen_relin_key') as timer:
+            aux_keys = cls._compute_aux_keys(secret_key, base)
+            timer.set_items(len(aux_keys))
         return cls(aux_keys, base)
 
+    def to_bytes(self, params) -> bytes:
+        """
+        Serialize the relinearization key, see `venum.serialization`.
+
+        Args:
+        - params: the EncryptionParameters of the key.
+        """
+
+        writer = Writer()
+        writer.write_header(KIND_RELIN_KEY, params.fingerprint())
+        writer.write_int(self.base)
+        writer.pack('I', self.digit_count())
+        for aux_key in self.aux_keys:
+            aux_key.write_to(writer)
+        return writer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data, dist: GlweDistribution,
+                   lazy: bool = False) -> 'RelinKey':
+        """
+        Deserialize a relinearization key written by `to_bytes`.
+
+        Args:
+        - data: a bytes-like object.
+        - dist: the GLWE distribution of the key parameters.
+        - lazy: if True, only locate the auxiliary keys and read each of
+          them from `data` whenever it is accessed, e.g. one digit at a
+          time during relinearization. `data` is then typically a
+          memory map, see `venum.keystore`.
+
+        Returns:
+        - A relinearization key.
+
+        Raises:
+        - ValueError: if the data is malformed or was serialized with
+          different parameters.
+        """
+
+        reader = Reader(data)
+        reader.read_header(KIND_RELIN_KEY, dist.params.fingerprint())
+        base = reader.read_int()
+        count, = reader.unpack('I')
+        if not lazy:
+            aux_keys = [GlweSample.read_from(reader, dist.cipher_ring)
+                        for _ in range(count)]
+            reader.ensure_consumed()
+            return cls(aux_keys, base)
+        offsets = []
+        for _ in range(count):
+            offsets.append(reader.offset)
+            GlweSample.skip(reader, dist.cipher_ring)
+        reader.ensure_consumed()
+        return cls(_LazySamples(data, offsets, dist.cipher_ring), base)
+
     def digit_count(self):
         """
         The number of parts in the relinearization key decomposition.
         """
 
         return len(self.aux_keys)
+
+
+class _LazySamples(Sequence):
+    """
+    A read-only sequence of GLWE samples serialized in a buffer, decoded
+    on access.
+    """
+
+    def __init__(self, data, offsets: List[int], ring):
+        self._data = data
+        self._offsets = offsets
+        self._ring = ring
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        reader = Reader(self._data, self._offsets[index])
+        return GlweSample.read_from(reader, self._ring)
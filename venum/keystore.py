@@ -0,0 +1,195 @@
+from .glwe import EncryptionParameters, GlweDistribution, GlweSample
+from .key import PublicKey, RelinKey
+from .serialization import KIND_PREPARED_RELIN_KEY, Reader, Writer
+from .tracing import get_tracer
+
+import numpy as np
+
+import functools
+import mmap
+import os
+import tempfile
+
+_trace = get_tracer('keystore')
+
+
+class KeyStore:
+    """
+    An on-disk store of the public key material of one set of encryption
+    parameters, opened through read-only memory maps.
+
+    The store is a directory holding the serialized parameters, public
+    key and relinearization key (see `venum.serialization`). Keys are
+    written with their masks expanded, so that opening a store costs no
+    key generation, no mask expansion and no copy: every process that
+    opens the same store shares the page cache.
+
+    The relinearization key is also stored in its precomputed form (see
+    `RelinKey.precomputed`), e.g. the NTT evaluations of its auxiliary
+    keys, when that form fits 64-bit words. Relinearization then
+    multiplies against the mapped form directly. Otherwise, e.g. with
+    Kronecker substitution, the auxiliary keys are read one digit at a
+    time as relinearization consumes them (see `RelinKey.key_switch`).
+    Either way no process holds a private copy of the key.
+
+    Attributes:
+    - path: the directory of the store.
+    - dist: the GlweDistribution of the stored parameters.
+    """
+
+    PARAMS_FILE = 'params.bin'
+    PUBLIC_KEY_FILE = 'public_key.bin'
+    RELIN_KEY_FILE = 'relin_key.bin'
+    PREPARED_RELIN_KEY_FILE = 'relin_key.prepared.bin'
+
+    def __init__(self, path: str, dist: GlweDistribution = None):
+        """
+        Open an existing key store.
+
+        Args:
+        - path: the directory of the store.
+        - dist: the GlweDistribution to use. If None, one is created from
+          the stored parameters.
+
+        Raises:
+        - ValueError: if `dist` does not match the stored parameters.
+        """
+
+        self.path = path
+        params = EncryptionParameters.from_bytes(self._map(self.PARAMS_FILE))
+        if dist is None:
+            dist = GlweDistribution(params)
+        elif dist.params.fingerprint() != params.fingerprint():
+            raise ValueError('Key store was created with different '
+                             'encryption parameters')
+        self.dist = dist
+
+    def __repr__(self):
+        return f'KeyStore({self.path!r})'
+
+    @classmethod
+    def save(cls, path: str, params: EncryptionParameters,
+             public_key: PublicKey = None,
+             relin_key: RelinKey = None) -> 'KeyStore':
+        """
+        Write keys to a key store, creating the directory if needed and
+        replacing the keys it already holds.
+
+        Args:
+        - path: the directory of the store.
+        - params: the encryption parameters of the keys.
+        - public_key: the public key to store, if any.
+        - relin_key: the relinearization key to store, if any.
+
+        Returns:
+        - the opened key store.
+        """
+
+        os.makedirs(path, exist_ok=True)
+        cls._write(path, cls.PARAMS_FILE, params.to_bytes())
+        if public_key is not None:
+            public_key = PublicKey(_expanded(public_key.glwe_sample))
+            cls._write(path, cls.PUBLIC_KEY_FILE, public_key.to_bytes(params))
+        if relin_key is not None:
+            relin_key = RelinKey(
+                [_expanded(aux_key) for aux_key in relin_key.aux_keys],
+                relin_key.base)
+            cls._write(path, cls.RELIN_KEY_FILE, relin_key.to_bytes(params))
+            prepared = _prepared_to_bytes(relin_key.precomputed(), params)
+            if prepared is not None:
+                cls._write(path, cls.PREPARED_RELIN_KEY_FILE, prepared)
+            else:
+                # Never leave the precomputed form of a replaced key.
+                try:
+                    os.unlink(os.path.join(path, cls.PREPARED_RELIN_KEY_FILE))
+                except FileNotFoundError:
+                    pass
+        return cls(path)
+
+    @staticmethod
+    def _write(path: str, name: str, data: bytes):
+        # Write to a temporary file first so that concurrent readers never
+        # map a partially written key.
+        fd, temp_path = tempfile.mkstemp(dir=path, prefix=f'.{name}.')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, os.path.join(path, name))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def _map(self, name: str) -> mmap.mmap:
+        file_path = os.path.join(self.path, name)
+        if _trace.enabled:
+            _trace.event('map', path=file_path)
+        with open(file_path, 'rb') as file:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @functools.cached_property
+    def public_key(self) -> PublicKey:
+        """
+        The stored public key, backed by the memory map.
+
+        Raises:
+        - FileNotFoundError: if the store holds no public key.
+        """
+
+        return PublicKey.from_bytes(self._map(self.PUBLIC_KEY_FILE),
+                                    self.dist)
+
+    @functools.cached_property
+    def relin_key(self) -> RelinKey:
+        """
+        The stored relinearization key, whose auxiliary keys are read
+        lazily from the memory map.
+
+        Raises:
+        - FileNotFoundError: if the store holds no relinearization key.
+        """
+
+        relin_key = RelinKey.from_bytes(self._map(self.RELIN_KEY_FILE),
+                                        self.dist, lazy=True)
+        try:
+            data = self._map(self.PREPARED_RELIN_KEY_FILE)
+        except FileNotFoundError:
+            return relin_key
+        relin_key.set_precomputed(
+            _prepared_from_bytes(data, self.dist.params.fingerprint()))
+        return relin_key
+
+
+def _expanded(sample: GlweSample) -> GlweSample:
+    return GlweSample(mask=sample.mask, body=sample.body)
+
+
+def _prepared_to_bytes(prepared, params: EncryptionParameters) -> bytes:
+    # The precomputed form is an array, or a list of arrays for an RNS
+    # ring. It is stored only if all of its values fit int64 words.
+    arrays = prepared if isinstance(prepared, list) else [prepared]
+    for array in arrays:
+        if not isinstance(array, np.ndarray):
+            return None
+        if array.dtype == object and array.size and not (
+                0 <= array.min() and array.max() < 2 ** 63):
+            return None
+    writer = Writer()
+    writer.write_header(KIND_PREPARED_RELIN_KEY, params.fingerprint())
+    writer.pack('BI', isinstance(prepared, list), len(arrays))
+    for array in arrays:
+        writer.pack('I', array.ndim)
+        writer.pack(f'{array.ndim}Q', *array.shape)
+        writer.write_words(array)
+    return writer.getvalue()
+
+
+def _prepared_from_bytes(data, fingerprint: bytes):
+    reader = Reader(data)
+    reader.read_header(KIND_PREPARED_RELIN_KEY, fingerprint)
+    is_list, count = reader.unpack('BI')
+    arrays = []
+    for _ in range(count):
+        ndim, = reader.unpack('I')
+        arrays.append(reader.read_words(reader.unpack(f'{ndim}Q')))
+    reader.ensure_consumed()
+    return arrays if is_list else arrays[0]
@@ -0,0 +1,127 @@
+import numpy as np
+
+import functools
+
+
+class KroneckerMultiplier:
+    """
+    Negacyclic multiplication over Z_q[x]/(x^n + 1) by Kronecker
+    substitution, usable for any modulus and dimension.
+
+    Both operands are packed into a single integer by evaluating them at
+    x = 2^b, where the slot width b is large enough to hold any
+    coefficient of the unreduced product. The integers are multiplied
+    with CPython's Karatsuba multiplication, the product is unpacked
+    slot by slot and folded with x^n = -1.
+
+    Attributes:
+    - dimension: the ring dimension n.
+    - modulus: the coefficient modulus q.
+    - slot_bytes: the byte width of a packed coefficient.
+    """
+
+    def __init__(self, dimension: int, modulus: int):
+        self.dimension = dimension
+        self.modulus = modulus
+        bound = dimension * (modulus - 1) ** 2
+        self._slot_bits = max(bound.bit_length(), 1)
+        self.slot_bytes = -(-self._slot_bits // 8)
+
+    def __repr__(self):
+        return (f"KroneckerMultiplier(dimension={self.dimension}, "
+                f"modulus={self.modulus})")
+
+    def pack(self, coeffs: np.ndarray) -> int:
+        """
+        Evaluate reduced coefficients at x = 2^(8 * slot_bytes).
+        """
+
+        if coeffs.dtype == object:
+            return int.from_bytes(
+                b''.join(int(c).to_bytes(self.slot_bytes, 'little')
+                         for c in coeffs), 'little')
+        words = coeffs.astype('<u8').view(np.uint8).reshape(-1, 8)
+        slots = np.zeros((len(coeffs), max(self.slot_bytes, 8)),
+                         dtype=np.uint8)
+        slots[:, :8] = words
+        return int.from_bytes(slots[:, :self.slot_bytes].tobytes(), 'little')
+
+    def unpack(self, packed: int) -> np.ndarray:
+        """
+        Split a packed product into its 2n - 1 unreduced coefficients.
+        """
+
+        count = 2 * self.dimension - 1
+        buffer = packed.to_bytes(count * self.slot_bytes, 'little')
+        if self._slot_bits <= 63:
+            slots = np.frombuffer(buffer, dtype=np.uint8).reshape(
+                count, self.slot_bytes)
+            words = np.zeros((count, 8), dtype=np.uint8)
+            words[:, :self.slot_bytes] = slots
+            return words.view('<u8').reshape(count).astype(np.int64)
+        width = self.slot_bytes
+        return np.array([int.from_bytes(buffer[i * width:(i + 1) * width],
+                                        'little')
+                         for i in range(count)], dtype=object)
+
+    def fold(self, product: np.ndarray) -> np.ndarray:
+        """
+        Reduce unpacked product coefficients modulo x^n + 1 and q.
+        """
+
+        n = self.dimension
+        result = product[:n] % self.modulus
+        result[:n - 1] -= product[n:] % self.modulus
+        return result % self.modulus
+
+    def _pack_rows(self, coeffs: np.ndarray) -> np.ndarray:
+        rows = coeffs.reshape(-1, self.dimension)
+        packed = np.empty(len(rows), dtype=object)
+        packed[:] = [self.pack(row) for row in rows]
+        return packed.reshape(coeffs.shape[:-1])
+
+    def multiply(self, lhs: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+        """
+        Multiply reduced coefficient arrays in Z_q[x]/(x^n + 1).
+
+        Batches of arrays along leading axes are broadcast against each
+        other; every distinct operand is packed only once.
+        """
+
+        if lhs.ndim == 1 and rhs.ndim == 1:
+            product = self.unpack(self.pack(lhs) * self.pack(rhs))
+            return self.fold(product).astype(lhs.dtype)
+        return self.multiply_prepared(self.prepare(lhs), rhs)
+
+    def prepare(self, coeffs: np.ndarray) -> np.ndarray:
+        """
+        Precompute the form of a fixed operand used by
+        `multiply_prepared`, i.e. its packed integers.
+        """
+
+        return self._pack_rows(coeffs)
+
+    def multiply_prepared(self, prepared: np.ndarray,
+                          rhs: np.ndarray) -> np.ndarray:
+        """
+        Multiply an operand prepared with `prepare` by reduced
+        coefficient arrays, skipping its packing.
+        """
+
+        shape = np.broadcast_shapes(prepared.shape + (self.dimension,),
+                                    rhs.shape)
+        products = np.broadcast_to(prepared * self._pack_rows(rhs),
+                                   shape[:-1])
+        return np.stack([self.fold(self.unpack(product)).astype(rhs.dtype)
+                         for product in products.flat]).reshape(shape)
+
+    def multiply_sum_prepared(self, prepared: np.ndarray,
+                              rhs: np.ndarray) -> np.ndarray:
+        """
+        Sum over the first axis of the products computed by
+        `multiply_prepared`.
+        """
+
+        return functools.reduce(
+            lambda total, product: (total + product) % self.modulus,
+            self.multiply_prepared(prepared, rhs))
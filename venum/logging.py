@@ -1,6 +1,10 @@
 import logging
 
 logger = logging.getLogger('venum')
+# A library must not configure logging for the application: records are
+# discarded unless the application installs handlers, e.g. with
+# logging.basicConfig(format=FORMAT).
+logger.addHandler(logging.NullHandler())
+
+# A format showing where venum records come from.
 FORMAT = "[%(filename)s:%(lineno)s - %(funcName)20s] %(message)s"
-logging.basicConfig(format=FORMAT)
-logger.setLevel(logging.NOTSET)
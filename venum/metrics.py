@@ -0,0 +1,317 @@
+import contextvars
+import functools
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable
+
+# The metrics receiving the operations of the current thread or task.
+_active = contextvars.ContextVar('venum_metrics', default=None)
+
+
+@dataclass(frozen=True)
+class OperationStats:
+    """
+    Accumulated measurements of one operation.
+
+    Attributes:
+    - calls: the number of calls.
+    - items: the number of items processed by those calls, e.g.
+      polynomial products for 'poly_mul' or digits for 'relinearize'.
+    - seconds: the total wall-clock time of the calls.
+    - max_seconds: the duration of the slowest call.
+    """
+
+    calls: int = 0
+    items: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def __add__(self, other: 'OperationStats') -> 'OperationStats':
+        return OperationStats(self.calls + other.calls,
+                              self.items + other.items,
+                              self.seconds + other.seconds,
+                              max(self.max_seconds, other.max_seconds))
+
+
+class Metrics:
+    """
+    Counters and timers of the operations performed while the metrics are
+    active.
+
+    Metrics are opt-in: they are attached to an `Encryptor`, `Decryptor`
+    or `Evaluator` with its `metrics` argument, and that object activates
+    them for the duration of each of its calls, or they are activated
+    explicitly with `activate`, e.g. around key generation. While active
+    (in the current thread or asyncio task), every instrumented operation
+    is recorded, from the public calls ('encrypt', 'mul', ...) down to
+    the primitives they trigger:
+
+    - 'poly_mul': ring multiplications, one item per polynomial product,
+    - 'poly_prepare': precomputations of fixed operands,
+    - 'reduce': reductions modulo q, one item per coefficient,
+    - 'rns_lift': RNS to integer reconstructions, one item per
+      coefficient,
+    - 'sample_uniform', 'sample_ternary', 'sample_noise': sampled
+      coefficient arrays,
+    - 'crt_encode', 'crt_decode': CRT encoded or decoded coefficients,
+    - 'relinearize': relinearizations, one item per key digit,
+    - 'gen_key_pair', 'gen_relin_key': key generation.
+
+    The measurements accumulate for the lifetime of the metrics, so
+    exported counters never decrease; `reset` collects the measurements
+    of consecutive periods without affecting them.
+
+    Durations are inclusive, so a 'mul' includes the time of its
+    'poly_mul' and 'relinearize'. Only the innermost active metrics
+    record an operation. Recording is thread-safe; without active
+    metrics each instrumented operation costs a single context variable
+    lookup.
+
+    Attributes:
+    - labels: labels identifying these metrics in exports, e.g.
+      {'instance': 'evaluator-1'}.
+    """
+
+    def __init__(self, labels: Dict[str, str] = None):
+        self.labels = dict(labels or {})
+        self._lock = threading.Lock()
+        self._stats: Dict[str, OperationStats] = {}
+        self._period: Dict[str, OperationStats] = {}
+
+    def __repr__(self):
+        return f"Metrics({self.labels})"
+
+    def record(self, operation: str, seconds: float, items: int = 1):
+        """
+        Record one call of an operation.
+        """
+
+        stats = OperationStats(1, items, seconds, seconds)
+        with self._lock:
+            for totals in (self._stats, self._period):
+                current = totals.get(operation)
+                totals[operation] = (stats if current is None
+                                     else current + stats)
+
+    def snapshot(self) -> Dict[str, OperationStats]:
+        """
+        The measurements since the metrics were created, by operation
+        name.
+        """
+
+        with self._lock:
+            return dict(self._stats)
+
+    def reset(self) -> Dict[str, OperationStats]:
+        """
+        Start a new measurement period. The measurements returned by
+        `snapshot` and exported are not cleared.
+
+        Returns:
+        - the measurements since the previous reset, by operation name,
+          so that consecutive periods can be collected without losing
+          operations in between.
+        """
+
+        with self._lock:
+            stats, self._period = self._period, {}
+        return stats
+
+    def activate(self):
+        """
+        A context manager recording the operations of its block into these
+        metrics.
+        """
+
+        return _Activation(self)
+
+    def measure(self, operation: str, items: int = 1) -> '_Timer':
+        """
+        A context manager recording its block as one call of an
+        operation.
+        """
+
+        return _Timer(self, operation, items)
+
+    def to_prometheus(self, prefix: str = 'venum') -> str:
+        """
+        The measurements in the Prometheus text exposition format, see
+        `format_prometheus`.
+        """
+
+        return format_prometheus([self], prefix)
+
+
+class _Activation:
+    __slots__ = ('_metrics', '_token')
+
+    def __init__(self, metrics: Metrics):
+        self._metrics = metrics
+
+    def __enter__(self):
+        self._token = _active.set(self._metrics)
+        return self._metrics
+
+    def __exit__(self, *exc_info):
+        _active.reset(self._token)
+
+
+class _Timer:
+    """
+    Times the body of a `with` block as one call of an operation.
+    """
+
+    __slots__ = ('_metrics', '_operation', '_items', '_start')
+
+    def __init__(self, metrics: Metrics, operation: str, items: int):
+        self._metrics = metrics
+        self._operation = operation
+        self._items = items
+
+    def set_items(self, items: int):
+        """
+        Set the number of items processed, when only known inside the
+        block.
+        """
+
+        self._items = items
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._metrics.record(self._operation,
+                             time.perf_counter() - self._start, self._items)
+
+
+class _NullTimer:
+    """
+    The timer used without active metrics, which does nothing.
+    """
+
+    __slots__ = ()
+
+    def set_items(self, items: int):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def active_metrics() -> Metrics:
+    """
+    The metrics active in the current context, or None.
+    """
+
+    return _active.get()
+
+
+def activate(metrics: Metrics):
+    """
+    Like `Metrics.activate`, doing nothing if `metrics` is None.
+    """
+
+    if metrics is None:
+        return _NULL_TIMER
+    return _Activation(metrics)
+
+
+def measure(operation: str, items: int = 1):
+    """
+    A context manager recording its block as one call of an operation
+    into the active metrics, if any.
+    """
+
+    metrics = _active.get()
+    if metrics is None:
+        return _NULL_TIMER
+    return _Timer(metrics, operation, items)
+
+
+def metered(operation: str):
+    """
+    Decorate a method of a class with a `metrics` attribute, so that the
+    method activates those metrics and is recorded as `operation`.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = self.metrics
+            if metrics is None:
+                return method(self, *args, **kwargs)
+            with _Activation(metrics), _Timer(metrics, operation, 1):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Exported metric families: suffix, type, help and the statistic.
+_FAMILIES = (
+    ('operation_calls_total', 'counter',
+     'Number of calls of each operation.', 'calls'),
+    ('operation_items_total', 'counter',
+     'Number of items processed by each operation.', 'items'),
+    ('operation_seconds_total', 'counter',
+     'Total time spent in each operation, in seconds.', 'seconds'),
+    ('operation_max_seconds', 'gauge',
+     'Duration of the slowest call of each operation, in seconds.',
+     'max_seconds'),
+)
+
+_LABEL_NAME = re.compile(r'[a-zA-Z_][a-zA-Z0-9_]*')
+
+
+def _label_value(value) -> str:
+    return (str(value).replace('\\', '\\\\').replace('\n', '\\n')
+            .replace('"', '\\"'))
+
+
+def format_prometheus(metrics: Iterable[Metrics],
+                      prefix: str = 'venum') -> str:
+    """
+    Export metrics in the Prometheus text exposition format, with one
+    sample per operation and metrics object in each family, e.g.
+
+        venum_operation_calls_total{instance="api",operation="mul"} 12
+
+    Args:
+    - metrics: the metrics to export, told apart by their labels.
+    - prefix: the prefix of the metric names.
+
+    Returns:
+    - the exposition text, ending with a newline.
+
+    Raises:
+    - ValueError: if a label name is invalid.
+    """
+
+    snapshots = []
+    for item in metrics:
+        for name in item.labels:
+            if not _LABEL_NAME.fullmatch(name) or name == 'operation':
+                raise ValueError(f"Invalid label name {name!r}")
+        labels = ','.join(f'{name}="{_label_value(value)}"'
+                          for name, value in sorted(item.labels.items()))
+        snapshots.append((labels + ',' if labels else '', item.snapshot()))
+
+    lines = []
+    for suffix, kind, help_text, field in _FAMILIES:
+        name = f'{prefix}_{suffix}'
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, snapshot in snapshots:
+            for operation in sorted(snapshot):
+                value = getattr(snapshot[operation], field)
+                lines.append(f'{name}{{{labels}operation='
+                             f'"{_label_value(operation)}"}} {value!r}')
+    return '\n'.join(lines) + '\n'
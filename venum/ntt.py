@@ -0,0 +1,265 @@
+import numpy as np
+
+import functools
+from typing import List
+
+# Moduli below this bound keep NTT products of residues within int64.
+NTT_INT64_MODULUS_BOUND = 2 ** 31
+
+_MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def is_prime(number: int) -> bool:
+    """
+    Miller-Rabin primality test. Deterministic for numbers below 3.3e24,
+    probabilistic with a fixed set of bases above.
+
+    Args:
+    - number: the integer to test.
+
+    Returns:
+    - True if `number` is (very likely) prime.
+    """
+
+    if number < 2:
+        return False
+    for p in _MILLER_RABIN_BASES:
+        if number % p == 0:
+            return number == p
+    d, s = number - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in _MILLER_RABIN_BASES:
+        y = pow(a, d, number)
+        if y in (1, number - 1):
+            continue
+        for _ in range(s - 1):
+            y = y * y % number
+            if y == number - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def ensure_ntt_friendly(dimension: int, modulus: int):
+    """
+    Check that negacyclic NTT multiplication is available for the ring
+    Z_q[x]/(x^n + 1), i.e. n is a power of two, q is prime and
+    q = 1 mod 2n.
+
+    Args:
+    - dimension: the ring dimension n.
+    - modulus: the coefficient modulus q.
+
+    Raises:
+    - ValueError: describing the first condition that does not hold.
+    """
+
+    if dimension < 2 or dimension & (dimension - 1):
+        raise ValueError(f"NTT requires a power-of-two dimension, "
+                         f"got {dimension}")
+    if (modulus - 1) % (2 * dimension) != 0:
+        raise ValueError(f"NTT requires modulus = 1 mod {2 * dimension}, "
+                         f"got {modulus} = {modulus % (2 * dimension)} "
+                         f"mod {2 * dimension}")
+    if not is_prime(modulus):
+        raise ValueError(f"NTT requires a prime modulus, got {modulus}")
+
+
+def is_ntt_friendly(dimension: int, modulus: int) -> bool:
+    """
+    Whether negacyclic NTT multiplication is available for the ring
+    Z_q[x]/(x^n + 1). See `ensure_ntt_friendly` for the conditions.
+    """
+
+    try:
+        ensure_ntt_friendly(dimension, modulus)
+    except ValueError:
+        return False
+    return True
+
+
+def generate_ntt_primes(dimension: int, bit_size: int,
+                        count: int) -> List[int]:
+    """
+    Find the largest `count` primes below 2^bit_size that are congruent
+    to 1 modulo 2 * dimension, e.g. to build an NTT-friendly RNS basis
+    for the ciphertext modulus.
+
+    Args:
+    - dimension: the ring dimension n, a power of two.
+    - bit_size: the maximum bit size of the primes.
+    - count: the number of primes to return.
+
+    Returns:
+    - a list of distinct primes in decreasing order.
+    """
+
+    step = 2 * dimension
+    candidate = ((2 ** bit_size - 1) // step) * step + 1
+    if candidate >= 2 ** bit_size:
+        candidate -= step
+    primes = []
+    while len(primes) < count:
+        if candidate <= step:
+            raise ValueError(f"Not enough {bit_size}-bit NTT primes "
+                             f"for dimension {dimension}")
+        if is_prime(candidate):
+            primes.append(candidate)
+        candidate -= step
+    return primes
+
+
+def _primitive_root_of_unity(order: int, modulus: int) -> int:
+    """
+    Find a primitive `order`-th root of unity modulo a prime, where
+    `order` is a power of two dividing modulus - 1.
+    """
+
+    exponent = (modulus - 1) // order
+    for candidate in range(2, modulus):
+        root = pow(candidate, exponent, modulus)
+        if pow(root, order // 2, modulus) == modulus - 1:
+            return root
+    raise ValueError(f"No primitive {order}-th root of unity "
+                     f"modulo {modulus}")
+
+
+def _bit_reversed_powers(base: int, dimension: int, modulus: int):
+    bits = dimension.bit_length() - 1
+    powers = [1] * dimension
+    for i in range(1, dimension):
+        powers[i] = powers[i - 1] * base % modulus
+    return [powers[int(f'{i:0{bits}b}'[::-1], 2)]
+            for i in range(dimension)]
+
+
+class NttMultiplier:
+    """
+    Negacyclic number-theoretic transform over Z_q[x]/(x^n + 1).
+
+    The 2n-th root of unity psi is folded into the butterflies so no
+    separate twist is needed: the forward transform is a Cooley-Tukey NTT
+    with psi powers in bit-reversed order, the inverse a Gentleman-Sande
+    NTT with inverse psi powers. Every stage is a single vectorized
+    operation over the last axis, so leading batch dimensions are
+    transformed together.
+
+    Attributes:
+    - dimension: the ring dimension n.
+    - modulus: the coefficient modulus q.
+    - dtype: the dtype used for the transforms. int64 when products of
+      residues fit, Python integers otherwise.
+    """
+
+    def __init__(self, dimension: int, modulus: int):
+        ensure_ntt_friendly(dimension, modulus)
+        self.dimension = dimension
+        self.modulus = modulus
+        self.dtype = (np.int64 if modulus < NTT_INT64_MODULUS_BOUND
+                      else object)
+        psi = _primitive_root_of_unity(2 * dimension, modulus)
+        psi_inv = pow(psi, -1, modulus)
+        self._psi_rev = np.array(
+            _bit_reversed_powers(psi, dimension, modulus), dtype=self.dtype)
+        self._psi_inv_rev = np.array(
+            _bit_reversed_powers(psi_inv, dimension, modulus),
+            dtype=self.dtype)
+        self._dimension_inv = pow(dimension, -1, modulus)
+
+    def __repr__(self):
+        return (f"NttMultiplier(dimension={self.dimension}, "
+                f"modulus={self.modulus})")
+
+    def forward(self, coeffs: np.ndarray) -> np.ndarray:
+        """
+        Transform reduced coefficients to the evaluation domain. The
+        evaluations are returned in bit-reversed order.
+        """
+
+        q = self.modulus
+        values = coeffs.astype(self.dtype)
+        batch_shape = values.shape[:-1]
+        groups, width = 1, self.dimension
+        while groups < self.dimension:
+            width //= 2
+            values = values.reshape(batch_shape + (groups, 2, width))
+            twiddles = self._psi_rev[groups:2 * groups].reshape(groups, 1)
+            lo = values[..., 0, :]
+            hi = values[..., 1, :] * twiddles % q
+            values = np.stack(((lo + hi) % q, (lo - hi) % q), axis=-2)
+            groups *= 2
+        return values.reshape(coeffs.shape)
+
+    def inverse(self, values: np.ndarray) -> np.ndarray:
+        """
+        Transform bit-reversed evaluations back to reduced coefficients.
+        """
+
+        q = self.modulus
+        coeffs = values.astype(self.dtype)
+        batch_shape = coeffs.shape[:-1]
+        groups, width = self.dimension, 1
+        while groups > 1:
+            groups //= 2
+            coeffs = coeffs.reshape(batch_shape + (groups, 2, width))
+            twiddles = self._psi_inv_rev[groups:2 * groups].reshape(
+                groups, 1)
+            lo = coeffs[..., 0, :]
+            hi = coeffs[..., 1, :]
+            coeffs = np.stack(((lo + hi) % q, (lo - hi) * twiddles % q),
+                              axis=-2)
+            width *= 2
+        coeffs = coeffs.reshape(values.shape)
+        return coeffs * self._dimension_inv % q
+
+    def multiply(self, lhs: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+        """
+        Multiply reduced coefficient arrays in Z_q[x]/(x^n + 1).
+        """
+
+        product = self.forward(lhs) * self.forward(rhs) % self.modulus
+        return self.inverse(product).astype(lhs.dtype)
+
+    def prepare(self, coeffs: np.ndarray) -> np.ndarray:
+        """
+        Precompute the form of a fixed operand used by
+        `multiply_prepared`, i.e. its evaluations.
+        """
+
+        return self.forward(coeffs)
+
+    def multiply_prepared(self, prepared: np.ndarray,
+                          rhs: np.ndarray) -> np.ndarray:
+        """
+        Multiply an operand prepared with `prepare` by reduced
+        coefficient arrays, skipping its forward transform.
+        """
+
+        product = prepared * self.forward(rhs) % self.modulus
+        return self.inverse(product).astype(rhs.dtype)
+
+    def multiply_sum_prepared(self, prepared: np.ndarray,
+                              rhs: np.ndarray) -> np.ndarray:
+        """
+        Sum over the first axis of the products computed by
+        `multiply_prepared`. The products are accumulated in the
+        evaluation domain and reduced once, so only one inverse transform
+        is needed whatever the number of terms.
+        """
+
+        products = prepared * self.forward(rhs) % self.modulus
+        total = products.sum(axis=0) % self.modulus
+        return self.inverse(total).astype(rhs.dtype)
+
+
+@functools.lru_cache(maxsize=None)
+def get_ntt_multiplier(dimension: int, modulus: int) -> NttMultiplier:
+    """
+    The NTT multiplier for a ring, with twiddle tables computed once per
+    (dimension, modulus) pair and shared by every ring using them.
+    """
+
+    return NttMultiplier(dimension, modulus)
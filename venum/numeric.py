@@ -1,5 +1,6 @@
-from sympy import Poly
-from sympy.abc import x
+from .ring import RingPoly
+
+import numpy as np
 
 from typing import Iterable
 
@@ -11,7 +12,7 @@ def nth_digit(number, radix, n):
     Args:
     - number: int, the number to extract the digit from.
     - radix: int, the base of the number system.
-    - n: int, the index of the digit to extract.j
+    - n: int, the index of the digit to extract.
 
     Returns:
     - int, the n-th digit of the number in the given radix.
@@ -27,31 +28,103 @@ def nth_digit(number, radix, n):
     if n < 0:
         raise ValueError("Index n must be non-negative.")
 
-    for _ in range(n):
-        number //= radix
+    return number // radix ** n % radix
+
+
+def radix_decompose(coeffs: np.ndarray, radix: int, num_components: int,
+                    signed: bool = False) -> np.ndarray:
+    """
+    Decompose an array of integers into its digits in a given radix, all
+    digits of all entries at once.
+
+    Power-of-two radices are decomposed by bit-slicing, other radices by
+    one division per digit. With `signed`, digits are balanced, i.e. in
+    [-radix / 2, radix / 2), which halves their magnitude (and the noise
+    they contribute when used for key switching) and allows negative
+    numbers.
+
+    Args:
+    - coeffs: an integer array (int64 or Python integers).
+    - radix: int, the base of the number system.
+    - num_components: int, the number of digits k to extract.
+    - signed: bool, whether to return balanced digits.
+
+    Returns:
+    - an array of shape (k,) + coeffs.shape whose entry i holds the i-th
+      digits, int64 when the radix fits. Unsigned digits of numbers of
+      k digits or more are truncated to the k lowest digits.
+
+    Raises:
+    - ValueError: if radix is less than 2 (3 for signed digits), if a
+      number is negative and `signed` is False, or if a number does not
+      fit in k signed digits.
+    """
+
+    if radix < 2:
+        raise ValueError("Radix must be at least 2.")
+    coeffs = np.asarray(coeffs)
+    if not signed and (coeffs < 0).any():
+        raise ValueError("Number must be non-negative.")
+    if signed and radix < 3:
+        raise ValueError("Signed digits require a radix of at least 3.")
+    dtype = np.int64 if radix <= 2 ** 62 else object
+    if coeffs.dtype != object and dtype is object:
+        coeffs = coeffs.astype(object)
+    bits = radix.bit_length() - 1
+    power_of_two = radix == 1 << bits
+
+    if power_of_two and not signed:
+        # Shifting a non-negative int64 by 63 or more bits gives 0.
+        shifts = [min(i * bits, 63) if coeffs.dtype != object else i * bits
+                  for i in range(num_components)]
+        shifts = np.array(shifts, dtype=coeffs.dtype).reshape(
+            (num_components,) + (1,) * coeffs.ndim)
+        return ((coeffs[np.newaxis] >> shifts) & (radix - 1)).astype(dtype)
 
-    return number % radix
+    digits = np.empty((num_components,) + coeffs.shape, dtype=dtype)
+    remainder = coeffs
+    for i in range(num_components):
+        if power_of_two:
+            digit, remainder = remainder & (radix - 1), remainder >> bits
+        else:
+            digit, remainder = remainder % radix, remainder // radix
+        if signed:
+            # Map digits in [radix / 2, radix) to negative digits and
+            # carry one to the next digit.
+            carry = digit >= radix - radix // 2
+            digit = np.where(carry, digit - radix, digit)
+            remainder = remainder + carry
+        digits[i] = digit
+    if signed and np.asarray(remainder).any():
+        raise ValueError(f"Number does not fit in {num_components} "
+                         f"signed digits.")
+    return digits
 
 
-def radix_decompose_poly(poly: Poly, radix: int,
-                         num_components: int, domain) -> Iterable[Poly]:
+def radix_decompose_poly(poly: RingPoly, radix: int, num_components: int,
+                         signed: bool = False) -> Iterable[RingPoly]:
     """
     Decompose a polynomial into its components in a given radix.
     The components are obtained by extracting the digits of the coefficients
     and constructing a new polynomial from them.
 
     Args:
-    - poly: Poly, the polynomial to decompose.
+    - poly: RingPoly, the polynomial to decompose.
     - radix: int, the base of the number system.
     - num_components: int, the number of components to extract.
-    - domain: Domain, the domain of the polynomial.
+    - signed: bool, whether to use balanced digits, see
+      `radix_decompose`. The coefficients are then centered in
+      (-q / 2, q / 2] before decomposition.
 
     Returns:
-    - Iterable[Poly], the components of the polynomial.
+    - Iterable[RingPoly], the components of the polynomial, in the ring of
+      `poly`.
     """
 
-    for n in range(num_components):
-        coeffs = (nth_digit(coef, radix, n)
-                  for coef in reversed(poly.all_coeffs()))
-        decomposed = Poly(coeffs, x, domain=domain)
-        yield decomposed
+    coeffs = poly.lift()
+    if signed:
+        modulus = poly.ring.modulus
+        coeffs = np.where(coeffs > modulus // 2, coeffs - modulus, coeffs)
+    digits = radix_decompose(coeffs, radix, num_components, signed)
+    for component in poly.ring.embed(digits):
+        yield RingPoly(poly.ring, component)
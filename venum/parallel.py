@@ -0,0 +1,412 @@
+from .encryption import Cipher, Decryptor, Encryptor
+from .evaluation import Evaluator
+from .glwe import EncryptionParameters, GlweDistribution, GlweSample
+from .key import PublicKey, RelinKey, SecretKey
+from .plaintext_encoding import PolynomialEncoder
+from .ring import RingPoly
+from .tracing import get_tracer
+
+import numpy as np
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Iterable, List, Tuple
+
+# Name, shape and dtype of an array in shared memory.
+ArrayDescriptor = Tuple[str, Tuple[int, ...], str]
+
+_trace = get_tracer('parallel')
+
+# The number of consecutive messages of a batch encrypted from one seed
+# sequence, independent of the number of processes.
+SEED_BLOCK_SIZE = 16
+
+
+class SharedArray:
+    """
+    A numpy array backed by a block of shared memory, which worker
+    processes attach to by name instead of receiving a pickled copy.
+
+    The process that creates the array owns the block and must `unlink`
+    it once no process needs it anymore, which `with` does on exit.
+
+    Attributes:
+    - array: the numpy view of the block.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, shape, dtype):
+        self._shm = shm
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, shape, dtype) -> 'SharedArray':
+        size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        return cls(shared_memory.SharedMemory(create=True, size=size),
+                   shape, dtype)
+
+    @classmethod
+    def attach(cls, descriptor: ArrayDescriptor) -> 'SharedArray':
+        name, shape, dtype = descriptor
+        return cls(shared_memory.SharedMemory(name=name), shape, dtype)
+
+    @property
+    def descriptor(self) -> ArrayDescriptor:
+        return self._shm.name, self.array.shape, self.array.dtype.str
+
+    def close(self):
+        # Views must be released before the buffer can be closed.
+        self.array = None
+        self._shm.close()
+
+    def unlink(self):
+        self.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.unlink()
+
+
+class _WorkerState:
+    """
+    The keys and helpers of a worker process, loaded once when the
+    worker starts.
+    """
+
+    def __init__(self, params_bytes: bytes, public_key_bytes: bytes,
+                 secret_key_bytes: bytes, relin_key_bytes: bytes):
+        params = EncryptionParameters.from_bytes(params_bytes)
+        self.dist = GlweDistribution(params)
+        self.public_key = (public_key_bytes and
+                           PublicKey.from_bytes(public_key_bytes, self.dist))
+        secret_key = (secret_key_bytes and
+                      SecretKey.from_bytes(secret_key_bytes, self.dist))
+        relin_key = (relin_key_bytes and
+                     RelinKey.from_bytes(relin_key_bytes, self.dist))
+        self.encoder = PolynomialEncoder(self.dist)
+        self.decryptor = secret_key and Decryptor(secret_key, self.encoder)
+        self.evaluator = Evaluator(self.dist, relin_key or None)
+
+
+_worker: _WorkerState = None
+
+
+def _init_worker(*key_bytes):
+    global _worker
+    _worker = _WorkerState(*key_bytes)
+
+
+def _ciphers(samples: np.ndarray, ring) -> List[Cipher]:
+    return [Cipher(GlweSample(mask=RingPoly(ring, mask),
+                              body=RingPoly(ring, body)))
+            for mask, body in samples]
+
+
+def _samples(ciphers: Iterable[Cipher], out: np.ndarray = None):
+    return np.stack([(c.glwe_sample.mask.coeffs, c.glwe_sample.body.coeffs)
+                     for c in ciphers], out=out)
+
+
+def _read(descriptor: ArrayDescriptor, start: int, stop: int) -> np.ndarray:
+    shared = SharedArray.attach(descriptor)
+    try:
+        return shared.array[start:stop].copy()
+    finally:
+        shared.close()
+
+
+def _write(descriptor: ArrayDescriptor, start: int, values: np.ndarray):
+    shared = SharedArray.attach(descriptor)
+    try:
+        shared.array[start:start + len(values)] = values
+    finally:
+        shared.close()
+
+
+def _encrypt_task(source: ArrayDescriptor, target: ArrayDescriptor,
+                  start: int, stop: int,
+                  seed_sequences: List[np.random.SeedSequence]):
+    # The chunk is made of whole blocks, one per seed sequence.
+    messages = _read(source, start, stop)
+    for index, seed_sequence in enumerate(seed_sequences):
+        block = slice(index * SEED_BLOCK_SIZE, (index + 1) * SEED_BLOCK_SIZE)
+        encryptor = Encryptor(_worker.dist.reseeded(seed_sequence),
+                              _worker.encoder)
+        ciphers = encryptor.encrypt_many(_worker.public_key, messages[block])
+        _write(target, start + block.start, _samples(ciphers))
+
+
+def _decrypt_task(source: ArrayDescriptor, target: ArrayDescriptor,
+                  start: int, stop: int):
+    ciphers = _ciphers(_read(source, start, stop), _worker.dist.cipher_ring)
+    _write(target, start, _worker.decryptor.decrypt_many(ciphers))
+
+
+def _combine_task(op: str, lhs: ArrayDescriptor, rhs: ArrayDescriptor,
+                  target: ArrayDescriptor, start: int, stop: int):
+    ring = _worker.dist.cipher_ring
+    lhs, rhs = _read(lhs, start, stop), _read(rhs, start, stop)
+    if op == 'add':
+        result = ring.reduce(lhs + rhs)
+    elif op == 'sub':
+        result = ring.reduce(lhs - rhs)
+    else:
+        evaluator = _worker.evaluator
+        result = _samples([
+            evaluator.mul(a, b)
+            for a, b in zip(_ciphers(lhs, ring), _ciphers(rhs, ring))])
+    _write(target, start, result)
+
+
+def _sum_task(source: ArrayDescriptor, start: int, stop: int,
+              weights: List[int]) -> np.ndarray:
+    ciphers = _ciphers(_read(source, start, stop), _worker.dist.cipher_ring)
+    return _samples([_worker.evaluator.sum(ciphers, weights)])[0]
+
+
+class ProcessPool:
+    """
+    Runs batch encryption, decryption and evaluation on a pool of worker
+    processes, so that batches use every core instead of one.
+
+    A batch is split into one contiguous chunk per worker. Ciphertext
+    coefficients are passed through shared memory rather than pickled:
+    the batch is copied once into a shared block, every worker copies
+    its chunk out of it and writes its results into another shared
+    block. The keys are serialized once and loaded by each worker when
+    it starts, not sent with every task.
+
+    Each block of `SEED_BLOCK_SIZE` consecutive messages is encrypted
+    with its own child of the seed sequence of `dist`, and chunks are
+    made of whole blocks, so with deterministic parameters a batch gives
+    the same ciphertexts whatever the number of processes.
+
+    Only rings with int64 coefficients, i.e. an RNS basis or a modulus
+    of at most 2^62, can be shared.
+
+    Attributes:
+    - dist: the GlweDistribution of the keys.
+    - plaintext_encoder: the encoder of the messages, applied in the
+      calling process.
+    - processes: the number of worker processes.
+    """
+
+    def __init__(self, dist: GlweDistribution, public_key: PublicKey = None,
+                 secret_key: SecretKey = None, relin_key: RelinKey = None,
+                 plaintext_encoder=None, processes: int = None):
+        """
+        Start the worker processes.
+
+        Args:
+        - dist: the GlweDistribution of the keys.
+        - public_key: the key used by `encrypt_many`, if any.
+        - secret_key: the key used by `decrypt_many`, if any.
+        - relin_key: the key used by `mul_many`, if any.
+        - plaintext_encoder: the encoder of the messages. Defaults to a
+          `PolynomialEncoder`.
+        - processes: the number of worker processes. Defaults to the
+          number of CPUs.
+
+        Raises:
+        - ValueError: if the ciphertext ring has arbitrary-size
+          coefficients.
+        """
+
+        if dist.cipher_ring.dtype is object:
+            raise ValueError("Process pools require int64 ciphertext "
+                             "coefficients, i.e. an RNS basis or a "
+                             "modulus of at most 2^62")
+        self.dist = dist
+        self.plaintext_encoder = plaintext_encoder or PolynomialEncoder(dist)
+        self.processes = processes or os.cpu_count()
+        params = dist.params
+        self._has_key = {'public': public_key is not None,
+                         'secret': secret_key is not None,
+                         'relinearization': relin_key is not None}
+        key_bytes = (params.to_bytes(),
+                     public_key and public_key.to_bytes(params),
+                     secret_key and secret_key.to_bytes(),
+                     relin_key and relin_key.to_bytes(params))
+        if _trace.enabled:
+            _trace.event('start', processes=self.processes)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes, initializer=_init_worker,
+            initargs=key_bytes)
+
+    def __repr__(self):
+        return f"ProcessPool({self.dist}, processes={self.processes})"
+
+    def close(self):
+        """
+        Shut the worker processes down.
+        """
+
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _ensure_key(self, kind: str):
+        if not self._has_key[kind]:
+            raise ValueError(f"No {kind} key provided")
+
+    def _chunks(self, count: int) -> List[Tuple[int, int]]:
+        bounds = np.linspace(0, count, min(self.processes, count) + 1)
+        bounds = bounds.astype(int).tolist()
+        return list(zip(bounds, bounds[1:]))
+
+    def _run(self, task, *args, chunks, extra_args=None) -> list:
+        extra_args = extra_args or [()] * len(chunks)
+        with _trace.span(task.__name__.strip('_'), chunks=len(chunks)):
+            futures = [self._executor.submit(task, *args, start, stop,
+                                             *extra)
+                       for (start, stop), extra in zip(chunks, extra_args)]
+            return [future.result() for future in futures]
+
+    def _share_ciphers(self, ciphers: List[Cipher]) -> SharedArray:
+        shared = SharedArray.create(
+            (len(ciphers), 2) + self.dist.cipher_ring.shape, np.int64)
+        _samples(ciphers, out=shared.array)
+        return shared
+
+    def _result_ciphers(self, shared: SharedArray) -> List[Cipher]:
+        return _ciphers(shared.array.copy(), self.dist.cipher_ring)
+
+    def encrypt_many(self, messages: Iterable[Iterable[int]]) -> List[Cipher]:
+        """
+        Encrypts a batch of messages with the public key, see
+        `Encryptor.encrypt_many`.
+
+        Raises:
+        - ValueError: if the pool has no public key.
+        """
+
+        self._ensure_key('public')
+        encoded = [self.plaintext_encoder.encode(message).coeffs
+                   for message in messages]
+        if not encoded:
+            return []
+        blocks = -(-len(encoded) // SEED_BLOCK_SIZE)
+        seeds = [child.seed_sequence for child in self.dist.spawn(blocks)]
+        block_chunks = self._chunks(blocks)
+        chunks = [(start * SEED_BLOCK_SIZE,
+                   min(stop * SEED_BLOCK_SIZE, len(encoded)))
+                  for start, stop in block_chunks]
+        ring = self.dist.cipher_ring
+        with SharedArray.create((len(encoded), self.dist.params.dimension),
+                                np.int64) as source, \
+                SharedArray.create((len(encoded), 2) + ring.shape,
+                                   np.int64) as target:
+            np.stack(encoded, out=source.array)
+            self._run(_encrypt_task, source.descriptor, target.descriptor,
+                      chunks=chunks,
+                      extra_args=[(seeds[start:stop],)
+                                  for start, stop in block_chunks])
+            return self._result_ciphers(target)
+
+    def decrypt_many(self, ciphers: Iterable[Cipher]) -> np.ndarray:
+        """
+        Decrypts a batch of ciphertexts with the secret key, see
+        `Decryptor.decrypt_many`.
+
+        Raises:
+        - ValueError: if the pool has no secret key.
+        """
+
+        self._ensure_key('secret')
+        ciphers = list(ciphers)
+        dimension = self.dist.params.dimension
+        if not ciphers:
+            return np.zeros((0, dimension), dtype=np.int64)
+        with self._share_ciphers(ciphers) as source, \
+                SharedArray.create((len(ciphers), dimension),
+                                   np.int64) as target:
+            self._run(_decrypt_task, source.descriptor, target.descriptor,
+                      chunks=self._chunks(len(ciphers)))
+            return self.plaintext_encoder.decode_many(target.array.copy())
+
+    def _combine(self, op: str, lhs: Iterable[Cipher],
+                 rhs: Iterable[Cipher]) -> List[Cipher]:
+        lhs, rhs = list(lhs), list(rhs)
+        if len(lhs) != len(rhs):
+            raise ValueError("Batches must have the same length")
+        if not lhs:
+            return []
+        with self._share_ciphers(lhs) as lhs_shared, \
+                self._share_ciphers(rhs) as rhs_shared, \
+                SharedArray.create(lhs_shared.array.shape,
+                                   np.int64) as target:
+            self._run(_combine_task, op, lhs_shared.descriptor,
+                      rhs_shared.descriptor, target.descriptor,
+                      chunks=self._chunks(len(lhs)))
+            return self._result_ciphers(target)
+
+    def add_many(self, lhs: Iterable[Cipher],
+                 rhs: Iterable[Cipher]) -> List[Cipher]:
+        """
+        Adds two batches of ciphertexts pairwise.
+
+        Raises:
+        - ValueError: if the batches have different lengths.
+        """
+
+        return self._combine('add', lhs, rhs)
+
+    def sub_many(self, lhs: Iterable[Cipher],
+                 rhs: Iterable[Cipher]) -> List[Cipher]:
+        """
+        Subtracts two batches of ciphertexts pairwise.
+
+        Raises:
+        - ValueError: if the batches have different lengths.
+        """
+
+        return self._combine('sub', lhs, rhs)
+
+    def mul_many(self, lhs: Iterable[Cipher],
+                 rhs: Iterable[Cipher]) -> List[Cipher]:
+        """
+        Multiplies two batches of ciphertexts pairwise, see
+        `Evaluator.mul`.
+
+        Raises:
+        - ValueError: if the batches have different lengths or the pool
+          has no relinearization key.
+        """
+
+        self._ensure_key('relinearization')
+        return self._combine('mul', lhs, rhs)
+
+    def sum(self, ciphers: Iterable[Cipher],
+            weights: Iterable[int] = None) -> Cipher:
+        """
+        Sums many ciphertexts, optionally weighted by integers, see
+        `Evaluator.sum`. Each worker sums its chunk and the partial sums
+        are added in the calling process.
+
+        Raises:
+        - ValueError: if the number of weights does not match.
+        """
+
+        ciphers = list(ciphers)
+        if weights is not None:
+            weights = [int(w) for w in weights]
+            if len(weights) != len(ciphers):
+                raise ValueError("Number of weights must match number of "
+                                 "ciphertexts")
+        evaluator = Evaluator(self.dist)
+        if not ciphers:
+            return evaluator.sum([])
+        chunks = self._chunks(len(ciphers))
+        with self._share_ciphers(ciphers) as source:
+            partials = self._run(
+                _sum_task, source.descriptor, chunks=chunks,
+                extra_args=[(weights and weights[a:b],) for a, b in chunks])
+        return evaluator.sum(_ciphers(np.stack(partials),
+                                      self.dist.cipher_ring))
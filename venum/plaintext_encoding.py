@@ -1,5 +1,8 @@
-from sympy import Poly
-from sympy.abc import x
+from .ntt import ensure_ntt_friendly, get_ntt_multiplier
+from .ring import RingPoly
+
+import numpy as np
+
 from typing import Iterable
 
 from abc import ABC
@@ -10,12 +13,31 @@ class Encoder(ABC):
     Interface for encoding and decoding plaintexts.
     """
 
-    def encode(self, message: Iterable[int]) -> Poly:
+    def encode(self, message: Iterable[int]) -> RingPoly:
         pass
 
-    def decode(self, poly: Poly) -> Iterable[int]:
+    def decode(self, poly: RingPoly) -> Iterable[int]:
         pass
 
+    def decode_coeffs(self, coeffs: np.ndarray) -> Iterable[int]:
+        """
+        Decodes plaintext coefficients already reduced modulo the plaintext
+        modulus, as produced by decryption.
+        """
+
+        return self.decode(self.dist.plaintext_ring.from_coeffs(coeffs))
+
+    def decode_many(self, coeffs: np.ndarray) -> np.ndarray:
+        """
+        Decodes a batch of plaintext coefficient arrays, one per row, as
+        produced by batch decryption.
+
+        Returns:
+        - A 2-D integer array with one decoded message per row.
+        """
+
+        return np.array([self.decode_coeffs(row) for row in coeffs])
+
 
 class PolynomialEncoder(Encoder):
     """
@@ -30,7 +52,7 @@ class PolynomialEncoder(Encoder):
 
         self.dist = dist
 
-    def encode(self, message: Iterable[int]) -> Poly:
+    def encode(self, message: Iterable[int]) -> RingPoly:
         """
         Encodes the given message as a polynomial by mapping each element to a
         coefficient of the polynomial in increasing order of degree.
@@ -42,9 +64,9 @@ class PolynomialEncoder(Encoder):
         - A polynomial representing the message.
         """
 
-        return Poly(reversed(message), x, domain=self.dist.plaintext_ring)
+        return self.dist.plaintext_ring.from_coeffs(message)
 
-    def decode(self, poly: Poly) -> Iterable[int]:
+    def decode(self, poly: RingPoly) -> Iterable[int]:
         """
         Decodes the given polynomial by extracting the coefficients and
         returning them as an iterable.
@@ -62,21 +84,207 @@ class PolynomialEncoder(Encoder):
         p0p1 = p0 * p1
         k = (q // (2 * p0p1)) * p0p1
 
-        coeffs = reversed(poly.all_coeffs())
-
         coeffs = list((((coef + k) % q) % p0p1) % p0
-                      for coef in coeffs)
-        if len(coeffs) < self.dist.params.dimension:
-            coeffs += [0] * (self.dist.params.dimension - len(coeffs))
+                      for coef in poly.tolist())
+        return coeffs
+
+    def decode_coeffs(self, coeffs: np.ndarray) -> Iterable[int]:
+        """
+        Decodes plaintext coefficients already reduced modulo the plaintext
+        modulus, as produced by decryption.
+
+        Args:
+        - coeffs: The message coefficients in increasing order of degree.
+
+        Returns:
+        - The message represented by the coefficients.
+        """
+
+        return [int(c) for c in coeffs]
+
+    def decode_many(self, coeffs: np.ndarray) -> np.ndarray:
+        """
+        Decodes a batch of plaintext coefficient arrays, which are the
+        messages themselves.
+
+        Args:
+        - coeffs: A 2-D array of message coefficients, one row per message.
+
+        Returns:
+        - The same array.
+        """
+
         return coeffs
 
 
 class BatchEncoder(Encoder):
+    """
+    Encodes messages of up to n values into the n slots of a plaintext
+    polynomial, so that ciphertext additions and multiplications act on
+    every slot independently.
+
+    This requires the plaintext modulus t to be a prime congruent to 1
+    modulo 2n, so that x^n + 1 splits into n linear factors modulo t. The
+    slots are the evaluations of the plaintext polynomial at the roots of
+    x^n + 1, i.e. its negacyclic NTT: encoding is an inverse transform and
+    decoding a forward transform.
+
+    Attributes:
+    - slot_count: the number of slots n.
+    """
+
     def __init__(self, dist):
+        """
+        Initializes the BatchEncoder with the given GLWE distribution.
+
+        Raises:
+        - ValueError: if the plaintext modulus does not split x^n + 1.
+        """
+
         self.dist = dist
+        dimension = dist.params.dimension
+        modulus = dist.params.plaintext_modulus
+        ensure_ntt_friendly(dimension, modulus)
+        self._ntt = get_ntt_multiplier(dimension, modulus)
+        self.slot_count = dimension
+
+    def encode(self, message: Iterable[int]) -> RingPoly:
+        """
+        Encodes the given values into the slots of a polynomial. Missing
+        slots are set to zero.
+
+        Args:
+        - message: The values to encode, at most `slot_count` of them.
+
+        Returns:
+        - A polynomial whose slots hold the values modulo t.
+
+        Raises:
+        - ValueError: if there are more values than slots.
+        """
+
+        ring = self.dist.plaintext_ring
+        values = [int(v) % ring.modulus for v in message]
+        if len(values) > self.slot_count:
+            raise ValueError(f"Cannot encode {len(values)} values into "
+                             f"{self.slot_count} slots")
+        slots = np.zeros(self.slot_count, dtype=self._ntt.dtype)
+        slots[:len(values)] = values
+        return RingPoly(ring, ring.reduce(self._ntt.inverse(slots)))
+
+    def decode(self, poly: RingPoly) -> Iterable[int]:
+        """
+        Decodes the slot values of the given plaintext polynomial.
 
-    def encode(self, message: Iterable[int]) -> Poly:
-        raise NotImplementedError
+        Args:
+        - poly: The polynomial to decode.
+
+        Returns:
+        - The list of the `slot_count` slot values.
+        """
+
+        return self.decode_coeffs(poly.coeffs)
+
+    def decode_coeffs(self, coeffs: np.ndarray) -> Iterable[int]:
+        """
+        Decodes plaintext coefficients already reduced modulo the plaintext
+        modulus, as produced by decryption.
+
+        Args:
+        - coeffs: The plaintext coefficients.
+
+        Returns:
+        - The list of the `slot_count` slot values.
+        """
+
+        return [int(v) for v in self._ntt.forward(np.asarray(coeffs))]
+
+    def decode_many(self, coeffs: np.ndarray) -> np.ndarray:
+        """
+        Decodes a batch of plaintext coefficient arrays with a single
+        vectorized transform.
+
+        Args:
+        - coeffs: A 2-D array of plaintext coefficients, one row per
+          message.
+
+        Returns:
+        - A 2-D integer array with the slot values of each message.
+        """
+
+        return self._ntt.forward(coeffs).astype(
+            self.dist.plaintext_ring.dtype)
+
+
+class Plaintext:
+    """
+    An encoded message used as the plaintext operand of `Evaluator`
+    operations. The forms of the message these operations need are
+    computed on first use and cached, so that a plaintext applied to many
+    ciphertexts is only prepared once.
+
+    Attributes:
+    - poly: the encoded message, an element of the plaintext ring.
+    """
+
+    def __init__(self, dist, poly: RingPoly):
+        """
+        Args:
+        - dist: the GLWE distribution of the ciphertexts it is used with.
+        - poly: the encoded message, e.g. the result of `Encoder.encode`.
+        """
+
+        self.dist = dist
+        self.poly = poly
+        self._crt_message = None
+        self._multiplicand = None
+        self._precomputed = None
+
+    def __repr__(self):
+        return f'Plaintext({self.poly})'
+
+    @classmethod
+    def encode(cls, message: Iterable[int], encoder: Encoder) -> 'Plaintext':
+        """
+        Encode a message with the given encoder.
+        """
+
+        return cls(encoder.dist, encoder.encode(message))
+
+    def crt_message(self) -> RingPoly:
+        """
+        The CRT-encoded message in the ciphertext ring, as added to the
+        body of a ciphertext by encryption.
+        """
+
+        if self._crt_message is None:
+            self._crt_message = self.dist.encode_crt_message(self.poly)
+        return self._crt_message
+
+    def multiplicand(self) -> RingPoly:
+        """
+        The message with coefficients centered in (-t/2, t/2] in the
+        ciphertext ring, which keeps the noise growth of multiplications
+        minimal.
+        """
+
+        if self._multiplicand is None:
+            coeffs = self.poly.lift()
+            modulus = self.poly.ring.modulus
+            centered = np.where(coeffs > modulus // 2, coeffs - modulus,
+                                coeffs)
+            ring = self.dist.cipher_ring
+            self._multiplicand = RingPoly(ring, ring.embed(centered))
+        return self._multiplicand
+
+    def precomputed(self):
+        """
+        The multiplicand precomputed for fast multiplication, see
+        `PolyRing.prepare`.
+        """
 
-    def decode(self, poly: Poly) -> Iterable[int]:
-        raise NotImplementedError
+        if self._precomputed is None:
+            multiplicand = self.multiplicand()
+            self._precomputed = multiplicand.ring.prepare(
+                multiplicand.coeffs)
+        return self._precomputed
@@ -0,0 +1,538 @@
+from .ntt import is_ntt_friendly, get_ntt_multiplier
+from .kronecker import KroneckerMultiplier
+from .metrics import measure
+from .rns import RnsBasis, RnsArray
+from .sampling import sample_uniform
+
+import numpy as np
+
+import functools
+import math
+from typing import Iterable
+
+# Largest modulus whose residues can be added in int64 without overflow.
+INT64_MODULUS_BOUND = 2 ** 62
+
+
+def negacyclic_fold(coeffs: np.ndarray, dimension: int) -> np.ndarray:
+    """
+    Fold a coefficient array of arbitrary length onto `dimension`
+    coefficients using the relation x^n = -1.
+
+    Args:
+    - coeffs: coefficients in increasing order of degree.
+    - dimension: the ring dimension n.
+
+    Returns:
+    - an array of `dimension` (unreduced) coefficients.
+    """
+
+    length = coeffs.shape[-1]
+    if length == dimension:
+        return coeffs
+    blocks = -(-length // dimension)
+    padded = np.zeros(blocks * dimension, dtype=coeffs.dtype)
+    padded[:length] = coeffs
+    padded = padded.reshape(blocks, dimension)
+    folded = padded[0::2].sum(axis=0)
+    if blocks > 1:
+        folded = folded - padded[1::2].sum(axis=0)
+    return folded
+
+
+def negacyclic_schoolbook(lhs: np.ndarray, rhs: np.ndarray,
+                          modulus: int) -> np.ndarray:
+    """
+    Multiply two reduced coefficient arrays in Z_q[x]/(x^n + 1) with a
+    full convolution followed by a negacyclic fold.
+
+    Args:
+    - lhs, rhs: coefficient arrays of length n with entries in [0, q).
+    - modulus: the coefficient modulus q.
+
+    Returns:
+    - the reduced product coefficients, with the dtype of `lhs`.
+    """
+
+    dimension = lhs.shape[-1]
+    if dimension * (modulus - 1) ** 2 < 2 ** 63:
+        full = np.convolve(lhs.astype(np.int64), rhs.astype(np.int64))
+    else:
+        full = np.convolve(lhs.astype(object), rhs.astype(object))
+    product = full[:dimension].copy()
+    product[:dimension - 1] -= full[dimension:]
+    return (product % modulus).astype(lhs.dtype)
+
+
+class SchoolbookMultiplier:
+    """
+    Quadratic-time negacyclic multiplication, usable for any modulus.
+    """
+
+    def __init__(self, modulus: int):
+        self.modulus = modulus
+
+    def __repr__(self):
+        return f"SchoolbookMultiplier(modulus={self.modulus})"
+
+    def multiply(self, lhs: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+        if lhs.ndim == 1 and rhs.ndim == 1:
+            return negacyclic_schoolbook(lhs, rhs, self.modulus)
+        shape = np.broadcast_shapes(lhs.shape, rhs.shape)
+        lhs, rhs = (np.broadcast_to(a, shape).reshape(-1, shape[-1])
+                    for a in (lhs, rhs))
+        return np.stack([negacyclic_schoolbook(a, b, self.modulus)
+                         for a, b in zip(lhs, rhs)]).reshape(shape)
+
+    def prepare(self, coeffs: np.ndarray) -> np.ndarray:
+        return coeffs
+
+    def multiply_prepared(self, prepared: np.ndarray,
+                          rhs: np.ndarray) -> np.ndarray:
+        return self.multiply(prepared, rhs).astype(rhs.dtype)
+
+    def multiply_sum_prepared(self, prepared: np.ndarray,
+                              rhs: np.ndarray) -> np.ndarray:
+        return functools.reduce(
+            lambda total, product: (total + product) % self.modulus,
+            self.multiply_prepared(prepared, rhs))
+
+
+def select_multiplier(dimension: int, modulus: int):
+    """
+    Pick the fastest multiplication engine supporting the given ring:
+    the NTT when q = 1 mod 2n, Kronecker substitution otherwise.
+
+    Args:
+    - dimension: the ring dimension n.
+    - modulus: the coefficient modulus q.
+
+    Returns:
+    - an object with a `multiply(lhs, rhs)` method on coefficient arrays.
+    """
+
+    if is_ntt_friendly(dimension, modulus):
+        return get_ntt_multiplier(dimension, modulus)
+    return KroneckerMultiplier(dimension, modulus)
+
+
+class PolyRing:
+    """
+    The negacyclic polynomial ring Z_q[x]/(x^n + 1).
+
+    Ring elements are `RingPoly` objects backed by a fixed-length
+    coefficient array in increasing order of degree. Reduction by the
+    polynomial modulus is a negacyclic fold rather than a polynomial
+    division.
+
+    Attributes:
+    - dimension: the degree n of the polynomial modulus x^n + 1.
+    - modulus: the coefficient modulus q.
+    - dtype: the numpy dtype of the coefficient arrays. Moduli up to
+      `INT64_MODULUS_BOUND` use int64, larger ones fall back to Python
+      integers.
+    - multiplier: the engine used for ring multiplication, see
+      `select_multiplier`.
+    """
+
+    def __init__(self, dimension: int, modulus: int, multiplier=None):
+        if dimension < 1:
+            raise ValueError("Dimension must be positive")
+        if modulus < 2:
+            raise ValueError("Modulus must be at least 2")
+        self.dimension = dimension
+        self.modulus = modulus
+        self.dtype = (np.int64 if modulus <= INT64_MODULUS_BOUND
+                      else object)
+        self.multiplier = (multiplier
+                           or select_multiplier(dimension, modulus))
+        # Number of coefficients of an element, to count batched products.
+        self._size = math.prod(self.shape)
+
+    def __repr__(self):
+        return (f"PolyRing(dimension={self.dimension}, "
+                f"modulus={self.modulus})")
+
+    def __eq__(self, other):
+        """
+        Rings are equal if their dimensions and moduli are equal
+        """
+        return (type(self) is type(other)
+                and self.dimension == other.dimension
+                and self.modulus == other.modulus)
+
+    def __hash__(self):
+        return hash((self.dimension, self.modulus))
+
+    def reduce(self, coeffs: np.ndarray) -> np.ndarray:
+        """
+        Reduce an array of integer coefficients modulo q.
+
+        Args:
+        - coeffs: an array with entries that may be negative or exceed q.
+
+        Returns:
+        - the reduced coefficients in [0, q) with the ring dtype.
+        """
+
+        with measure('reduce', coeffs.size):
+            if self.dtype is object:
+                coeffs = coeffs.astype(object)
+            return (coeffs % self.modulus).astype(self.dtype)
+
+    def lift(self, coeffs: np.ndarray) -> np.ndarray:
+        """
+        The integer coefficients in [0, q) represented by a coefficient
+        array of this ring.
+        """
+
+        return coeffs
+
+    def embed(self, coeffs: np.ndarray) -> np.ndarray:
+        """
+        Reduce a batch of integer coefficient arrays into coefficient
+        arrays of this ring.
+
+        Args:
+        - coeffs: an integer array of shape (..., n).
+
+        Returns:
+        - the reduced array, of shape (...) + `shape`.
+        """
+
+        return self.reduce(coeffs)
+
+    def from_coeffs(self, coeffs: Iterable[int]) -> 'RingPoly':
+        """
+        Build a ring element from coefficients in increasing order of
+        degree. Shorter inputs are zero-padded, longer inputs are folded
+        with x^n = -1, and every coefficient is reduced modulo q.
+
+        Args:
+        - coeffs: an iterable of integers.
+
+        Returns:
+        - the corresponding ring element.
+        """
+
+        if not isinstance(coeffs, np.ndarray):
+            coeffs = np.array([int(c) for c in coeffs], dtype=object)
+        elif self.modulus >= 2 ** 63:
+            coeffs = coeffs.astype(object)
+        if coeffs.size == 0:
+            return self.zero()
+        coeffs = coeffs % self.modulus
+        coeffs = negacyclic_fold(coeffs, self.dimension)
+        return RingPoly(self, self.reduce(coeffs))
+
+    @property
+    def shape(self):
+        """
+        The shape of the coefficient array of a ring element.
+        """
+
+        return (self.dimension,)
+
+    def zero(self) -> 'RingPoly':
+        """
+        The zero element of the ring.
+        """
+
+        return RingPoly(self, np.zeros(self.shape, dtype=self.dtype))
+
+    def sample_uniform(self, rng, batch_shape=()) -> np.ndarray:
+        """
+        Sample uniformly random coefficient arrays of this ring.
+
+        Args:
+        - rng: the random generator to draw from.
+        - batch_shape: leading dimensions of the returned array.
+
+        Returns:
+        - an array of shape batch_shape + ring shape.
+        """
+
+        shape = tuple(batch_shape) + self.shape
+        return sample_uniform(rng, self.modulus, shape).astype(self.dtype)
+
+    def multiply(self, lhs: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+        """
+        Multiply two reduced coefficient arrays of this ring, or batches
+        of them broadcast along their leading axes.
+        """
+
+        with measure('poly_mul') as timer:
+            product = self.multiplier.multiply(lhs, rhs)
+            timer.set_items(product.size // self._size)
+        return product
+
+    def prepare(self, coeffs: np.ndarray):
+        """
+        Precompute a fixed operand for repeated multiplications, e.g. its
+        NTT evaluations, in the form expected by `multiply_prepared`.
+        """
+
+        with measure('poly_prepare', coeffs.size // self._size):
+            return self.multiplier.prepare(coeffs)
+
+    def multiply_prepared(self, prepared, coeffs: np.ndarray) -> np.ndarray:
+        """
+        Multiply an operand precomputed with `prepare` by reduced
+        coefficient arrays, broadcasting batches like `multiply`.
+        """
+
+        with measure('poly_mul') as timer:
+            product = self.multiplier.multiply_prepared(prepared, coeffs)
+            timer.set_items(product.size // self._size)
+        return product
+
+    def multiply_sum_prepared(self, prepared,
+                              coeffs: np.ndarray) -> np.ndarray:
+        """
+        The sum over the first axis of `multiply_prepared(prepared,
+        coeffs)`, e.g. the dot product of a vector of prepared key
+        polynomials with a vector of digit polynomials. Engines that can
+        accumulate before reducing (the NTT) do so.
+        """
+
+        with measure('poly_mul') as timer:
+            product = self.multiplier.multiply_sum_prepared(prepared, coeffs)
+            timer.set_items(product.size // self._size * len(coeffs))
+        return product
+
+    def scale(self, coeffs: np.ndarray, scalar: int) -> np.ndarray:
+        """
+        Multiply a reduced coefficient array by an integer scalar.
+        """
+
+        scalar = scalar % self.modulus
+        if (self.dtype is object
+                or (self.modulus - 1) * scalar >= 2 ** 63):
+            return self.reduce(coeffs.astype(object) * scalar)
+        return self.reduce(coeffs * scalar)
+
+
+class RnsMultiplier:
+    """
+    Multiplies residue arrays of an `RnsPolyRing` one modulus at a time.
+
+    Attributes:
+    - multipliers: the multiplication engine of each modulus.
+    """
+
+    def __init__(self, multipliers):
+        self.multipliers = multipliers
+
+    def __repr__(self):
+        return f"RnsMultiplier({self.multipliers})"
+
+    def multiply(self, lhs: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+        return np.stack(
+            [multiplier.multiply(lhs[..., i, :], rhs[..., i, :])
+             for i, multiplier in enumerate(self.multipliers)], axis=-2)
+
+    def prepare(self, coeffs: np.ndarray) -> list:
+        return [multiplier.prepare(coeffs[..., i, :])
+                for i, multiplier in enumerate(self.multipliers)]
+
+    def multiply_prepared(self, prepared: list,
+                          rhs: np.ndarray) -> np.ndarray:
+        return np.stack(
+            [multiplier.multiply_prepared(prepared[i], rhs[..., i, :])
+             for i, multiplier in enumerate(self.multipliers)], axis=-2)
+
+    def multiply_sum_prepared(self, prepared: list,
+                              rhs: np.ndarray) -> np.ndarray:
+        return np.stack(
+            [multiplier.multiply_sum_prepared(prepared[i], rhs[..., i, :])
+             for i, multiplier in enumerate(self.multipliers)], axis=-2)
+
+
+class RnsPolyRing(PolyRing):
+    """
+    The ring Z_q[x]/(x^n + 1) for a composite q = q_1 * ... * q_k given by
+    an `RnsBasis` of word-sized moduli, in double-CRT form.
+
+    Elements store one residue polynomial per modulus, i.e. a (k, n)
+    coefficient array with row i reduced modulo q_i. Additions and
+    multiplications act on each row independently with int64 arithmetic
+    and the per-modulus multiplication engine; integer coefficients are
+    only reconstructed by `lift`.
+
+    Attributes:
+    - basis: the RnsBasis of the ciphertext modulus.
+    - moduli: the moduli as a (k, 1) int64 array.
+    """
+
+    def __init__(self, dimension: int, basis: RnsBasis):
+        if any(m > INT64_MODULUS_BOUND for m in basis.moduli):
+            raise ValueError(f"RNS moduli must be at most "
+                             f"{INT64_MODULUS_BOUND}")
+        self.basis = basis
+        self.moduli = np.array(basis.moduli, dtype=np.int64).reshape(-1, 1)
+        multiplier = RnsMultiplier([select_multiplier(dimension, m)
+                                    for m in basis.moduli])
+        super().__init__(dimension, math.prod(basis.moduli), multiplier)
+        self.dtype = np.int64
+
+    def __repr__(self):
+        return (f"RnsPolyRing(dimension={self.dimension}, "
+                f"basis={self.basis})")
+
+    def __eq__(self, other):
+        return (type(self) is type(other)
+                and self.dimension == other.dimension
+                and self.basis == other.basis)
+
+    def __hash__(self):
+        return hash((self.dimension, tuple(self.basis.moduli)))
+
+    @property
+    def shape(self):
+        return (len(self.basis), self.dimension)
+
+    def sample_uniform(self, rng, batch_shape=()) -> np.ndarray:
+        """
+        Sample uniformly random residue arrays, each row independently
+        modulo its own modulus.
+        """
+
+        return np.stack([sample_uniform(rng, m, tuple(batch_shape)
+                                        + (self.dimension,))
+                         for m in self.basis.moduli], axis=-2)
+
+    def reduce(self, coeffs: np.ndarray) -> np.ndarray:
+        """
+        Reduce an array of integers modulo every modulus of the basis.
+        An array of n integer coefficients is broadcast to all moduli.
+        """
+
+        with measure('reduce', coeffs.size):
+            if coeffs.dtype == object:
+                moduli = self.moduli.astype(object)
+            else:
+                moduli = self.moduli
+            return (coeffs % moduli).astype(np.int64)
+
+    def embed(self, coeffs: np.ndarray) -> np.ndarray:
+        return self.reduce(coeffs[..., np.newaxis, :])
+
+    def lift(self, coeffs: np.ndarray) -> np.ndarray:
+        """
+        Reconstruct the integer coefficients in [0, q) from the residue
+        rows with the Chinese remainder theorem. A batch of shape
+        (..., k, n) gives integers of shape (..., n).
+        """
+
+        with measure('rns_lift', coeffs.size // len(self.basis)):
+            return RnsArray(self.basis, np.moveaxis(coeffs, -2, 0)).to_int()
+
+    def _mul_residues(self, lhs: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+        if self.basis.word_sized:
+            return lhs * rhs % self.moduli
+        return self.reduce(lhs.astype(object) * rhs.astype(object))
+
+    def scale(self, coeffs: np.ndarray, scalar: int) -> np.ndarray:
+        residues = np.array([scalar % m for m in self.basis.moduli],
+                            dtype=np.int64).reshape(-1, 1)
+        return self._mul_residues(coeffs, residues)
+
+
+class RingPoly:
+    """
+    An element of a `PolyRing`.
+
+    Attributes:
+    - coeffs: the reduced coefficients in increasing order of degree. For
+      an `RnsPolyRing` these are the residue polynomials, one row per
+      modulus.
+    """
+
+    def __init__(self, ring: PolyRing, coeffs: np.ndarray):
+        if coeffs.shape != ring.shape:
+            raise ValueError("Number of coefficients must match the "
+                             "ring dimension")
+        self._ring = ring
+        self.coeffs = coeffs
+
+    @property
+    def ring(self):
+        return self._ring
+
+    def __repr__(self):
+        return (f"RingPoly({self.coeffs.tolist()}, "
+                f"modulus={self.ring.modulus})")
+
+    def _ensure_same_ring(self, other):
+        if not (isinstance(other, RingPoly) and self.ring == other.ring):
+            other_ring = getattr(other, 'ring', type(other).__name__)
+            raise ValueError(f"Incompatible rings: {self.ring}"
+                             f" != {other_ring}")
+
+    def __eq__(self, other):
+        return (isinstance(other, RingPoly) and self.ring == other.ring
+                and np.array_equal(self.coeffs, other.coeffs))
+
+    __hash__ = None
+
+    @property
+    def is_zero(self):
+        return not self.coeffs.any()
+
+    def lift(self) -> np.ndarray:
+        """
+        The coefficients in [0, q) as an integer array.
+        """
+
+        return self.ring.lift(self.coeffs)
+
+    def tolist(self):
+        """
+        The coefficients in [0, q) as a list of Python integers.
+        """
+
+        return [int(c) for c in self.lift()]
+
+    def to_ring(self, ring: PolyRing) -> 'RingPoly':
+        """
+        Reinterpret the coefficients of this element in another ring of
+        the same dimension, reducing them modulo the new modulus.
+
+        Args:
+        - ring: the target ring.
+
+        Returns:
+        - the corresponding element of `ring`.
+        """
+
+        if ring.dimension != self.ring.dimension:
+            raise ValueError(f"Incompatible dimensions: {self.ring}"
+                             f" != {ring}")
+        if ring == self.ring:
+            return self
+        return RingPoly(ring, ring.reduce(self.lift()))
+
+    def __add__(self, other):
+        self._ensure_same_ring(other)
+        return RingPoly(self.ring, self.ring.reduce(
+            self.coeffs + other.coeffs))
+
+    def __sub__(self, other):
+        self._ensure_same_ring(other)
+        return RingPoly(self.ring, self.ring.reduce(
+            self.coeffs - other.coeffs))
+
+    def __neg__(self):
+        return RingPoly(self.ring, self.ring.reduce(-self.coeffs))
+
+    def __mul__(self, other):
+        if isinstance(other, (int, np.integer)):
+            return RingPoly(self.ring, self.ring.scale(self.coeffs, other))
+        self._ensure_same_ring(other)
+        return RingPoly(self.ring, self.ring.multiply(
+            self.coeffs, other.coeffs))
+
+    def __rmul__(self, other):
+        if isinstance(other, (int, np.integer)):
+            return self * other
+        return NotImplemented
@@ -1,19 +1,29 @@
-from .logging import logger
+from .tracing import get_tracer
+
+import numpy as np
 
 import math
+import operator
+from functools import cached_property
+
+_trace = get_tracer('rns')
 
 
 class RnsBasis:
     """
     Class representing a Residue Number System basis
 
+    The constants needed for CRT reconstruction are computed on first use
+    and cached on the basis.
+
     Attributes:
     - moduli (iterable): Array of moduli for the RNS representation
     """
 
     def __init__(self, moduli):
         RnsBasis.ensure_coprime_moduli(moduli)
-        logger.debug(f"New RnsBasis: {moduli}")
+        if _trace.enabled:
+            _trace.event('basis', moduli=len(moduli))
         self.moduli = moduli
 
     @staticmethod
@@ -42,7 +52,55 @@ class RnsBasis:
         """
         Basis are equal if their moduli are equal
         """
-        return self.moduli == other.moduli
+        return (isinstance(other, RnsBasis)
+                and list(self.moduli) == list(other.moduli))
+
+    @cached_property
+    def modulus(self):
+        """
+        The product M of the moduli
+        """
+        return math.prod(self.moduli)
+
+    @cached_property
+    def crt_factors(self):
+        """
+        The cofactors M / m_i
+        """
+        return [self.modulus // m for m in self.moduli]
+
+    @cached_property
+    def crt_inverses(self):
+        """
+        The inverses of the cofactors, (M / m_i)^-1 mod m_i
+        """
+        return [pow(f % m, -1, m)
+                for f, m in zip(self.crt_factors, self.moduli)]
+
+    @cached_property
+    def crt_idempotents(self):
+        """
+        The integers e_i = (M / m_i) * ((M / m_i)^-1 mod m_i), so that
+        x = sum(r_i * e_i) mod M
+        """
+        return [f * inv for f, inv in zip(self.crt_factors,
+                                          self.crt_inverses)]
+
+    @cached_property
+    def garner_inverses(self):
+        """
+        The table of inverses m_i^-1 mod m_j for i < j used by Garner's
+        algorithm
+        """
+        return [[pow(mi % mj, -1, mj) for mi in self.moduli[:j]]
+                for j, mj in enumerate(self.moduli)]
+
+    @cached_property
+    def word_sized(self):
+        """
+        Whether products of two residues fit a signed 64-bit integer
+        """
+        return max(self.moduli) ** 2 < 2 ** 63
 
     def to_rns(self, value):
         """
@@ -55,10 +113,84 @@ class RnsBasis:
         - Rns: RNS representation of the integer
         """
 
-        logger.debug(f"{value} -> {self}")
+        if _trace.enabled:
+            _trace.event('to_rns', moduli=len(self.moduli))
         residues = [value % m for m in self.moduli]
         return Rns(self, residues)
 
+    def to_rns_array(self, values):
+        """
+        Convert an array of integers to an RNS representation
+
+        Args:
+        - values (array-like): Integers to convert to RNS
+
+        Returns:
+        - RnsArray: RNS representation of the integers
+        """
+
+        return RnsArray.from_int(self, values)
+
+    def _column(self, constants, ndim, dtype):
+        """
+        Per-modulus constants shaped to broadcast against stacked residues
+        of dimension `ndim`
+        """
+        return np.array(constants, dtype=dtype).reshape(
+            (len(self),) + (1,) * (ndim - 1))
+
+    def _residue_dtype(self):
+        return np.int64 if self.word_sized else object
+
+    def _crt_reconstruct(self, residues):
+        dtype = self._residue_dtype()
+        moduli = self._column(self.moduli, residues.ndim, dtype)
+        inverses = self._column(self.crt_inverses, residues.ndim, dtype)
+        factors = self._column(self.crt_factors, residues.ndim, object)
+        scaled = residues * inverses % moduli
+        return (scaled.astype(object) * factors).sum(axis=0) % self.modulus
+
+    def _garner_reconstruct(self, residues):
+        # Every partial sum of the mixed-radix expansion is below M, so
+        # it stays in int64 when M does.
+        dtype = np.int64 if self.modulus < 2 ** 63 else object
+        digits = []
+        for j, mj in enumerate(self.moduli):
+            digit = residues[j]
+            for i, inv in enumerate(self.garner_inverses[j]):
+                digit = (digit - digits[i]) % mj * inv % mj
+            digits.append(digit)
+        value = digits[-1].astype(dtype)
+        for mj, digit in zip(reversed(self.moduli[:-1]),
+                             reversed(digits[:-1])):
+            value = value * mj + digit
+        return value
+
+    def reconstruct(self, residues, method=None):
+        """
+        Reconstruct integers from stacked residues
+
+        Args:
+        - residues (np.ndarray): Array of shape (len(moduli), ...) with the
+          residues modulo each modulus along the first axis
+        - method (str): 'crt' for the direct CRT formula, 'garner' for
+          Garner's mixed-radix algorithm. Defaults to Garner's algorithm,
+          which keeps all but the final accumulation in word-sized
+          arithmetic.
+
+        Returns:
+        - np.ndarray: Array of integers in [0, M), int64 when Garner's
+          algorithm is used and M < 2^63, Python integers otherwise
+        """
+
+        method = method or 'garner'
+        residues = np.asarray(residues).astype(self._residue_dtype())
+        if method == 'crt':
+            return self._crt_reconstruct(residues)
+        if method == 'garner':
+            return self._garner_reconstruct(residues)
+        raise ValueError(f"Unknown reconstruction method: {method}")
+
 
 class Rns:
     def __init__(self, basis, residues):
@@ -74,7 +206,6 @@ class Rns:
             raise ValueError("Number of residues must match number of moduli")
         self._basis = basis
         self.residues = residues
-        logger.debug(f"Created: {self}")
 
     @property
     def basis(self):
@@ -103,7 +234,6 @@ class Rns:
         if not (isinstance(other, Rns) and self.basis == other.basis):
             raise ValueError(f"Incompatible basis: {self.basis}"
                              f" != {other.basis}")
-        logger.debug(f"Performing operation {op} on {self} and {other}")
         residues = [op(a, b) % m for a, b, m in zip(
                     self.residues, other.residues, self.basis.moduli)]
         return Rns(self.basis, residues)
@@ -112,13 +242,13 @@ class Rns:
         return self.residues[key]
 
     def __add__(self, other):
-        return self.coeffwise_op(other, lambda a, b: a + b)
+        return self.coeffwise_op(other, operator.add)
 
     def __sub__(self, other):
-        return self.coeffwise_op(other, lambda a, b: a - b)
+        return self.coeffwise_op(other, operator.sub)
 
     def __mul__(self, other):
-        return self.coeffwise_op(other, lambda a, b: a * b)
+        return self.coeffwise_op(other, operator.mul)
 
     def to_int(self):
         """
@@ -128,12 +258,128 @@ class Rns:
         int: Integer representation of the RNS representation
         """
 
-        M = math.prod(self.basis.moduli)
-        total = 0
-        for mi, ai in zip(self.basis.moduli, self.residues):
-            Mi = M // mi
-            inv = pow(int(Mi), -1, int(mi))
-            total += ai * Mi * inv
-        result = total % M
-        logger.debug(f"{self} -> {result}")
+        total = sum(ai * ei for ai, ei in zip(self.residues,
+                                              self.basis.crt_idempotents))
+        result = total % self.basis.modulus
+        if _trace.enabled:
+            _trace.event('to_int', moduli=len(self.residues))
         return result
+
+
+class RnsArray:
+    """
+    RNS representation of an array of integers, stored as one residue
+    array per modulus.
+
+    Attributes:
+    - residues (np.ndarray): Array of shape (len(moduli), ...) with the
+      residues modulo each modulus along the first axis. The dtype is
+      int64 when products of residues fit, Python integers otherwise.
+    """
+
+    def __init__(self, basis, residues):
+        """
+        Create a new RNS array
+
+        Args:
+        - basis (RnsBasis): Basis for the RNS representation
+        - residues (np.ndarray): Residues, one row per modulus
+        """
+
+        residues = np.asarray(residues)
+        if residues.ndim == 0 or residues.shape[0] != len(basis):
+            raise ValueError("Number of residues must match number of moduli")
+        self._basis = basis
+        self.residues = residues.astype(basis._residue_dtype())
+
+    @classmethod
+    def from_int(cls, basis, values):
+        """
+        Convert an array of integers to RNS
+
+        Args:
+        - basis (RnsBasis): Basis for the RNS representation
+        - values (array-like): Integers to convert
+
+        Returns:
+        - RnsArray: RNS representation of the integers
+        """
+
+        values = np.asarray(values)
+        # Moduli above the int64 range do not fit an int64 column.
+        dtype = (object if values.dtype == object
+                 or max(basis.moduli) >= 2 ** 63 else np.int64)
+        moduli = basis._column(basis.moduli, values.ndim + 1, dtype)
+        return cls(basis, values[np.newaxis] % moduli)
+
+    @property
+    def basis(self):
+        return self._basis
+
+    @property
+    def shape(self):
+        """
+        The shape of the represented integer array
+        """
+        return self.residues.shape[1:]
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return f"RnsArray(basis={self.basis}, shape={self.shape})"
+
+    def __getitem__(self, key):
+        """
+        The RNS representation of a single integer of the array
+        """
+        if not isinstance(key, tuple):
+            key = (key,)
+        return Rns(self.basis,
+                   [int(r) for r in self.residues[(slice(None),) + key]])
+
+    def coeffwise_op(self, other, op):
+        """
+        Perform an element-wise operation on two RNS arrays
+
+        Args:
+        - other (RnsArray): Other RNS array
+        - op (function): Vectorized operation to perform on the residues
+
+        Returns:
+        - RnsArray: Result of the operation
+
+        Raises:
+        - ValueError: If the bases of the two RNS arrays are not equal
+        """
+
+        if not (isinstance(other, RnsArray) and self.basis == other.basis):
+            raise ValueError(f"Incompatible basis: {self.basis}"
+                             f" != {getattr(other, 'basis', other)}")
+        moduli = self.basis._column(self.basis.moduli, self.residues.ndim,
+                                    self.residues.dtype)
+        return RnsArray(self.basis,
+                        op(self.residues, other.residues) % moduli)
+
+    def __add__(self, other):
+        return self.coeffwise_op(other, operator.add)
+
+    def __sub__(self, other):
+        return self.coeffwise_op(other, operator.sub)
+
+    def __mul__(self, other):
+        return self.coeffwise_op(other, operator.mul)
+
+    def to_int(self, method=None):
+        """
+        Convert the RNS array back to integers
+
+        Args:
+        - method (str): Reconstruction method, see `RnsBasis.reconstruct`
+
+        Returns:
+        - np.ndarray: Array of integers in [0, M), see
+          `RnsBasis.reconstruct`
+        """
+
+        return self.basis.reconstruct(self.residues, method)
@@ -0,0 +1,153 @@
+import numpy as np
+
+import functools
+import hashlib
+import math
+from typing import Tuple, Union
+
+Shape = Union[int, Tuple[int, ...]]
+
+# Number of standard deviations covered by the discrete Gaussian table.
+GAUSSIAN_TAIL_CUT = 12
+
+# Byte length of the seeds expanded by `XofStream`.
+SEED_BYTES = 32
+
+
+def _shape(shape: Shape) -> Tuple[int, ...]:
+    return (shape,) if isinstance(shape, int) else tuple(shape)
+
+
+def _random_words(rng, count: int) -> np.ndarray:
+    return np.frombuffer(rng.bytes(8 * count), dtype='<u8')
+
+
+class XofStream:
+    """
+    A deterministic stream of random bytes expanded from a short seed
+    with the SHAKE-128 extendable-output function.
+
+    It can be passed as the `rng` of the samplers in this module, which
+    only draw through `bytes`. The n-th call to `bytes` returns the
+    output of SHAKE-128 on the seed followed by n, so the values sampled
+    from a stream are fully determined by the seed.
+
+    Attributes:
+    - seed: the seed of the stream.
+    """
+
+    def __init__(self, seed: bytes):
+        self.seed = seed
+        self._calls = 0
+
+    def bytes(self, length: int) -> bytes:
+        counter = self._calls.to_bytes(8, 'little')
+        self._calls += 1
+        return hashlib.shake_128(self.seed + counter).digest(length)
+
+
+def derive_seed(seed: bytes, index: int) -> bytes:
+    """
+    Derive the `index`-th independent seed from a master seed.
+    """
+
+    domain = b'venum.derive' + index.to_bytes(8, 'little')
+    return hashlib.shake_128(domain + seed).digest(SEED_BYTES)
+
+
+def sample_uniform(rng, modulus: int, shape: Shape) -> np.ndarray:
+    """
+    Sample integers uniformly from [0, modulus).
+
+    Moduli below 2^63 use vectorized rejection sampling on 64-bit words
+    and return an int64 array. Larger moduli reduce 64 extra random bits
+    per value and return an array of Python integers.
+
+    Args:
+    - rng: a numpy random generator (or `numpy.random` itself).
+    - modulus: the exclusive upper bound.
+    - shape: the shape of the returned array.
+
+    Returns:
+    - an array of the given shape.
+    """
+
+    shape = _shape(shape)
+    count = math.prod(shape)
+    if modulus > 2 ** 63:
+        width = (modulus.bit_length() + 64 + 7) // 8
+        buffer = rng.bytes(width * count)
+        values = [int.from_bytes(buffer[i * width:(i + 1) * width],
+                                 'little') % modulus
+                  for i in range(count)]
+        return np.array(values, dtype=object).reshape(shape)
+    mask = np.uint64((1 << (modulus - 1).bit_length()) - 1)
+    accepted = np.empty(0, dtype=np.uint64)
+    while len(accepted) < count:
+        words = _random_words(rng, 2 * (count - len(accepted)) + 8) & mask
+        accepted = np.concatenate([accepted, words[words < modulus]])
+    return accepted[:count].astype(np.int64).reshape(shape)
+
+
+def sample_ternary(rng, shape: Shape) -> np.ndarray:
+    """
+    Sample integers uniformly from {-1, 0, 1}.
+    """
+
+    return sample_uniform(rng, 3, shape) - 1
+
+
+def sample_centered_binomial(rng, eta: int, shape: Shape) -> np.ndarray:
+    """
+    Sample from the centered binomial distribution, the difference of the
+    number of heads in two series of `eta` coin flips. Values lie in
+    [-eta, eta] with variance eta / 2.
+    """
+
+    shape = _shape(shape)
+    count = math.prod(shape)
+    flips = np.unpackbits(
+        np.frombuffer(rng.bytes(-(-2 * eta * count // 8)), dtype=np.uint8))
+    flips = flips[:2 * eta * count].reshape(count, 2, eta).astype(np.int64)
+    heads = flips.sum(axis=-1)
+    return (heads[:, 0] - heads[:, 1]).reshape(shape)
+
+
+@functools.lru_cache(maxsize=None)
+def gaussian_cdt(stddev: float,
+                 tail_cut: int = GAUSSIAN_TAIL_CUT) -> np.ndarray:
+    """
+    Cumulative distribution table of |x| for the discrete Gaussian of the
+    given standard deviation, scaled to 63-bit fixed point.
+
+    Returns:
+    - an int64 array whose entry k is the probability of |x| <= k,
+      times 2^63.
+    """
+
+    bound = math.ceil(stddev * tail_cut)
+    weights = [math.exp(-k * k / (2 * stddev * stddev)) * (2 if k else 1)
+               for k in range(bound + 1)]
+    total = math.fsum(weights)
+    cumulative = np.cumsum(weights) / total
+    table = [min(int(c * 2.0 ** 63), 2 ** 63 - 1) for c in cumulative]
+    table[-1] = 2 ** 63 - 1
+    return np.array(table, dtype=np.int64)
+
+
+def sample_discrete_gaussian(rng, stddev: float,
+                             shape: Shape) -> np.ndarray:
+    """
+    Sample from the discrete Gaussian distribution centered at zero by
+    inversion of the cumulative distribution table of |x| and a random
+    sign.
+    """
+
+    shape = _shape(shape)
+    count = math.prod(shape)
+    table = gaussian_cdt(stddev)
+    words = _random_words(rng, count)
+    magnitudes = np.searchsorted(
+        table, (words >> np.uint64(1)).astype(np.int64), side='right')
+    signs = 1 - 2 * (words & np.uint64(1)).astype(np.int64)
+    return (magnitudes * signs).reshape(shape)
@@ -0,0 +1,209 @@
+from .ring import PolyRing
+
+import numpy as np
+
+import struct
+
+MAGIC = b'VNUM'
+FORMAT_VERSION = 1
+
+# Kinds of serialized objects, stored in the header.
+KIND_PARAMS = 1
+KIND_CIPHER = 2
+KIND_CIPHERS = 3
+KIND_SECRET_KEY = 4
+KIND_PUBLIC_KEY = 5
+KIND_RELIN_KEY = 6
+KIND_PREPARED_RELIN_KEY = 7
+
+# Byte length of an `EncryptionParameters` fingerprint.
+FINGERPRINT_BYTES = 16
+
+# Magic, format version, kind and parameters fingerprint. The header
+# length is a multiple of 8 so that coefficient blocks can be aligned.
+HEADER = struct.Struct(f'<4sHH{FINGERPRINT_BYTES}s')
+
+_WORD_MASK = 2 ** 64 - 1
+
+
+def coeff_words(ring: PolyRing) -> int:
+    """
+    The number of little-endian 64-bit words used to store a coefficient
+    of the given ring: one signed word for int64 rings, enough unsigned
+    words to hold the modulus otherwise.
+    """
+
+    if ring.dtype is object:
+        return -(-ring.modulus.bit_length() // 64)
+    return 1
+
+
+class Writer:
+    """
+    Builds a serialized object from a header and a sequence of fields.
+
+    Integers are little-endian. Coefficient blocks are 8-byte aligned
+    arrays of fixed-width little-endian words, so that a `Reader` can load
+    int64 blocks without copying.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._size = 0
+
+    def write(self, data: bytes):
+        self._chunks.append(data)
+        self._size += len(data)
+
+    def pack(self, fmt: str, *values):
+        self.write(struct.pack('<' + fmt, *values))
+
+    def write_header(self, kind: int, fingerprint: bytes):
+        self.write(HEADER.pack(MAGIC, FORMAT_VERSION, kind, fingerprint))
+
+    def write_int(self, value: int):
+        """
+        Write a non-negative integer of arbitrary size, prefixed by its
+        byte length.
+        """
+
+        data = value.to_bytes(-(-value.bit_length() // 8), 'little')
+        self.pack('I', len(data))
+        self.write(data)
+
+    def write_coeffs(self, ring: PolyRing, coeffs: np.ndarray):
+        """
+        Write a reduced coefficient array of the given ring.
+        """
+
+        self.write(bytes(-self._size % 8))
+        if ring.dtype is not object:
+            self.write(np.ascontiguousarray(coeffs, dtype='<i8').tobytes())
+            return
+        words = coeff_words(ring)
+        coeffs = np.asarray(coeffs, dtype=object)
+        limbs = np.stack([((coeffs >> (64 * i)) & _WORD_MASK).astype('<u8')
+                          for i in range(words)], axis=-1)
+        self.write(limbs.tobytes())
+
+    def write_words(self, array: np.ndarray):
+        """
+        Write an 8-byte aligned block of little-endian 64-bit signed
+        words, e.g. a precomputed form of a key.
+        """
+
+        self.write(bytes(-self._size % 8))
+        self.write(np.ascontiguousarray(array, dtype='<i8').tobytes())
+
+    def getvalue(self) -> bytes:
+        return b''.join(self._chunks)
+
+
+class Reader:
+    """
+    Reads the fields written by a `Writer` from a bytes-like object.
+
+    Int64 coefficient blocks are returned as read-only views into the
+    underlying buffer, so the buffer must outlive the loaded objects.
+    """
+
+    def __init__(self, data, offset: int = 0):
+        self._view = memoryview(data).cast('B')
+        self._offset = offset
+
+    @property
+    def offset(self) -> int:
+        return self._offset
+
+    def read(self, length: int) -> memoryview:
+        if self._offset + length > len(self._view):
+            raise ValueError('Truncated data')
+        data = self._view[self._offset:self._offset + length]
+        self._offset += length
+        return data
+
+    def unpack(self, fmt: str):
+        fmt = struct.Struct('<' + fmt)
+        return fmt.unpack(self.read(fmt.size))
+
+    def read_header(self, kind: int, fingerprint: bytes = None) -> bytes:
+        """
+        Read and validate a header.
+
+        Args:
+        - kind: the expected kind of object.
+        - fingerprint: the expected parameters fingerprint. If None, any
+            fingerprint is accepted.
+
+        Returns:
+        - the fingerprint stored in the header.
+
+        Raises:
+        - ValueError: if the header does not match.
+        """
+
+        magic, version, found_kind, found_fingerprint = HEADER.unpack(
+            self.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError('Not a venum serialized object')
+        if version != FORMAT_VERSION:
+            raise ValueError(f'Unsupported format version {version}')
+        if found_kind != kind:
+            raise ValueError(f'Expected object kind {kind}, '
+                             f'found {found_kind}')
+        if fingerprint is not None and found_fingerprint != fingerprint:
+            raise ValueError('Object was serialized with different '
+                             'encryption parameters')
+        return found_fingerprint
+
+    def read_int(self) -> int:
+        length, = self.unpack('I')
+        return int.from_bytes(self.read(length), 'little')
+
+    def read_coeffs(self, ring: PolyRing) -> np.ndarray:
+        """
+        Read a coefficient array of the given ring.
+
+        Raises:
+        - ValueError: if the coefficients are not reduced.
+        """
+
+        data = self._read_block(ring)
+        if ring.dtype is not object:
+            coeffs = np.frombuffer(data, dtype='<i8').reshape(ring.shape)
+        else:
+            words = coeff_words(ring)
+            limbs = np.frombuffer(data, dtype='<u8').reshape(
+                ring.shape + (words,)).astype(object)
+            coeffs = limbs[..., 0]
+            for i in range(1, words):
+                coeffs = coeffs + (limbs[..., i] << (64 * i))
+        if not np.array_equal(ring.reduce(coeffs), coeffs):
+            raise ValueError('Coefficients out of range')
+        return coeffs
+
+    def read_words(self, shape) -> np.ndarray:
+        """
+        Read a block written by `Writer.write_words` as a read-only int64
+        view of the given shape.
+        """
+
+        self.read(-self._offset % 8)
+        data = self.read(8 * int(np.prod(shape)))
+        return np.frombuffer(data, dtype='<i8').reshape(shape)
+
+    def skip_coeffs(self, ring: PolyRing):
+        """
+        Skip a coefficient array of the given ring without reading it.
+        """
+
+        self._read_block(ring)
+
+    def _read_block(self, ring: PolyRing) -> memoryview:
+        self.read(-self._offset % 8)
+        count = int(np.prod(ring.shape))
+        return self.read(8 * coeff_words(ring) * count)
+
+    def ensure_consumed(self):
+        if self._offset != len(self._view):
+            raise ValueError('Trailing data')
@@ -0,0 +1,229 @@
+from .logging import logger
+
+import numpy as np
+
+import logging
+import os
+import time
+from typing import Dict
+
+# Environment variable holding the comma-separated subsystems traced from
+# import time, or 'all'.
+TRACE_ENV = 'VENUM_TRACE'
+
+
+def describe(value) -> str:
+    """
+    A short description of a traced value: its size or shape rather than
+    its contents, so that tracing never formats whole polynomials (or
+    leaks key material into logs).
+    """
+
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return repr(value) if isinstance(value, str) else str(value)
+    if isinstance(value, np.ndarray):
+        return f"array{value.shape}"
+    coeffs = getattr(value, 'coeffs', None)
+    if isinstance(coeffs, np.ndarray):
+        return f"{type(value).__name__}{coeffs.shape}"
+    if isinstance(value, (list, tuple, dict, set)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+class TraceEvent:
+    """
+    A structured trace event. It is formatted only if a handler emits
+    the log record carrying it, and is also attached to the record as
+    its `trace` attribute for structured handlers.
+
+    Attributes:
+    - subsystem: the traced subsystem, e.g. 'evaluation'.
+    - operation: the traced operation, e.g. 'mul'.
+    - fields: the values describing the operation, e.g. batch sizes.
+    - duration: the duration of the operation in seconds, for spans.
+    """
+
+    __slots__ = ('subsystem', 'operation', 'fields', 'duration')
+
+    def __init__(self, subsystem: str, operation: str, fields: Dict,
+                 duration: float = None):
+        self.subsystem = subsystem
+        self.operation = operation
+        self.fields = fields
+        self.duration = duration
+
+    def __repr__(self):
+        return (f"TraceEvent({self.subsystem!r}, {self.operation!r}, "
+                f"{self.fields!r}, duration={self.duration})")
+
+    def __str__(self):
+        parts = [self.operation]
+        parts.extend(f"{key}={describe(value)}"
+                     for key, value in self.fields.items())
+        if self.duration is not None:
+            parts.append(f"duration={self.duration * 1e3:.3f}ms")
+        return ' '.join(parts)
+
+
+class _Span:
+    """
+    Times the body of a `with` block and emits it as one event.
+    """
+
+    __slots__ = ('_tracer', '_operation', '_fields', '_start')
+
+    def __init__(self, tracer: 'Tracer', operation: str, fields: Dict):
+        self._tracer = tracer
+        self._operation = operation
+        self._fields = fields
+
+    def set(self, **fields):
+        """
+        Add fields known only inside the block, e.g. a result size.
+        """
+
+        self._fields.update(fields)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._tracer._emit(TraceEvent(
+            self._tracer.subsystem, self._operation, self._fields,
+            time.perf_counter() - self._start))
+
+
+class _NullSpan:
+    """
+    The span of a disabled tracer, which does nothing.
+    """
+
+    __slots__ = ()
+
+    def set(self, **fields):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Emits the trace events of one subsystem as DEBUG records of the
+    'venum.<subsystem>' logger.
+
+    A disabled tracer costs a single attribute check: call sites guard
+    events with `if tracer.enabled:`, so neither the event nor its
+    fields are built, and `span` returns a shared no-op context manager.
+    Tracers are switched with `enable` and `disable`.
+
+    Attributes:
+    - subsystem: the name of the traced subsystem.
+    - enabled: whether events are emitted.
+    - logger: the logger receiving the events.
+    """
+
+    def __init__(self, subsystem: str):
+        self.subsystem = subsystem
+        self.enabled = False
+        self.logger = logger.getChild(subsystem)
+
+    def __repr__(self):
+        return f"Tracer({self.subsystem!r}, enabled={self.enabled})"
+
+    def event(self, operation: str, **fields):
+        """
+        Emit an event, if the tracer is enabled.
+        """
+
+        if self.enabled:
+            self._emit(TraceEvent(self.subsystem, operation, fields))
+
+    def span(self, operation: str, **fields):
+        """
+        A context manager emitting an event with the duration of its
+        block, if the tracer is enabled.
+        """
+
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, operation, fields)
+
+    def _emit(self, event: TraceEvent):
+        # stacklevel points the record at the traced function.
+        self.logger.debug(event, extra={'trace': event}, stacklevel=3)
+
+
+_tracers: Dict[str, Tracer] = {}
+_enabled_subsystems = set()
+_all_enabled = False
+
+
+def get_tracer(subsystem: str) -> Tracer:
+    """
+    The tracer of a subsystem, created on first use.
+    """
+
+    tracer = _tracers.get(subsystem)
+    if tracer is None:
+        tracer = _tracers[subsystem] = Tracer(subsystem)
+        tracer.enabled = _all_enabled or subsystem in _enabled_subsystems
+        if tracer.enabled:
+            tracer.logger.setLevel(logging.DEBUG)
+    return tracer
+
+
+def enable(*subsystems: str):
+    """
+    Enable the tracers of the given subsystems, or of every subsystem
+    (including those created later) if none is given. Their loggers are
+    set to the DEBUG level; the application still decides where records
+    go by configuring handlers.
+    """
+
+    global _all_enabled
+    if not subsystems:
+        _all_enabled = True
+        subsystems = tuple(_tracers)
+    _enabled_subsystems.update(subsystems)
+    for subsystem in subsystems:
+        tracer = get_tracer(subsystem)
+        tracer.enabled = True
+        tracer.logger.setLevel(logging.DEBUG)
+
+
+def disable(*subsystems: str):
+    """
+    Disable the tracers of the given subsystems, or of every subsystem if
+    none is given, and reset the level of their loggers.
+    """
+
+    global _all_enabled
+    if not subsystems:
+        _all_enabled = False
+        _enabled_subsystems.clear()
+        subsystems = tuple(_tracers)
+    _enabled_subsystems.difference_update(subsystems)
+    for subsystem in subsystems:
+        tracer = get_tracer(subsystem)
+        tracer.enabled = False
+        tracer.logger.setLevel(logging.NOTSET)
+
+
+def _enable_from_environment():
+    value = os.environ.get(TRACE_ENV, '').strip()
+    if value == 'all':
+        enable()
+    elif value:
+        enable(*(s.strip() for s in value.split(',') if s.strip()))
+
+
+_enable_from_environment()